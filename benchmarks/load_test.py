@@ -0,0 +1,311 @@
+"""
+Load-testing and latency benchmark for the voice agent API.
+
+Drives concurrent sessions against the FastAPI app in-process, with the
+AssemblyAI, Gemini and Murf providers replaced by local fakes with injected
+latency and error rates, so no API quota is spent.
+
+    python -m benchmarks.load_test --concurrency 32 --requests 500 --output bench.json
+    python -m benchmarks.load_test --compare bench.json      # fail on regressions
+"""
+import os
+import sys
+import gc
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import statistics
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault("USE_FAKE_PROVIDERS", "true")
+os.environ.setdefault("TTS_CACHE_ENABLED", "false")
+
+import httpx
+
+ENDPOINTS = ("agent_chat", "llm_query", "transcribe", "generate_speech")
+
+# Upper bounds (ms) of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyRecorder:
+    """Collects latency samples per named series"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, ok: bool = True) -> None:
+        self.samples.setdefault(name, []).append(seconds * 1000)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: summarize(values, self.errors.get(name, 0))
+            for name, values in sorted(self.samples.items())
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(values: List[float], errors: int = 0) -> Dict[str, Any]:
+    ordered = sorted(values)
+    histogram = {}
+    for bound in HISTOGRAM_BUCKETS_MS:
+        histogram[f"le_{bound}ms"] = sum(1 for v in ordered if v <= bound)
+    histogram["le_inf"] = len(ordered)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "min_ms": round(ordered[0], 3) if ordered else 0.0,
+        "mean_ms": round(statistics.fmean(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+        "histogram": histogram,
+    }
+
+
+def build_timed_fakes(recorder: LatencyRecorder, args: argparse.Namespace):
+    """Fake providers that also record how long each pipeline stage took"""
+    from services.fakes import FakeSTTService, FakeLLMService, FakeTTSService
+
+    class TimedSTT(FakeSTTService):
+        async def transcribe_audio(self, audio_data: bytes) -> Dict[str, Any]:
+            start = time.perf_counter()
+            result = await super().transcribe_audio(audio_data)
+            recorder.record("stage.stt", time.perf_counter() - start, result["success"])
+            return result
+
+    class TimedLLM(FakeLLMService):
+        async def generate_response(self, text: str, latency_budget: Optional[float] = None) -> Optional[str]:
+            start = time.perf_counter()
+            result = await super().generate_response(text, latency_budget=latency_budget)
+            recorder.record("stage.llm", time.perf_counter() - start, result is not None)
+            return result
+
+        async def generate_response_from_prompt(self, prompt: str, latency_budget: Optional[float] = None) -> Optional[str]:
+            start = time.perf_counter()
+            result = await super().generate_response_from_prompt(prompt, latency_budget=latency_budget)
+            recorder.record("stage.llm", time.perf_counter() - start, result is not None)
+            return result
+
+    class TimedTTS(FakeTTSService):
+        async def generate_speech(self, text: str, voice_id: str = "en-US-ken") -> Optional[str]:
+            start = time.perf_counter()
+            result = await super().generate_speech(text, voice_id)
+            recorder.record("stage.tts", time.perf_counter() - start, result is not None)
+            return result
+
+    return (
+        TimedSTT(latency=args.stt_latency, error_rate=args.error_rate),
+        TimedLLM(latency=args.llm_latency, error_rate=args.error_rate),
+        TimedTTS(latency=args.tts_latency, error_rate=args.error_rate),
+    )
+
+
+async def monitor_event_loop_lag(recorder: LatencyRecorder, stop: asyncio.Event, interval: float = 0.01) -> None:
+    """Measure how late the event loop wakes a sleeping task"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        recorder.record("event_loop_lag", max(0.0, time.perf_counter() - start - interval))
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        # ru_maxrss is KiB on Linux, bytes on macOS; this is a peak, not current
+        scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+async def send_request(client: httpx.AsyncClient, endpoint: str, session_id: str, audio: bytes) -> httpx.Response:
+    files = {"file": ("recording.webm", audio, "audio/webm")}
+    if endpoint == "agent_chat":
+        return await client.post(f"/agent/chat/{session_id}", files=files)
+    if endpoint == "llm_query":
+        return await client.post("/llm/query", files=files)
+    if endpoint == "transcribe":
+        return await client.post("/transcribe/file", files=files)
+    return await client.post("/generate-speech", json={"text": "Thanks for calling, how can I help?"})
+
+
+def is_success(endpoint: str, response: httpx.Response) -> bool:
+    if response.status_code != 200:
+        return False
+    if endpoint == "agent_chat":
+        return not response.json().get("error")
+    if endpoint == "generate_speech":
+        return response.json().get("success", False)
+    return True
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    import main
+    from services.container import container
+
+    recorder = LatencyRecorder()
+    stt, llm, tts = build_timed_fakes(recorder, args)
+    container.override("stt", stt)
+    container.override("llm", llm)
+    container.override("tts", tts)
+
+    audio = os.urandom(args.audio_bytes)
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    async def worker(worker_id: int, client: httpx.AsyncClient) -> None:
+        session_id = f"bench-{worker_id}"
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            endpoint = args.endpoints[i % len(args.endpoints)]
+            start = time.perf_counter()
+            try:
+                response = await send_request(client, endpoint, session_id, audio)
+                ok = is_success(endpoint, response)
+            except Exception:
+                ok = False
+            recorder.record(f"endpoint.{endpoint}", time.perf_counter() - start, ok)
+
+    gc.collect()
+    rss_start = current_rss_mb()
+    stop = asyncio.Event()
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # Warm-up request so lazy initialization isn't counted
+            await send_request(client, "generate_speech", "warmup", audio)
+
+            lag_task = asyncio.create_task(monitor_event_loop_lag(recorder, stop))
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(w, client) for w in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await lag_task
+
+    gc.collect()
+    rss_end = current_rss_mb()
+    summary = recorder.summary()
+    completed = sum(s["count"] for name, s in summary.items() if name.startswith("endpoint."))
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "endpoints": list(args.endpoints),
+            "stt_latency_s": args.stt_latency,
+            "llm_latency_s": args.llm_latency,
+            "tts_latency_s": args.tts_latency,
+            "error_rate": args.error_rate,
+            "audio_bytes": args.audio_bytes,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_sec": round(completed / elapsed, 2) if elapsed else 0.0,
+        "memory": {
+            "rss_start_mb": round(rss_start, 2),
+            "rss_end_mb": round(rss_end, 2),
+            "rss_growth_mb": round(rss_end - rss_start, 2),
+        },
+        "latency": summary,
+    }
+
+
+# Latency changes smaller than this are treated as noise regardless of percentage
+MIN_REGRESSION_MS = 1.0
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold_pct: float) -> List[str]:
+    """
+    Compare two benchmark results
+
+    Returns:
+        Human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for name, stats in current["latency"].items():
+        if not name.startswith(("endpoint.", "event_loop_lag")):
+            continue
+        base = baseline.get("latency", {}).get(name)
+        if not base or not base["p95_ms"]:
+            continue
+        change = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        if change > threshold_pct and stats["p95_ms"] - base["p95_ms"] >= MIN_REGRESSION_MS:
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {stats['p95_ms']}ms (+{change:.1f}%)")
+
+    base_rps = baseline.get("requests_per_sec") or 0
+    if base_rps:
+        change = (current["requests_per_sec"] - base_rps) / base_rps * 100
+        if change < -threshold_pct:
+            regressions.append(f"requests/sec {base_rps} -> {current['requests_per_sec']} ({change:.1f}%)")
+    return regressions
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\n{result['requests_per_sec']} req/s over {result['elapsed_s']}s "
+          f"(concurrency={result['config']['concurrency']})")
+    print(f"RSS {result['memory']['rss_start_mb']} -> {result['memory']['rss_end_mb']} MB")
+    print(f"{'series':<28}{'count':>7}{'err':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, stats in result["latency"].items():
+        print(f"{name:<28}{stats['count']:>7}{stats['errors']:>6}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the voice agent API against local fake providers")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client sessions")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--stt-latency", type=float, default=0.05, help="Injected STT latency (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Injected LLM latency (s)")
+    parser.add_argument("--tts-latency", type=float, default=0.1, help="Injected TTS latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected provider error rate (0-1)")
+    parser.add_argument("--audio-bytes", type=int, default=64 * 1024, help="Size of the uploaded audio")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    parser.add_argument("--compare", help="Baseline JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args))
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Cold-start benchmark for the voice agent API.
+
+Boots the app in fresh interpreters and times each phase: importing main.py,
+the lifespan warm-up until /ready would flip, and importing the provider SDKs
+(which should happen in the warm-up, not at import). Also lists the slowest
+modules from `python -X importtime`.
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+    python -m benchmarks.startup --compare startup.json      # fail on regressions
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import time
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be loaded by `import main` (they belong in the warm-up)
+PROVIDER_SDKS = ("assemblyai", "google.generativeai", "requests")
+
+# Runs inside a fresh interpreter and prints one JSON line
+CHILD = r"""
+import sys, json, time, asyncio
+started = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - started
+eager = [name for name in SDKS if name in sys.modules]
+modules = len(sys.modules)
+
+from services.warmup import startup
+
+async def boot():
+    started = time.perf_counter()
+    async with main.lifespan(main.app):
+        while not startup.ready:
+            await asyncio.sleep(0.002)
+        return time.perf_counter() - started
+
+warmup_seconds = asyncio.run(boot())
+
+from services.container import ServiceContainer
+started = time.perf_counter()
+ServiceContainer(use_fakes=False).preload()
+sdk_seconds = time.perf_counter() - started
+
+print(json.dumps({
+    "import_main": import_seconds,
+    "warmup": warmup_seconds,
+    "sdk_import": sdk_seconds,
+    "modules_at_import": modules,
+    "eager_sdks": eager,
+    "steps": startup.stats()["steps"],
+}))
+"""
+
+SERIES = ("process", "import_main", "warmup", "sdk_import")
+
+# Changes smaller than this are treated as noise regardless of percentage
+MIN_REGRESSION_MS = 20.0
+
+
+def child_env(args: argparse.Namespace) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("USE_FAKE_PROVIDERS", "false" if args.real else "true")
+    env.setdefault("TTS_CACHE_ENABLED", "false")
+    return env
+
+
+def boot_once(args: argparse.Namespace) -> Dict[str, Any]:
+    """Boot the app in a new interpreter and collect its phase timings"""
+    code = f"SDKS = {PROVIDER_SDKS!r}\n{CHILD}"
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=child_env(args), capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"App failed to boot:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process"] = elapsed
+    return result
+
+
+def slowest_imports(args: argparse.Namespace, top: int) -> List[Dict[str, Any]]:
+    """Modules with the largest self time while importing main.py"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=child_env(args), capture_output=True, text=True
+    )
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    modules.sort(key=lambda entry: entry["self_ms"], reverse=True)
+    return modules[:top]
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    # One unmeasured boot so .pyc files are written and the disk cache is warm
+    boot_once(args)
+    runs = [boot_once(args) for _ in range(args.runs)]
+
+    summary = {}
+    for name in SERIES:
+        values = sorted(run[name] * 1000 for run in runs)
+        summary[name] = {
+            "median_ms": round(statistics.median(values), 1),
+            "min_ms": round(values[0], 1),
+            "max_ms": round(values[-1], 1),
+        }
+    return {
+        "config": {"runs": args.runs, "real_providers": args.real, "python": sys.version.split()[0]},
+        "startup": summary,
+        "modules_at_import": runs[-1]["modules_at_import"],
+        "eager_sdks": runs[-1]["eager_sdks"],
+        "warmup_steps": runs[-1]["steps"],
+        "slowest_imports": slowest_imports(args, args.top),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold_pct: float) -> List[str]:
+    """
+    Compare two benchmark results
+
+    Returns:
+        Human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for name, stats in current["startup"].items():
+        base = baseline.get("startup", {}).get(name)
+        if not base or not base["median_ms"]:
+            continue
+        change = (stats["median_ms"] - base["median_ms"]) / base["median_ms"] * 100
+        if change > threshold_pct and stats["median_ms"] - base["median_ms"] >= MIN_REGRESSION_MS:
+            regressions.append(f"{name}: median {base['median_ms']}ms -> {stats['median_ms']}ms (+{change:.1f}%)")
+    for name in current["eager_sdks"]:
+        if name not in baseline.get("eager_sdks", []):
+            regressions.append(f"{name} is now imported by main.py")
+    return regressions
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\nStartup over {result['config']['runs']} runs "
+          f"({'real' if result['config']['real_providers'] else 'fake'} providers)")
+    print(f"{'phase':<16}{'median':>10}{'min':>10}{'max':>10}")
+    for name, stats in result["startup"].items():
+        print(f"{name:<16}{stats['median_ms']:>10.1f}{stats['min_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+    print(f"\n{result['modules_at_import']} modules loaded by `import main`; "
+          f"provider SDKs among them: {', '.join(result['eager_sdks']) or 'none'}")
+    print(f"\n{'slowest imports':<48}{'self ms':>10}{'cum ms':>10}")
+    for entry in result["slowest_imports"]:
+        print(f"{entry['module'][:47]:<48}{entry['self_ms']:>10.1f}{entry['cumulative_ms']:>10.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the voice agent's cold start")
+    parser.add_argument("--runs", type=int, default=5, help="Measured boots")
+    parser.add_argument("--real", action="store_true", help="Build the real provider services (needs API keys)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    parser.add_argument("--compare", help="Baseline JSON result to compare against")
+    parser.add_argument("--threshold", type=float, default=15.0, help="Allowed regression in percent")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""
+Build step for the web UI's static files.
+
+Copies each file under static/ to a content-hashed name, writes gzip and
+brotli (when the brotli package is installed) precompressed copies next to
+it, and writes the manifest the app serves them from. Run it when building a
+release so workers start with nothing to compress; the app rebuilds on its
+own when the manifest is missing or out of date.
+
+    python build_assets.py
+    python build_assets.py --source static --output .cache/static
+"""
+import os
+import sys
+import argparse
+import logging
+
+from services.static_assets import BROTLI_AVAILABLE, build_assets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress the static assets")
+    parser.add_argument("--source", default="static", help="Directory of the source assets")
+    parser.add_argument(
+        "--output",
+        default=os.getenv("STATIC_BUILD_DIR", os.path.join(".cache", "static")),
+        help="Build directory (STATIC_BUILD_DIR)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not BROTLI_AVAILABLE:
+        print("brotli is not installed; writing gzip copies only (pip install brotli)")
+
+    manifest = build_assets(args.source, args.output)
+    print(f"\n{'asset':<28}{'hashed name':<36}{'bytes':>8}{'gzip':>8}{'br':>8}")
+    for name, entry in manifest["assets"].items():
+        encodings = entry["encodings"]
+        print(
+            f"{name[:27]:<28}{entry['file'][:35]:<36}{entry['size']:>8}"
+            f"{encodings.get('gzip', '-'):>8}{encodings.get('br', '-'):>8}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
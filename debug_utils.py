@@ -1,44 +1,66 @@
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Bytes inspected for format and encoding checks; the rest of the file is never touched
+HEADER_SNIFF_BYTES = 64
 
-def log_audio_file_info(file_data: bytes, filename: str = "unknown") -> Dict[str, Any]:
+
+def detect_audio_format(header: bytes) -> str:
+    """
+    Detect a common audio container format from the first bytes of a file
+    
+    Args:
+        header: Leading bytes of the file (a few dozen are enough)
+        
+    Returns:
+        Format name, or "unknown"
+    """
+    if header.startswith(b'RIFF') and header[8:12] == b'WAVE':
+        return "WAV"
+    if header.startswith(b'ID3') or header[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
+        return "MP3"
+    if header.startswith(b'OggS'):
+        return "OGG"
+    if header.startswith(b'fLaC'):
+        return "FLAC"
+    if header.startswith(b'\x1a\x45\xdf\xa3'):
+        return "WEBM"
+    if header[4:8] == b'ftyp':
+        return "MP4"
+    return "unknown"
+
+
+def log_audio_file_info(file_data: bytes, filename: str = "unknown", size_bytes: Optional[int] = None) -> Dict[str, Any]:
     """
     Log information about uploaded audio file for debugging
     
+    Only the leading HEADER_SNIFF_BYTES are inspected, so callers can pass just
+    the header of a large upload together with its size.
+    
     Args:
-        file_data: Audio file bytes
+        file_data: Audio file bytes, or just its leading bytes
         filename: Original filename
+        size_bytes: Full file size, if file_data is only the header
         
     Returns:
         Dict with file information
     """
     try:
+        header = file_data[:HEADER_SNIFF_BYTES]
         info = {
             "filename": filename,
-            "size_bytes": len(file_data),
-            "first_10_bytes": file_data[:10].hex() if len(file_data) >= 10 else "N/A",
+            "size_bytes": size_bytes if size_bytes is not None else len(file_data),
+            "first_10_bytes": header[:10].hex() if len(header) >= 10 else "N/A",
+            "format": detect_audio_format(header),
             "encoding_check": "passed"
         }
         
-        # Try to detect common audio formats by header
-        if file_data.startswith(b'RIFF'):
-            info["format"] = "WAV"
-        elif file_data.startswith(b'\xff\xfb') or file_data.startswith(b'\xff\xf3') or file_data.startswith(b'\xff\xf2'):
-            info["format"] = "MP3"
-        elif file_data.startswith(b'OggS'):
-            info["format"] = "OGG"
-        elif file_data.startswith(b'fLaC'):
-            info["format"] = "FLAC"
-        else:
-            info["format"] = "unknown"
-        
         # Check for potential encoding issues
         try:
             # This will fail if the data contains non-ASCII bytes (which audio should)
-            file_data.decode('ascii')
+            header.decode('ascii')
             info["encoding_check"] = "warning - data looks like text, not binary audio"
         except UnicodeDecodeError:
             info["encoding_check"] = "passed - binary data detected"
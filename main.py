@@ -1,16 +1,33 @@
-
 import os
+import json
+import math
+import time
+import asyncio
 import logging
-from fastapi import FastAPI, Request, HTTPException, UploadFile, File
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+from fastapi import FastAPI, Request, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
-from services.stt_service import STTService
-from services.tts_service import TTSService
-from services.llm_service import LLMService
-from services.chat_service import ChatService
+from services.container import container
+from services.chat_service import FALLBACK_PHRASES
+from services.executor import provider_executor
+from services.concurrency import ProviderOverloadedError, provider_limits
+from services.resilience import CircuitBreaker, provider_guard
+from services.http_client import http_clients
+from services.telemetry import RequestContextMiddleware, RequestIdLogFilter, registry
+from services.uploads import UploadLimitMiddleware, detach_upload, open_upload
+from services.jobs import job_manager
+from services.warmup import startup, warm_provider_connections
+from services.batch import BatchItem, BatchTranscriber, batch_max_files
+from services.file_response import CachedFileResponse
+from services.static_assets import static_assets
 from schemas import TTSRequest, TTSResponse, QueryResponse, ChatResponse
 
 # Load environment variables
@@ -19,34 +36,109 @@ load_dotenv()
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(RequestIdLogFilter())
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="MURF Voice Agent API", version="1.0.0")
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+async def prewarm_fallback_audio():
+    """Synthesize the constant fallback phrases so error paths are served from the TTS cache"""
+    tts_service = container.tts
+    results = await asyncio.gather(
+        *(tts_service.generate_fallback_audio(phrase) for phrase in FALLBACK_PHRASES),
+        return_exceptions=True
+    )
+    warmed = sum(1 for result in results if isinstance(result, str))
+    logger.info(f"Pre-warmed {warmed}/{len(FALLBACK_PHRASES)} fallback phrases")
+    return {"warmed": warmed, "phrases": len(FALLBACK_PHRASES)}
 
-# Set up templates (for HTML)
+
+async def build_services():
+    """Build every provider service up front (their modules are already imported)"""
+    errors = []
+    for name in ("stt", "stt_stream", "tts", "llm", "chat"):
+        try:
+            container.get(name)
+        except Exception as e:
+            errors.append(f"{name}: {str(e)}")
+    if errors:
+        raise RuntimeError("; ".join(errors))
+
+
+async def prepare_static_assets():
+    """Load the static asset manifest, rebuilding it if the files under static/ changed"""
+    assets = await run_in_threadpool(static_assets.load)
+    return {"assets": len(assets), "built": static_assets.built_at_startup}
+
+
+async def warm_up():
+    """Load the SDKs, build the services, pre-connect to the providers and warm the caches"""
+    await startup.run([
+        ("static_assets", prepare_static_assets),
+        # SDK imports block for a second or more; keep them off the event loop
+        ("import_providers", lambda: run_in_threadpool(container.preload)),
+        ("build_services", build_services),
+        ("preconnect", lambda: warm_provider_connections({"stt": container.stt, "tts": container.tts, "llm": container.llm})),
+        ("fallback_audio", prewarm_fallback_audio),
+    ])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared provider resources on startup and release them on shutdown"""
+    await http_clients.start()
+    job_manager.start()
+    # Warm in the background: /health answers at once, /ready once this is done
+    warmup_task = asyncio.create_task(warm_up())
+    yield
+    warmup_task.cancel()
+    await job_manager.close()
+    await http_clients.close()
+    provider_executor.shutdown(wait=False)
+
+
+app = FastAPI(title="MURF Voice Agent API", version="1.0.0", lifespan=lifespan)
+
+# Reject oversize uploads before the body is buffered (MAX_UPLOAD_BYTES)
+app.add_middleware(UploadLimitMiddleware)
+# Request IDs, per-stage Server-Timing headers and HTTP metrics
+app.add_middleware(RequestContextMiddleware)
+
+# Set up templates (for HTML); asset_url("script.js") gives the content-hashed URL
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = static_assets.url
+
+startup.import_seconds = time.perf_counter() - _import_started
 
-# Initialize services
-stt_service = STTService()
-tts_service = TTSService()
-llm_service = LLMService()
-chat_service = ChatService()
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_file(path: str, request: Request):
+    """Serve a static file, precompressed to match Accept-Encoding"""
+    response = static_assets.response(path, request.headers)
+    if response is None:
+        return PlainTextResponse("Not Found", status_code=404)
+    return response
 
 
 @app.get("/favicon.ico", include_in_schema=False)
-async def favicon():
-    return FileResponse("static/favicon_io/favicon.ico")
+async def favicon(request: Request):
+    response = static_assets.response("favicon_io/favicon.ico", request.headers)
+    if response is None:
+        return PlainTextResponse("Not Found", status_code=404)
+    return response
 
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """Serve the main HTML page"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return templates.TemplateResponse("index.html", {
+        "request": request,
+        # Client-side voice activity detection: trailing silence that ends a turn
+        "vad_silence_ms": int(os.getenv("VAD_SILENCE_MS", "1200")),
+        "vad_threshold_db": float(os.getenv("VAD_THRESHOLD_DB", "-45")),
+    })
 
 
 @app.post("/generate-speech", response_model=TTSResponse)
@@ -62,7 +154,7 @@ async def generate_speech(request: TTSRequest):
     """
     try:
         logger.info(f"Generating speech for text: {request.text[:50]}...")
-        audio_url = await tts_service.generate_speech(request.text, request.voice_id)
+        audio_url = await container.tts.generate_speech(request.text, request.voice_id)
         
         if audio_url:
             return TTSResponse(
@@ -89,6 +181,211 @@ async def health_check():
     return {"status": "healthy", "service": "MURF Voice Agent"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 while the startup warm-up runs, 200 once it is done"""
+    stats = startup.stats()
+    return JSONResponse(
+        status_code=200 if stats["ready"] else 503,
+        content={"status": "ready" if stats["ready"] else "warming_up", **stats}
+    )
+
+
+def collect_component_metrics():
+    """Export executor, cache and session-store state as Prometheus gauges"""
+    lines = [
+        "# HELP voice_agent_executor_in_flight Calls running or queued per provider pool",
+        "# TYPE voice_agent_executor_in_flight gauge",
+    ]
+    executor_stats = provider_executor.stats()
+    for pool, stats in executor_stats.items():
+        lines.append(f'voice_agent_executor_in_flight{{pool="{pool}",state="active"}} {stats["active"]}')
+        lines.append(f'voice_agent_executor_in_flight{{pool="{pool}",state="queued"}} {stats["queued"]}')
+    lines += [
+        "# HELP voice_agent_executor_rejected_total Calls rejected because a pool queue was full",
+        "# TYPE voice_agent_executor_rejected_total counter",
+    ]
+    for pool, stats in executor_stats.items():
+        lines.append(f'voice_agent_executor_rejected_total{{pool="{pool}"}} {stats["rejected"]}')
+
+    lines += [
+        "# HELP voice_agent_cache_lookups_total Cache lookups by result",
+        "# TYPE voice_agent_cache_lookups_total counter",
+    ]
+    tts_cache = getattr(container.tts, "cache", None)
+    if tts_cache:
+        cache_stats = tts_cache.stats()
+        lines += [
+            f'voice_agent_cache_lookups_total{{cache="tts",result="hit"}} {cache_stats["hits"]}',
+            f'voice_agent_cache_lookups_total{{cache="tts",result="disk_hit"}} {cache_stats["disk_hits"]}',
+            f'voice_agent_cache_lookups_total{{cache="tts",result="miss"}} {cache_stats["misses"]}',
+        ]
+    llm_cache = getattr(container.llm, "cache", None)
+    if llm_cache:
+        cache_stats = llm_cache.stats()
+        lines += [
+            f'voice_agent_cache_lookups_total{{cache="llm",result="hit"}} {cache_stats["hits"]}',
+            f'voice_agent_cache_lookups_total{{cache="llm",result="miss"}} {cache_stats["misses"]}',
+        ]
+
+    limiter_stats = provider_limits.stats()
+    lines += [
+        "# HELP voice_agent_concurrency_limit Current adaptive concurrency limit per provider",
+        "# TYPE voice_agent_concurrency_limit gauge",
+    ]
+    for provider, stats in limiter_stats.items():
+        lines.append(f'voice_agent_concurrency_limit{{provider="{provider}"}} {stats["limit"]}')
+    lines += [
+        "# HELP voice_agent_concurrency_in_flight Provider calls holding or waiting for a limiter slot",
+        "# TYPE voice_agent_concurrency_in_flight gauge",
+    ]
+    for provider, stats in limiter_stats.items():
+        lines.append(f'voice_agent_concurrency_in_flight{{provider="{provider}",state="active"}} {stats["in_flight"]}')
+        lines.append(f'voice_agent_concurrency_in_flight{{provider="{provider}",state="queued"}} {stats["queued"]}')
+
+    lines += [
+        "# HELP voice_agent_circuit_state Circuit breaker state per provider (0 closed, 1 half-open, 2 open)",
+        "# TYPE voice_agent_circuit_state gauge",
+    ]
+    circuit_levels = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+    for provider, breaker in provider_guard.breakers.items():
+        lines.append(f'voice_agent_circuit_state{{provider="{provider}"}} {circuit_levels[breaker.state]}')
+
+    lines += [
+        "# HELP voice_agent_single_flight_in_flight Distinct upstream calls currently shared by waiters",
+        "# TYPE voice_agent_single_flight_in_flight gauge",
+    ]
+    for group, service in (("tts", container.tts), ("llm", container.llm)):
+        single_flight = getattr(service, "single_flight", None)
+        if single_flight:
+            lines.append(f'voice_agent_single_flight_in_flight{{group="{group}"}} {single_flight.stats()["in_flight"]}')
+
+    startup_stats = startup.stats()
+    lines += [
+        "# HELP voice_agent_ready 1 once the startup warm-up has finished",
+        "# TYPE voice_agent_ready gauge",
+        f"voice_agent_ready {int(startup_stats['ready'])}",
+        "# HELP voice_agent_startup_seconds Time spent importing the app and warming it up",
+        "# TYPE voice_agent_startup_seconds gauge",
+    ]
+    for phase in ("import", "warmup"):
+        if startup_stats[f"{phase}_seconds"] is not None:
+            lines.append(f'voice_agent_startup_seconds{{phase="{phase}"}} {startup_stats[f"{phase}_seconds"]}')
+
+    lines += [
+        "# HELP voice_agent_jobs Background pipeline jobs held by the job pool, by status",
+        "# TYPE voice_agent_jobs gauge",
+    ]
+    for status, count in job_manager.stats()["jobs"].items():
+        lines.append(f'voice_agent_jobs{{status="{status}"}} {count}')
+
+    lines += [
+        "# HELP voice_agent_sessions Live chat sessions in the session store",
+        "# TYPE voice_agent_sessions gauge",
+        f'voice_agent_sessions {container.chat.session_store.stats()["sessions"]}',
+    ]
+    return lines
+
+
+registry.register_collector(collect_component_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: stage latency histograms, outcome counters and component gauges"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/speculation")
+async def speculation_metrics():
+    """Speculative LLM dispatch: hit rate, discarded generations and wasted tokens"""
+    return {"enabled": container.chat.speculation_enabled, **container.chat.speculation_stats.stats()}
+
+
+@app.get("/metrics/executors")
+async def executor_metrics():
+    """Saturation metrics for the per-provider blocking-call thread pools"""
+    return provider_executor.stats()
+
+
+@app.get("/metrics/limits")
+async def limit_metrics():
+    """Adaptive per-provider concurrency limits, queue depth and shed counts"""
+    return provider_limits.stats()
+
+
+@app.get("/metrics/resilience")
+async def resilience_metrics():
+    """Circuit breaker state and hedged-request counters per provider"""
+    return provider_guard.stats()
+
+
+@app.get("/metrics/caches")
+async def cache_metrics():
+    """Hit/miss counters for the response caches"""
+    tts_cache = getattr(container.tts, "cache", None)
+    llm_cache = getattr(container.llm, "cache", None)
+    audio_relay = getattr(container.tts, "relay", None)
+    return {
+        "tts": tts_cache.stats() if tts_cache else None,
+        "llm": llm_cache.stats() if llm_cache else None,
+        "audio": audio_relay.stats() if audio_relay else None,
+    }
+
+
+@app.get("/metrics/coalescing")
+async def coalescing_metrics():
+    """How many identical in-flight TTS and LLM calls were coalesced onto one upstream call"""
+    tts_flight = getattr(container.tts, "single_flight", None)
+    llm_flight = getattr(container.llm, "single_flight", None)
+    return {
+        "tts": tts_flight.stats() if tts_flight else None,
+        "llm": llm_flight.stats() if llm_flight else None,
+    }
+
+
+@app.get("/metrics/routing")
+async def routing_metrics():
+    """Gemini model routing: calls, fallbacks and latency per model, and the latest routed turns"""
+    router = getattr(container.llm, "router", None)
+    return router.stats() if router else {"enabled": False}
+
+
+@app.get("/metrics/static")
+async def static_metrics():
+    """Built static assets: hashed names and original vs precompressed sizes"""
+    return static_assets.stats()
+
+
+@app.get("/metrics/jobs")
+async def job_metrics():
+    """Background job pool: queue depth, jobs by status, rejections and expiries"""
+    return job_manager.stats()
+
+
+@app.get("/metrics/sessions")
+async def session_metrics():
+    """Size and eviction counters for the chat session store"""
+    store = container.chat.session_store
+    return await run_in_threadpool(store.stats) if store.blocking else store.stats()
+
+
+@app.api_route("/audio/{digest}", methods=["GET", "HEAD"])
+async def get_audio(digest: str):
+    """
+    Serve synthesized audio from the local blob store (AUDIO_PROXY_ENABLED)
+    
+    The URL is the SHA-256 of the file, so it is cached for good by browsers
+    and supports range requests for seeking.
+    """
+    audio_relay = getattr(container.tts, "relay", None)
+    blob = audio_relay.store.get(digest) if audio_relay else None
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    path, media_type = blob
+    return CachedFileResponse(path, etag=f'"{digest}"', media_type=media_type)
+
+
 @app.get("/voices")
 async def get_voices():
     """
@@ -104,78 +401,192 @@ async def get_voices():
     }
 
 
+def overloaded_response(error: ProviderOverloadedError) -> JSONResponse:
+    """Fast 503 for a call shed by the concurrency limiter, telling the client when to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={"error": str(error)},
+        headers={"Retry-After": str(math.ceil(error.retry_after))}
+    )
+
+
 @app.post("/transcribe/file")
 async def transcribe_audio(file: UploadFile = File(...)):
     """Transcribe uploaded audio file using AssemblyAI"""
     try:
         logger.info(f"Transcribing file: {file.filename}")
-        audio_data = await file.read()
+        upload = await open_upload(file)
         
-        transcript_result = await stt_service.transcribe_audio(audio_data)
+        # The spooled upload is streamed to AssemblyAI in chunks, never read whole
+        transcript_result = await container.stt.transcribe_audio(upload["file"])
         
         if transcript_result["success"]:
             return {
                 "transcript": transcript_result["text"],
                 "status": "completed",
-                "confidence": transcript_result.get("confidence")
+                "confidence": transcript_result.get("confidence"),
+                "preprocessing": transcript_result.get("preprocessing")
             }
         else:
             return JSONResponse(
                 status_code=400,
                 content={"error": transcript_result["error"]}
             )
+    except ProviderOverloadedError as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+def parse_manifest(manifest: str) -> List[dict]:
+    """Read a batch manifest: a JSON list of URLs or {"url", "name"} objects"""
+    entries = json.loads(manifest)
+    if not isinstance(entries, list):
+        raise ValueError("manifest must be a JSON list")
+    parsed = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        url = entry.get("url") if isinstance(entry, dict) else None
+        # AssemblyAI would read a bare path from this server's disk; only allow remote URLs
+        if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+            raise ValueError(f"manifest entries need an http(s) url: {entry!r}")
+        parsed.append({"url": url, "name": str(entry.get("name") or url)})
+    return parsed
+
+
+@app.post("/transcribe/batch")
+async def transcribe_batch(
+    files: List[UploadFile] = File(default=[]),
+    manifest: Optional[str] = Form(default=None)
+):
+    """
+    Transcribe many recordings in one request, BATCH_CONCURRENCY at a time.
+    Accepts uploaded files, a manifest (JSON list of audio URLs AssemblyAI fetches
+    itself), or both. Returns newline-delimited JSON:
+      - {"type": "result", "index", "name", "status", "transcript" | "error", "seconds"} per file, as each completes
+      - {"type": "summary", "files", "completed", "failed", "files_per_second", ...} at the end
+    A failed file is reported in its result and does not stop the batch.
+    """
+    try:
+        remote = parse_manifest(manifest) if manifest else []
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": f"Invalid manifest: {str(e)}"})
+
+    total = len(files) + len(remote)
+    if total == 0:
+        return JSONResponse(status_code=400, content={"error": "No files or manifest entries given"})
+    if total > batch_max_files():
+        return JSONResponse(status_code=400, content={"error": f"Batch exceeds {batch_max_files()} files"})
+
+    items = []
+    for file in files:
+        upload = await open_upload(file)
+        items.append(BatchItem(len(items), file.filename or f"file-{len(items)}", upload["file"], upload["size"]))
+    for entry in remote:
+        items.append(BatchItem(len(items), entry["name"], entry["url"]))
+
+    transcriber = BatchTranscriber(container.stt)
+
+    async def event_stream():
+        async for event in transcriber.run(items):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+async def submit_job(kind: str, file: UploadFile, run: Callable[[UploadFile, Callable[..., None]], Any]) -> JSONResponse:
+    """
+    Queue a pipeline run on the background job pool and answer 202 straight away
+    
+    The upload is copied first, since FastAPI closes it when this response is sent.
+    """
+    upload = await detach_upload(file)
+    job = await job_manager.submit(kind, lambda job: run(upload, job.advance), cleanup=upload.file.close)
+    status_url = f"/jobs/{job.id}"
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "status": job.status, "status_url": status_url},
+        headers={"Location": status_url}
+    )
+
+
+async def answer_audio_query(
+    file: UploadFile,
+    progress: Optional[Callable[..., None]] = None,
+    latency_budget: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run the stateless STT -> Gemini -> Murf pipeline of /llm/query
+    
+    Returns:
+        transcription, llm_reply and murf_audio_url, or "error" and "status_code" on failure
+    """
+    # 1. Inspect the uploaded audio header (the body stays spooled)
+    upload = await open_upload(file)
+
+    # 2. Transcribe with AssemblyAI, streaming the upload in chunks
+    transcript_result = await container.stt.transcribe_audio(upload["file"])
+    if not transcript_result["success"]:
+        return {"error": "Transcription failed", "status_code": 400}
+
+    user_text = transcript_result["text"]
+    logger.info(f"Transcribed text: {user_text}")
+    if progress:
+        progress("transcript", transcription=user_text)
+
+    # 3. Generate LLM reply
+    llm_reply = await container.llm.generate_response(user_text, latency_budget=latency_budget)
+    if not llm_reply:
+        return {"error": "LLM returned empty response", "status_code": 500}
+
+    logger.info(f"LLM reply: {llm_reply[:100]}...")
+    if progress:
+        progress("reply", llm_reply=llm_reply)
+
+    # 4. Generate audio response
+    murf_audio_url = await container.tts.generate_speech(llm_reply, "en-US-ken")
+    if not murf_audio_url:
+        return {"error": "Failed to generate audio response", "status_code": 500}
+    if progress:
+        progress("audio", murf_audio_url=murf_audio_url)
+
+    return {"transcription": user_text, "llm_reply": llm_reply, "murf_audio_url": murf_audio_url}
+
+
 @app.post("/llm/query", response_model=QueryResponse)
-async def llm_query(file: UploadFile = File(...)):
+async def llm_query(file: UploadFile = File(...), mode: str = "sync", latency_budget: Optional[float] = None):
     """
     Accepts an audio file, transcribes it with AssemblyAI,
     sends the transcript to Gemini to produce a reply,
     sends Gemini reply to Murf to generate audio,
     returns the Murf audio url to client.
+    With ?mode=async, answers 202 with a job ID at once; poll /jobs/{job_id} for the result.
+    ?latency_budget=<seconds> lets the model router pick a faster Gemini model.
     """
     try:
-        logger.info("Processing LLM query from audio")
-        
-        # 1. Read uploaded audio bytes
-        audio_data = await file.read()
-
-        # 2. Transcribe with AssemblyAI
-        transcript_result = await stt_service.transcribe_audio(audio_data)
-        if not transcript_result["success"]:
-            return JSONResponse(status_code=400, content={"error": "Transcription failed"})
-
-        user_text = transcript_result["text"]
-        logger.info(f"Transcribed text: {user_text}")
-
-        # 3. Generate LLM reply
-        llm_reply = await llm_service.generate_response(user_text)
-        if not llm_reply:
-            return JSONResponse(status_code=500, content={"error": "LLM returned empty response"})
-
-        logger.info(f"LLM reply: {llm_reply[:100]}...")
+        if mode == "async":
+            return await submit_job(
+                "query", file, lambda upload, progress: answer_audio_query(upload, progress, latency_budget)
+            )
 
-        # 4. Generate audio response
-        murf_audio_url = await tts_service.generate_speech(llm_reply, "en-US-ken")
-        if not murf_audio_url:
-            return JSONResponse(status_code=500, content={"error": "Failed to generate audio response"})
+        logger.info("Processing LLM query from audio")
+        result = await answer_audio_query(file, latency_budget=latency_budget)
+        if "error" in result:
+            return JSONResponse(status_code=result["status_code"], content={"error": result["error"]})
 
-        return QueryResponse(
-            transcription=user_text,
-            llm_reply=llm_reply,
-            murf_audio_url=murf_audio_url
-        )
+        return QueryResponse(**result)
 
+    except ProviderOverloadedError as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Error in LLM query: {str(e)}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.post("/agent/chat/{session_id}", response_model=ChatResponse)
-async def agent_chat(session_id: str, file: UploadFile = File(...)):
+async def agent_chat(session_id: str, file: UploadFile = File(...), mode: str = "sync"):
     """
     Accepts audio file for a given session_id.
     Steps:
@@ -185,12 +596,21 @@ async def agent_chat(session_id: str, file: UploadFile = File(...)):
       - Append assistant reply to session history
       - Send assistant reply to Murf TTS
       - Return transcription, assistant reply, and murf_audio_url
+    With ?mode=async, answers 202 with a job ID at once; poll /jobs/{job_id} for progress.
     """
     try:
+        if mode == "async":
+            logger.info(f"Queueing chat job for session: {session_id}")
+            return await submit_job(
+                "chat",
+                file,
+                lambda upload, progress: container.chat.process_chat_interaction(session_id, upload, progress=progress)
+            )
+
         logger.info(f"Processing chat for session: {session_id}")
         
         # Process the chat interaction
-        result = await chat_service.process_chat_interaction(session_id, file)
+        result = await container.chat.process_chat_interaction(session_id, file)
         
         return ChatResponse(
             transcription=result["transcription"],
@@ -200,13 +620,16 @@ async def agent_chat(session_id: str, file: UploadFile = File(...)):
             details=result.get("details")
         )
 
+    except ProviderOverloadedError as e:
+        # Only the async job queue raises here; the pipeline turns overload into a fallback reply
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Error in agent chat: {str(e)}")
         fallback_text = "I'm having trouble connecting right now."
         
         # Generate fallback audio synchronously to avoid coroutine issues
         try:
-            fallback_audio_url = await tts_service.generate_fallback_audio(fallback_text)
+            fallback_audio_url = await container.tts.generate_fallback_audio(fallback_text)
         except Exception as tts_error:
             logger.error(f"Fallback TTS also failed: {tts_error}")
             fallback_audio_url = None
@@ -220,8 +643,137 @@ async def agent_chat(session_id: str, file: UploadFile = File(...)):
         )
 
 
+@app.post("/agent/chat/{session_id}/stream")
+async def agent_chat_stream(session_id: str, file: UploadFile = File(...)):
+    """
+    Streaming variant of /agent/chat/{session_id}.
+    Returns newline-delimited JSON events as the pipeline progresses:
+      - {"type": "transcript", ...} once STT finishes
+      - {"type": "audio", "index", "text", "murf_audio_url"} per reply sentence, in order
+      - {"type": "done", ...} with the full reply, or {"type": "error", ...} with a fallback
+    """
+    logger.info(f"Processing streaming chat for session: {session_id}")
+    chat_service = container.chat
+
+    async def event_stream():
+        async for event in chat_service.stream_chat_interaction(session_id, file):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of a job started with ?mode=async.
+    "status" is queued, running, completed or failed; "stages" lists the finished
+    pipeline stages (transcript, reply, audio) with their time since the job started,
+    and "result" holds whatever they have produced so far.
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired job"})
+    return job
+
+
+@app.websocket("/ws/agent/{session_id}")
+async def agent_ws(websocket: WebSocket, session_id: str):
+    """
+    Real-time voice chat over a WebSocket.
+    Protocol (one utterance at a time):
+      - client sends {"type": "start", "encoding": "webm" | "pcm_s16le", "sample_rate": 16000}
+      - client sends binary audio chunks while the user is speaking
+      - server sends {"type": "partial", "text"} as interim transcripts arrive
+      - client sends {"type": "stop"} when the user stops speaking
+      - server sends {"type": "final", "transcription"} and then the same
+        audio/done/error events as /agent/chat/{session_id}/stream
+    """
+    await websocket.accept()
+    logger.info(f"WebSocket chat opened for session: {session_id}")
+    transcription_session = None
+    speculation = None
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                if transcription_session is None:
+                    await websocket.send_json({"type": "error", "error": "not_started", "details": "Send a start message first"})
+                    continue
+                await transcription_session.send_audio(message["bytes"])
+                async for event in transcription_session.partials():
+                    if speculation is not None:
+                        speculation.observe(event["text"])
+                    await websocket.send_json(event)
+                continue
+
+            control = json.loads(message.get("text") or "{}")
+            if control.get("type") == "start":
+                if transcription_session is not None:
+                    session, transcription_session = transcription_session, None
+                    await session.abort()
+                if speculation is not None:
+                    speculation.cancel()
+                    speculation = None
+                try:
+                    transcription_session = await container.stt_stream.open_session(
+                        encoding=control.get("encoding", "webm"),
+                        sample_rate=int(control.get("sample_rate", 16000))
+                    )
+                except ProviderOverloadedError as e:
+                    # Shed or circuit open: tell the client when to try again and keep the socket
+                    await websocket.send_json({
+                        "type": "error",
+                        "error": "overloaded",
+                        "details": str(e),
+                        "retry_after": math.ceil(e.retry_after)
+                    })
+                    continue
+                # Start the LLM on stable partials when SPECULATIVE_LLM_ENABLED is set
+                speculation = await container.chat.start_speculation(session_id)
+
+            elif control.get("type") == "stop" and transcription_session is not None:
+                session, transcription_session = transcription_session, None
+                turn_speculation, speculation = speculation, None
+                transcript_result = await session.finish()
+                if not transcript_result["success"]:
+                    if turn_speculation is not None:
+                        turn_speculation.cancel()
+                    fallback_text = "I'm having trouble hearing you right now."
+                    await websocket.send_json({
+                        "type": "error",
+                        "transcription": "",
+                        "llm_reply": fallback_text,
+                        "murf_audio_url": await container.tts.generate_fallback_audio(fallback_text),
+                        "error": "stt_failed",
+                        "details": transcript_result["error"]
+                    })
+                    continue
+
+                # Fire the LLM the moment the final transcript lands
+                user_text = transcript_result["text"]
+                await websocket.send_json({"type": "final", "transcription": user_text})
+                async for event in container.chat.stream_reply(session_id, user_text, turn_speculation):
+                    await websocket.send_json(event)
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error in WebSocket chat: {str(e)}")
+    finally:
+        if transcription_session is not None:
+            await transcription_session.abort()
+        if speculation is not None:
+            speculation.cancel()
+        logger.info(f"WebSocket chat closed for session: {session_id}")
+
+
 # Main entrypoint for Uvicorn
 if __name__ == "__main__":
     import uvicorn
-    # Use only a single worker for in-memory state to work correctly
+    # Development server: single worker with reload. Use serve.py to run
+    # several workers with session state shared through SQLite.
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, workers=1)
\ No newline at end of file
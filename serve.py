@@ -0,0 +1,73 @@
+"""
+Multi-worker launcher for the voice agent.
+
+Starts N uvicorn worker processes sharing one listening socket. Session
+history, async job state and the TTS cache are externalized to files on this
+host (a SQLite WAL database and a cache directory), so any worker can serve
+the next turn of any session or a poll for any job.
+
+    python serve.py --workers 4 --port 8000
+"""
+import os
+import argparse
+import logging
+
+import uvicorn
+from dotenv import load_dotenv
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("serve")
+
+
+def configure_shared_state(workers: int) -> None:
+    """
+    Point session history and caches at cross-process backends when running more than one worker
+
+    Args:
+        workers: Number of worker processes
+    """
+    if workers <= 1:
+        return
+
+    if os.getenv("SESSION_STORE", "memory").lower() == "memory":
+        if "SESSION_STORE" in os.environ:
+            logger.warning("SESSION_STORE=memory is not shared between workers; switching to sqlite")
+        os.environ["SESSION_STORE"] = "sqlite"
+    os.environ.setdefault("SESSION_DB_PATH", "sessions.db")
+    # Async jobs run in the worker that accepted them; polls may reach any worker
+    if os.getenv("JOB_STORE", "memory").lower() == "memory":
+        if "JOB_STORE" in os.environ:
+            logger.warning("JOB_STORE=memory is not shared between workers; switching to sqlite")
+        os.environ["JOB_STORE"] = "sqlite"
+    os.environ.setdefault("TTS_CACHE_DIR", os.path.join(".cache", "tts"))
+
+    logger.info(
+        f"Shared state: sessions and jobs={os.environ['SESSION_DB_PATH']} (sqlite), "
+        f"tts_cache={os.environ['TTS_CACHE_DIR']}"
+    )
+
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the MURF voice agent with multiple workers")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))),
+        help="Number of worker processes (default: WEB_CONCURRENCY or CPU count)"
+    )
+    args = parser.parse_args()
+
+    # Environment is inherited by the worker processes uvicorn spawns
+    configure_shared_state(args.workers)
+    logger.info(f"Starting {args.workers} worker(s) on {args.host}:{args.port}")
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
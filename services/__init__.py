@@ -1,13 +1,43 @@
 # services/__init__.py
 
-from .stt_service import STTService
-from .tts_service import TTSService
-from .llm_service import LLMService
-from .chat_service import ChatService
+import importlib
+
+from .executor import ProviderExecutor, ExecutorSaturatedError, provider_executor
+from .concurrency import ProviderLimits, ProviderOverloadedError, provider_limits
+from .resilience import ProviderGuard, CircuitOpenError, provider_guard
+from .container import ServiceContainer, container
 
 __all__ = [
     "STTService",
+    "StreamingSTTService",
     "TTSService", 
     "LLMService",
-    "ChatService"
-]
\ No newline at end of file
+    "ChatService",
+    "ProviderExecutor",
+    "ExecutorSaturatedError",
+    "provider_executor",
+    "ProviderLimits",
+    "ProviderOverloadedError",
+    "provider_limits",
+    "ProviderGuard",
+    "CircuitOpenError",
+    "provider_guard",
+    "ServiceContainer",
+    "container"
+]
+
+# Provider services pull in the AssemblyAI / Gemini SDKs, so they are imported
+# on first access rather than with the package
+_LAZY_EXPORTS = {
+    "STTService": ".stt_service",
+    "StreamingSTTService": ".streaming_stt",
+    "TTSService": ".tts_service",
+    "LLMService": ".llm_service",
+    "ChatService": ".chat_service",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
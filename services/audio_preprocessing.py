@@ -0,0 +1,265 @@
+import io
+import os
+import time
+import wave
+import shutil
+import logging
+import subprocess
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Optional, Tuple, Union
+from debug_utils import HEADER_SNIFF_BYTES, detect_audio_format
+from services.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+
+TARGET_SAMPLE_RATE = 16000
+FRAME_MS = 20
+
+# Decoding needs the whole recording in memory (as float32 PCM, several times the upload size)
+DEFAULT_MAX_PREPROCESS_BYTES = 10 * 1024 * 1024
+
+bytes_saved_total = registry.counter(
+    "voice_agent_preprocess_bytes_saved_total", "Upload bytes not sent to STT thanks to preprocessing"
+)
+seconds_saved_total = registry.counter(
+    "voice_agent_preprocess_seconds_saved_total", "Seconds of silence trimmed before STT"
+)
+preprocess_total = registry.counter(
+    "voice_agent_preprocess_total", "Preprocessed uploads by outcome"
+)
+
+
+@dataclass
+class PreprocessingResult:
+    """Audio to send upstream plus what preprocessing saved"""
+
+    audio: Union[bytes, BinaryIO]
+    applied: bool
+    bytes_in: int = 0
+    bytes_out: int = 0
+    seconds_in: float = 0.0
+    seconds_out: float = 0.0
+    elapsed_ms: float = 0.0
+    reason: str = ""
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "applied": self.applied,
+            "reason": self.reason,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": max(self.bytes_in - self.bytes_out, 0) if self.applied else 0,
+            "seconds_in": round(self.seconds_in, 3),
+            "seconds_out": round(self.seconds_out, 3),
+            "seconds_saved": round(max(self.seconds_in - self.seconds_out, 0.0), 3) if self.applied else 0.0,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+        }
+
+
+def _upload_size(audio: Union[bytes, BinaryIO]) -> int:
+    if isinstance(audio, (bytes, bytearray)):
+        return len(audio)
+    audio.seek(0, os.SEEK_END)
+    size = audio.tell()
+    audio.seek(0)
+    return size
+
+
+def _read_all(audio: Union[bytes, BinaryIO]) -> bytes:
+    if isinstance(audio, (bytes, bytearray)):
+        return bytes(audio)
+    audio.seek(0)
+    data = audio.read()
+    audio.seek(0)
+    return data
+
+
+def _decode_wav(data: bytes) -> Tuple["np.ndarray", int]:
+    # ffmpeg writing to a pipe leaves the chunk sizes at 0xFFFFFFFF, which reads up to EOF
+    with wave.open(io.BytesIO(data)) as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    if width != 2:
+        raise ValueError(f"Unsupported WAV sample width: {width * 8} bits")
+    samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+    return samples, rate
+
+
+def _ffmpeg(args: list, data: bytes, timeout: float) -> bytes:
+    result = subprocess.run(
+        [FFMPEG_PATH, "-hide_banner", "-loglevel", "error", *args],
+        input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()[:200]}")
+    return result.stdout
+
+
+def _encode_wav(pcm: "np.ndarray", rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+class AudioPreprocessor:
+    """
+    Trims silence and shrinks uploaded audio before it is sent to STT.
+
+    Audio is decoded (WAV natively, anything else through ffmpeg), downmixed to
+    mono, trimmed to the voiced span found by a frame-energy VAD, resampled to
+    16 kHz and re-encoded as Opus (or 16-bit WAV without ffmpeg). The original
+    upload is passed through untouched whenever a step fails or the result
+    would not be smaller. Uploads over max_bytes are passed through without
+    being read, so the provider upload can still stream them from disk.
+    """
+
+    def __init__(
+        self,
+        threshold_db: Optional[float] = None,
+        padding_ms: Optional[float] = None,
+        bitrate: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.threshold_db = threshold_db if threshold_db is not None else float(os.getenv("AUDIO_VAD_THRESHOLD_DB", "-45"))
+        self.padding_ms = padding_ms if padding_ms is not None else float(os.getenv("AUDIO_VAD_PADDING_MS", "200"))
+        self.bitrate = bitrate or os.getenv("AUDIO_PREPROCESS_BITRATE", "24k")
+        self.timeout = timeout or float(os.getenv("AUDIO_PREPROCESS_TIMEOUT", "15"))
+        self.max_bytes = max_bytes or int(os.getenv("AUDIO_PREPROCESS_MAX_BYTES", str(DEFAULT_MAX_PREPROCESS_BYTES)))
+
+    def _decode(self, data: bytes, audio_format: str) -> Tuple["np.ndarray", int]:
+        if audio_format != "WAV":
+            if not FFMPEG_PATH:
+                raise RuntimeError(f"ffmpeg is required to decode {audio_format} audio")
+            data = _ffmpeg(["-i", "pipe:0", "-vn", "-acodec", "pcm_s16le", "-f", "wav", "pipe:1"], data, self.timeout)
+        return _decode_wav(data)
+
+    def _voiced_span(self, mono: "np.ndarray", rate: int) -> Tuple[int, int]:
+        """Sample range from the first to the last voiced frame, padded; (0, 0) if all silent"""
+        frame = max(int(rate * FRAME_MS / 1000), 1)
+        count = len(mono) // frame
+        if count == 0:
+            return 0, len(mono)
+
+        frames = mono[:count * frame].reshape(count, frame)
+        rms_db = 20 * np.log10(np.sqrt(np.mean(frames * frames, axis=1)) + 1e-10)
+        # Adapt to the recording's noise floor, but never go below the absolute threshold
+        threshold = max(self.threshold_db, float(np.percentile(rms_db, 10)) + 10.0)
+        voiced = np.flatnonzero(rms_db > threshold)
+        if voiced.size == 0:
+            return 0, 0
+
+        padding = int(rate * self.padding_ms / 1000)
+        start = max(int(voiced[0]) * frame - padding, 0)
+        end = min((int(voiced[-1]) + 1) * frame + padding, len(mono))
+        return start, end
+
+    def _resample(self, mono: "np.ndarray", rate: int) -> "np.ndarray":
+        if rate == TARGET_SAMPLE_RATE or len(mono) == 0:
+            return mono
+        if rate > TARGET_SAMPLE_RATE:
+            # Windowed-sinc low-pass at the new Nyquist frequency to avoid aliasing
+            cutoff = 0.45 * TARGET_SAMPLE_RATE / rate
+            taps = np.arange(63) - 31
+            kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hanning(63)
+            mono = np.convolve(mono, kernel / kernel.sum(), mode="same")
+        duration = len(mono) / rate
+        target_times = np.arange(int(duration * TARGET_SAMPLE_RATE)) / TARGET_SAMPLE_RATE
+        return np.interp(target_times, np.arange(len(mono)) / rate, mono).astype(np.float32)
+
+    def _encode(self, pcm: "np.ndarray") -> bytes:
+        if FFMPEG_PATH:
+            try:
+                return _ffmpeg(
+                    [
+                        "-f", "s16le", "-ar", str(TARGET_SAMPLE_RATE), "-ac", "1", "-i", "pipe:0",
+                        "-c:a", "libopus", "-b:a", self.bitrate, "-application", "voip", "-f", "ogg", "pipe:1"
+                    ],
+                    pcm.tobytes(), self.timeout
+                )
+            except Exception as e:
+                logger.warning(f"Opus encoding failed, falling back to WAV: {e}")
+        return _encode_wav(pcm, TARGET_SAMPLE_RATE)
+
+    def process(self, audio: Union[bytes, BinaryIO]) -> PreprocessingResult:
+        """
+        Preprocess one upload (blocking; run it in an executor)
+
+        Args:
+            audio: Uploaded audio as bytes or a binary file object
+
+        Returns:
+            PreprocessingResult with the audio to transcribe and the savings report
+        """
+        start = time.perf_counter()
+        result = PreprocessingResult(audio=audio, applied=False)
+        try:
+            result.bytes_in = result.bytes_out = _upload_size(audio)
+            if result.bytes_in > self.max_bytes:
+                result.reason = "too_large"
+                return result
+
+            data = _read_all(audio)
+            samples, rate = self._decode(data, detect_audio_format(data[:HEADER_SNIFF_BYTES]))
+            result.seconds_in = result.seconds_out = len(samples) / rate
+
+            mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+            begin, end = self._voiced_span(mono, rate)
+            if end <= begin:
+                # Leave "is there any speech?" to the STT provider
+                result.reason = "no_speech_detected"
+                return result
+
+            pcm = (np.clip(self._resample(mono[begin:end], rate), -1.0, 1.0) * 32767).astype("<i2")
+            encoded = self._encode(pcm)
+            if len(encoded) >= len(data):
+                result.reason = "not_smaller"
+                return result
+
+            result.audio = encoded
+            result.applied = True
+            result.bytes_out = len(encoded)
+            result.seconds_out = len(pcm) / TARGET_SAMPLE_RATE
+            return result
+        except Exception as e:
+            logger.warning(f"Audio preprocessing skipped: {e}")
+            result.reason = type(e).__name__
+            return result
+        finally:
+            result.elapsed_ms = (time.perf_counter() - start) * 1000
+            report = result.report()
+            preprocess_total.inc(outcome="applied" if result.applied else result.reason or "skipped")
+            bytes_saved_total.inc(report["bytes_saved"])
+            seconds_saved_total.inc(report["seconds_saved"])
+            logger.info(f"Audio preprocessing: {report}")
+
+
+def create_audio_preprocessor() -> Optional[AudioPreprocessor]:
+    """
+    Build the preprocessor if AUDIO_PREPROCESSING_ENABLED is set and NumPy is installed
+
+    Returns:
+        An AudioPreprocessor, or None when preprocessing is off
+    """
+    if os.getenv("AUDIO_PREPROCESSING_ENABLED", "false").lower() != "true":
+        return None
+    if not NUMPY_AVAILABLE:
+        logger.warning("AUDIO_PREPROCESSING_ENABLED is set but numpy is not installed; skipping preprocessing")
+        return None
+    if not FFMPEG_PATH:
+        logger.warning("ffmpeg not found; only WAV uploads will be preprocessed")
+    return AudioPreprocessor()
@@ -0,0 +1,282 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from services.http_client import HTTPClientManager, http_clients as shared_http_clients
+from services.single_flight import SingleFlight
+from services.telemetry import span
+from debug_utils import HEADER_SNIFF_BYTES, detect_audio_format
+
+logger = logging.getLogger(__name__)
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# detect_audio_format() name -> (file extension, media type)
+AUDIO_FORMATS = {
+    "MP3": ("mp3", "audio/mpeg"),
+    "WAV": ("wav", "audio/wav"),
+    "OGG": ("ogg", "audio/ogg"),
+    "FLAC": ("flac", "audio/flac"),
+    "WEBM": ("webm", "audio/webm"),
+    "MP4": ("m4a", "audio/mp4"),
+}
+MEDIA_TYPES = {ext: media_type for ext, media_type in AUDIO_FORMATS.values()}
+
+
+class AudioBlobStore:
+    """
+    Content-addressed, size-bounded store of audio files on local disk.
+
+    Files are named by the SHA-256 of their bytes, so identical audio is kept
+    once and a URL's content never changes. When the total size passes
+    `max_bytes` the least recently served files are deleted. The directory may
+    be shared by several workers: a blob another worker stored is picked up on
+    first lookup.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or os.getenv("AUDIO_STORE_DIR", os.path.join(".cache", "audio"))
+        self.max_bytes = max_bytes or int(os.getenv("AUDIO_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+        os.makedirs(self.root, exist_ok=True)
+
+        # digest -> (filename, size); in LRU order, oldest first
+        self._blobs: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.evictions = 0
+        self._load()
+
+    def _load(self) -> None:
+        entries = []
+        for entry in os.scandir(self.root):
+            digest, _, ext = entry.name.partition(".")
+            if entry.is_file() and DIGEST_RE.match(digest) and ext in MEDIA_TYPES:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, digest, entry.name, stat.st_size))
+        for _, digest, filename, size in sorted(entries):
+            self._blobs[digest] = (filename, size)
+            self._bytes += size
+        if entries:
+            logger.info(f"Audio store: {len(entries)} files, {self._bytes / 1e6:.1f} MB in {self.root}")
+
+    def new_temp_file(self):
+        """Open a temporary file in the store directory (same filesystem, so add() can rename it)"""
+        return tempfile.NamedTemporaryFile(dir=self.root, suffix=".part", delete=False)
+
+    def add(self, temp_path: str, digest: str, ext: str) -> str:
+        """
+        Move a fully written temporary file into the store
+
+        Args:
+            temp_path: File from new_temp_file()
+            digest: Hex SHA-256 of the file's bytes
+            ext: File extension (a key of MEDIA_TYPES)
+
+        Returns:
+            The digest
+        """
+        filename = f"{digest}.{ext}"
+        size = os.path.getsize(temp_path)
+        with self._lock:
+            if digest in self._blobs:
+                os.remove(temp_path)
+                self._blobs.move_to_end(digest)
+                return digest
+            os.replace(temp_path, os.path.join(self.root, filename))
+            self._blobs[digest] = (filename, size)
+            self._bytes += size
+            self.stored += 1
+            self._evict()
+        return digest
+
+    def _evict(self) -> None:
+        # Caller holds the lock. Always keep the newest file.
+        while self._bytes > self.max_bytes and len(self._blobs) > 1:
+            digest, (filename, size) = self._blobs.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.root, filename))
+            except FileNotFoundError:
+                pass
+
+    def get(self, digest: str) -> Optional[Tuple[str, str]]:
+        """
+        Look up a stored file
+
+        Args:
+            digest: Hex SHA-256 of the audio
+
+        Returns:
+            (path, media type), or None if it is not stored
+        """
+        if not DIGEST_RE.match(digest):
+            return None
+        with self._lock:
+            entry = self._blobs.get(digest)
+            if entry is None:
+                entry = self._adopt(digest)
+                if entry is None:
+                    return None
+            filename, _ = entry
+            path = os.path.join(self.root, filename)
+            if not os.path.exists(path):
+                # Evicted by another worker sharing the directory
+                _, size = self._blobs.pop(digest)
+                self._bytes -= size
+                return None
+            self._blobs.move_to_end(digest)
+        return path, MEDIA_TYPES[filename.rsplit(".", 1)[1]]
+
+    def _adopt(self, digest: str) -> Optional[Tuple[str, int]]:
+        # Caller holds the lock. Pick up a file written by another worker.
+        for ext in MEDIA_TYPES:
+            filename = f"{digest}.{ext}"
+            try:
+                size = os.path.getsize(os.path.join(self.root, filename))
+            except OSError:
+                continue
+            self._blobs[digest] = (filename, size)
+            self._bytes += size
+            return filename, size
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store counters
+
+        Returns:
+            Dictionary with file count, size and eviction counts
+        """
+        with self._lock:
+            return {
+                "files": len(self._blobs),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "stored": self.stored,
+                "evictions": self.evictions,
+            }
+
+
+class AudioRelay:
+    """Downloads synthesized audio once and hands out local /audio/{digest} URLs instead"""
+
+    def __init__(
+        self,
+        store: Optional[AudioBlobStore] = None,
+        http_clients: Optional[HTTPClientManager] = None,
+        max_fetch_bytes: Optional[int] = None
+    ):
+        self.store = store or AudioBlobStore()
+        self.http_clients = http_clients or shared_http_clients
+        self.max_fetch_bytes = max_fetch_bytes or int(os.getenv("AUDIO_FETCH_MAX_BYTES", str(20 * 1024 * 1024)))
+        # Murf URL -> digest, so repeated replies skip the download
+        self._sources: "OrderedDict[str, str]" = OrderedDict()
+        self._max_sources = 4096
+        self.single_flight = SingleFlight("audio_relay")
+        self.fetches = 0
+        self.fetch_failures = 0
+        self.fetch_seconds = 0.0
+
+    @staticmethod
+    def url_for(digest: str) -> str:
+        return f"/audio/{digest}"
+
+    async def localize(self, source_url: Optional[str]) -> Optional[str]:
+        """
+        Get a local URL for synthesized audio, downloading it if needed
+
+        Args:
+            source_url: Audio URL returned by Murf
+
+        Returns:
+            The /audio/{digest} URL, or source_url itself if the download failed
+        """
+        if not source_url or not source_url.startswith(("http://", "https://")):
+            return source_url
+
+        digest = self._sources.get(source_url)
+        if digest and self.store.get(digest):
+            self._sources.move_to_end(source_url)
+            return self.url_for(digest)
+
+        try:
+            with span("tts.relay"):
+                digest = await self.single_flight.do(source_url, lambda: self._fetch(source_url))
+        except Exception as e:
+            self.fetch_failures += 1
+            logger.warning(f"Serving Murf URL directly, audio download failed: {str(e)}")
+            return source_url
+
+        self._sources[source_url] = digest
+        self._sources.move_to_end(source_url)
+        while len(self._sources) > self._max_sources:
+            self._sources.popitem(last=False)
+        return self.url_for(digest)
+
+    async def _fetch(self, source_url: str) -> str:
+        started = time.perf_counter()
+        hasher = hashlib.sha256()
+        header = b""
+        size = 0
+        temp = self.store.new_temp_file()
+        try:
+            with temp:
+                client = self.http_clients.get("tts")
+                async with client.stream("GET", source_url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > self.max_fetch_bytes:
+                            raise ValueError(f"Audio exceeds {self.max_fetch_bytes} bytes")
+                        if len(header) < HEADER_SNIFF_BYTES:
+                            header += chunk[:HEADER_SNIFF_BYTES - len(header)]
+                        hasher.update(chunk)
+                        temp.write(chunk)
+            ext, _ = AUDIO_FORMATS.get(detect_audio_format(header), AUDIO_FORMATS["MP3"])
+            digest = self.store.add(temp.name, hasher.hexdigest(), ext)
+        except BaseException:
+            try:
+                os.remove(temp.name)
+            except FileNotFoundError:
+                pass
+            raise
+
+        elapsed = time.perf_counter() - started
+        self.fetches += 1
+        self.fetch_seconds += elapsed
+        logger.info(f"Stored {size} bytes of audio as {digest[:12]} in {elapsed * 1000:.0f}ms")
+        return digest
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get relay and store counters
+
+        Returns:
+            Dictionary with download counts and blob store statistics
+        """
+        return {
+            "fetches": self.fetches,
+            "fetch_failures": self.fetch_failures,
+            "avg_fetch_seconds": round(self.fetch_seconds / self.fetches, 3) if self.fetches else 0.0,
+            "known_sources": len(self._sources),
+            "store": self.store.stats(),
+        }
+
+
+def create_audio_relay(http_clients: Optional[HTTPClientManager] = None) -> Optional[AudioRelay]:
+    """
+    Build the audio relay if AUDIO_PROXY_ENABLED is set
+
+    Returns:
+        An AudioRelay, or None when the browser should get Murf's URLs
+    """
+    if os.getenv("AUDIO_PROXY_ENABLED", "false").lower() != "true":
+        return None
+    return AudioRelay(http_clients=http_clients)
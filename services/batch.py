@@ -0,0 +1,125 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Union
+from services.concurrency import ProviderOverloadedError
+from services.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+batch_files_total = registry.counter(
+    "voice_agent_batch_files_total", "Files transcribed through /transcribe/batch, by outcome"
+)
+
+
+def batch_concurrency() -> int:
+    """Files transcribed at once per batch, from BATCH_CONCURRENCY (default 4)"""
+    return max(1, int(os.getenv("BATCH_CONCURRENCY", "4")))
+
+
+def batch_max_files() -> int:
+    """Largest batch accepted, from BATCH_MAX_FILES (default 500)"""
+    return int(os.getenv("BATCH_MAX_FILES", "500"))
+
+
+@dataclass
+class BatchItem:
+    """One recording in a batch: an uploaded file object or a URL AssemblyAI fetches itself"""
+    index: int
+    name: str
+    source: Union[BinaryIO, str]
+    size: Optional[int] = None
+
+
+class BatchTranscriber:
+    """
+    Fans a batch of recordings out to the STT service with a concurrency cap
+
+    Results are yielded in completion order, so a caller streaming them back
+    sees the fast files first. A file that fails (provider error, overload,
+    open circuit) produces a "failed" result and the rest of the batch carries
+    on. The cap keeps one batch from taking every STT permit; the adaptive
+    limiter and circuit breaker still sit underneath each call.
+    """
+
+    def __init__(self, stt_service, concurrency: Optional[int] = None):
+        self.stt = stt_service
+        self.concurrency = concurrency or batch_concurrency()
+
+    async def run(self, items: List[BatchItem]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Transcribe every item, yielding a result event per file and then a summary
+
+        Args:
+            items: Recordings to transcribe
+
+        Yields:
+            {"type": "result", ...} per file as it completes, then {"type": "summary", ...}
+        """
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker(item: BatchItem) -> None:
+            async with semaphore:
+                await results.put(await self._transcribe(item))
+
+        logger.info(f"Transcribing batch of {len(items)} files, {self.concurrency} at a time")
+        tasks = [asyncio.create_task(worker(item)) for item in items]
+        completed = failed = 0
+        audio_bytes = 0
+        busy_seconds = 0.0
+        try:
+            for _ in items:
+                result = await results.get()
+                if result["status"] == "completed":
+                    completed += 1
+                else:
+                    failed += 1
+                audio_bytes += result.get("bytes") or 0
+                busy_seconds += result["seconds"]
+                yield result
+        finally:
+            # The client went away mid-batch: stop the files still queued or running
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Batch finished: {completed} completed, {failed} failed in {elapsed:.2f}s")
+        yield {
+            "type": "summary",
+            "files": len(items),
+            "completed": completed,
+            "failed": failed,
+            "concurrency": self.concurrency,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(len(items) / elapsed, 3) if elapsed else 0.0,
+            "bytes": audio_bytes,
+            "bytes_per_second": round(audio_bytes / elapsed) if elapsed else 0,
+            # Sum of per-file times over wall time: how much the fan-out overlapped
+            "parallelism": round(busy_seconds / elapsed, 2) if elapsed else 0.0,
+        }
+
+    async def _transcribe(self, item: BatchItem) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"type": "result", "index": item.index, "name": item.name, "bytes": item.size}
+        started = time.perf_counter()
+        try:
+            transcript = await self.stt.transcribe_audio(item.source)
+            if transcript["success"]:
+                result.update(
+                    status="completed",
+                    transcript=transcript["text"],
+                    confidence=transcript.get("confidence"),
+                )
+            else:
+                result.update(status="failed", error=transcript["error"])
+        except ProviderOverloadedError as e:
+            result.update(status="failed", error="overloaded", retry_after=e.retry_after)
+        except Exception as e:
+            logger.error(f"Batch file {item.name} failed: {str(e)}")
+            result.update(status="failed", error=str(e))
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        batch_files_total.inc(status=result["status"])
+        return result
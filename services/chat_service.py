@@ -1,43 +1,125 @@
+import os
+import asyncio
 import logging
-from typing import Dict, List, Any
+from collections import OrderedDict
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, List, Any, Optional
 from fastapi import UploadFile
 from schemas import ChatMessage
-from services.stt_service import STTService
-from services.tts_service import TTSService
-from services.llm_service import LLMService
-from debug_utils import log_audio_file_info, safe_log_text
+from services.sentence_chunker import SentenceChunker
+from services.history import HistoryWindow
+from services.session_store import SessionStore, create_session_store
+from services.speculation import SpeculationStats, SpeculativeTurn
+from services.concurrency import ProviderOverloadedError
+from services.deadline import DeadlineExceededError, request_deadline, time_remaining
+from services.telemetry import span, traced_call
+from services.uploads import open_upload
+from debug_utils import safe_log_text
+
+if TYPE_CHECKING:
+    from services.stt_service import STTService
+    from services.tts_service import TTSService
+    from services.llm_service import LLMService
 
 logger = logging.getLogger(__name__)
 
+# Spoken when a provider call is shed by the concurrency limiter
+OVERLOADED_TEXT = "I'm getting a lot of requests right now. Please try again in a moment."
+
+# Constant replies spoken on error paths; pre-synthesized at startup
+FALLBACK_PHRASES = (
+    "I'm having trouble receiving your audio right now.",
+    "I'm having trouble hearing you right now.",
+    "I'm having trouble thinking right now.",
+    "I'm having trouble connecting right now.",
+    OVERLOADED_TEXT,
+)
+
 
 class ChatService:
     """Service for managing chat sessions and coordinating STT, LLM, and TTS services"""
     
-    def __init__(self):
-        # In-memory chat store: session_id -> list of ChatMessage
-        self.chat_store: Dict[str, List[Dict[str, str]]] = {}
+    def __init__(
+        self,
+        stt_service: Optional["STTService"] = None,
+        tts_service: Optional["TTSService"] = None,
+        llm_service: Optional["LLMService"] = None,
+        session_store: Optional[SessionStore] = None
+    ):
+        # Bounded, expiring chat store: session_id -> list of ChatMessage
+        self.session_store = session_store or create_session_store()
+        # Token-budgeted running prompt per session, built incrementally from the store.
+        # Kept in LRU order and bounded like the store itself.
+        self.prompt_windows: "OrderedDict[str, HistoryWindow]" = OrderedDict()
+        
+        # Use injected services (shared via ServiceContainer), building our own only if absent.
+        # Imported here so the provider SDKs load only when a service is actually built.
+        if stt_service is None:
+            from services.stt_service import STTService
+            stt_service = STTService()
+        if tts_service is None:
+            from services.tts_service import TTSService
+            tts_service = TTSService()
+        if llm_service is None:
+            from services.llm_service import LLMService
+            llm_service = LLMService()
+        self.stt_service = stt_service
+        self.tts_service = tts_service
+        self.llm_service = llm_service
         
-        # Initialize services
-        self.stt_service = STTService()
-        self.tts_service = TTSService()
-        self.llm_service = LLMService()
+        # Opt-in: start the LLM on stable partial transcripts (see start_speculation)
+        self.speculation_enabled = os.getenv("SPECULATIVE_LLM_ENABLED", "false").lower() == "true"
+        self.speculation_stats = SpeculationStats()
+        # End-to-end time budget of a non-streaming chat turn; each stage gets what is left
+        self.turn_deadline = float(os.getenv("CHAT_DEADLINE_SECONDS", "25"))
         
         logger.info("ChatService initialized successfully")
 
-    async def process_chat_interaction(self, session_id: str, audio_file: UploadFile) -> Dict[str, Any]:
+    async def process_chat_interaction(
+        self,
+        session_id: str,
+        audio_file: UploadFile,
+        deadline_seconds: Optional[float] = None,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Dict[str, Any]:
         """
         Process a complete chat interaction: STT -> LLM -> TTS
         
+        The whole turn shares one deadline: every provider call is cut off when
+        it runs out, so later stages only get the time that is left.
+        
         Args:
             session_id: Unique identifier for the chat session
             audio_file: Uploaded audio file
+            deadline_seconds: Time budget for the turn (CHAT_DEADLINE_SECONDS by default)
+            progress: Called as progress(stage, **fields) after the "transcript",
+                "reply" and "audio" stages, so a background job can publish partial results
+            
+        Returns:
+            Dictionary containing transcription, LLM reply, audio URL, and any errors
+        """
+        with request_deadline(deadline_seconds if deadline_seconds is not None else self.turn_deadline):
+            return await self._run_chat_interaction(session_id, audio_file, progress)
+
+    async def _run_chat_interaction(
+        self,
+        session_id: str,
+        audio_file: UploadFile,
+        progress: Optional[Callable[..., None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the STT -> LLM -> TTS steps of process_chat_interaction
+        
+        Args:
+            session_id: Unique identifier for the chat session
+            audio_file: Uploaded audio file
+            progress: Optional stage callback (see process_chat_interaction)
             
         Returns:
             Dictionary containing transcription, LLM reply, audio URL, and any errors
         """
         try:
             # Step 1: Read audio data
-            audio_data = await self._read_audio_data(audio_file)
+            audio_data = await traced_call("chat.read_audio", self._read_audio_data(audio_file))
             if not audio_data["success"]:
                 return await self._create_fallback_response(
                     "", 
@@ -47,41 +129,48 @@ class ChatService:
                 )
 
             # Step 2: Transcribe audio
-            transcript_result = await self.stt_service.transcribe_audio(audio_data["data"])
+            transcript_result = await traced_call("chat.stt", self.stt_service.transcribe_audio(audio_data["data"]))
             if not transcript_result["success"]:
                 return await self._create_fallback_response(
                     "", 
                     "I'm having trouble hearing you right now.",
-                    "stt_failed", 
+                    self._failure_type("stt_failed"), 
                     transcript_result["error"]
                 )
 
             user_text = transcript_result["text"]
             logger.info(f"User said: {user_text}")
+            if progress:
+                progress("transcript", transcription=user_text)
 
             # Step 3: Manage conversation history
-            history = self._get_or_create_session_history(session_id)
-            history.append({"role": "user", "text": user_text})
+            with span("chat.history"):
+                window = await self._append_message(session_id, "user", user_text)
+                prompt = window.build_prompt()
 
             # Step 4: Generate LLM response
-            llm_reply = self.llm_service.generate_response_with_history(history)
+            llm_reply = await traced_call("chat.llm", self.llm_service.generate_response_from_prompt(prompt))
             if not llm_reply:
                 fallback_text = "I'm having trouble thinking right now."
-                history.append({"role": "assistant", "text": fallback_text})
+                await self._append_message(session_id, "assistant", fallback_text)
                 return await self._create_fallback_response(
                     user_text, 
                     fallback_text,
-                    "llm_failed", 
+                    self._failure_type("llm_failed"), 
                     "LLM service returned empty response"
                 )
 
             # Step 5: Add assistant response to history
-            history.append({"role": "assistant", "text": llm_reply})
+            await self._append_message(session_id, "assistant", llm_reply)
+            if progress:
+                progress("reply", llm_reply=llm_reply)
 
             # Step 6: Generate TTS audio
-            murf_audio_url = await self.tts_service.generate_speech(llm_reply, "en-US-ken")
+            murf_audio_url = await traced_call("chat.tts", self.tts_service.generate_speech(llm_reply, "en-US-ken"))
             if not murf_audio_url:
                 logger.warning("TTS failed, but continuing with text response")
+            if progress:
+                progress("audio", murf_audio_url=murf_audio_url)
 
             return {
                 "transcription": user_text,
@@ -89,6 +178,17 @@ class ChatService:
                 "murf_audio_url": murf_audio_url
             }
 
+        except ProviderOverloadedError as e:
+            logger.warning(f"Chat interaction shed: {str(e)}")
+            return await self._create_fallback_response("", OVERLOADED_TEXT, "overloaded", str(e))
+        except DeadlineExceededError as e:
+            logger.warning(f"Chat interaction ran out of time: {str(e)}")
+            return await self._create_fallback_response(
+                "", 
+                "I'm having trouble connecting right now.",
+                "deadline_exceeded", 
+                str(e)
+            )
         except Exception as e:
             logger.error(f"Error in chat interaction: {str(e)}")
             return await self._create_fallback_response(
@@ -98,9 +198,244 @@ class ChatService:
                 str(e)
             )
 
+    async def stream_chat_interaction(self, session_id: str, audio_file: UploadFile) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a chat interaction as a stream: STT -> streamed LLM -> per-sentence TTS
+        
+        Each sentence of the reply is sent to TTS as soon as Gemini finishes it, while
+        later sentences are still being generated. Audio segments are yielded in order
+        as soon as they are ready.
+        
+        Args:
+            session_id: Unique identifier for the chat session
+            audio_file: Uploaded audio file
+            
+        Yields:
+            Event dictionaries with a 'type' of 'transcript', 'audio', 'done' or 'error'
+        """
+        try:
+            # Step 1: Read audio data
+            audio_data = await traced_call("chat.read_audio", self._read_audio_data(audio_file))
+            if not audio_data["success"]:
+                yield await self._create_fallback_event(
+                    "",
+                    "I'm having trouble receiving your audio right now.",
+                    "read_failed",
+                    audio_data["error"]
+                )
+                return
+
+            # Step 2: Transcribe audio
+            transcript_result = await traced_call("chat.stt", self.stt_service.transcribe_audio(audio_data["data"]))
+            if not transcript_result["success"]:
+                yield await self._create_fallback_event(
+                    "",
+                    "I'm having trouble hearing you right now.",
+                    "stt_failed",
+                    transcript_result["error"]
+                )
+                return
+
+            user_text = transcript_result["text"]
+            logger.info(f"User said: {user_text}")
+            yield {"type": "transcript", "transcription": user_text}
+
+            async for event in self.stream_reply(session_id, user_text):
+                yield event
+
+        except ProviderOverloadedError as e:
+            logger.warning(f"Streaming chat interaction shed: {str(e)}")
+            yield await self._create_fallback_event("", OVERLOADED_TEXT, "overloaded", str(e))
+        except Exception as e:
+            logger.error(f"Error in streaming chat interaction: {str(e)}")
+            yield await self._create_fallback_event(
+                "",
+                "I'm having trouble connecting right now.",
+                "unexpected_failure",
+                str(e)
+            )
+
+    async def start_speculation(self, session_id: str) -> Optional[SpeculativeTurn]:
+        """
+        Begin speculative LLM dispatch for a user turn that is still being transcribed
+        
+        Feed partial transcripts to the returned turn's observe() and pass it to
+        stream_reply() with the final transcript; cancel() it if the turn is abandoned.
+        
+        Args:
+            session_id: Unique identifier for the chat session
+            
+        Returns:
+            A SpeculativeTurn, or None when speculation is disabled
+        """
+        if not self.speculation_enabled:
+            return None
+        # Load the window now: prepare() runs synchronously on each partial and must not touch the store
+        loaded = await self._get_prompt_window(session_id)
+
+        def prepare(text: str):
+            window = self.prompt_windows.get(session_id, loaded)
+            prompt = window.preview_prompt({"role": "user", "text": text})
+            return prompt, (window.revision, window.summary)
+
+        return SpeculativeTurn(prepare, self.llm_service.stream_response_from_prompt, self.speculation_stats)
+
+    async def stream_reply(
+        self,
+        session_id: str,
+        user_text: str,
+        speculation: Optional[SpeculativeTurn] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the assistant's reply to an already transcribed user turn
+        
+        Args:
+            session_id: Unique identifier for the chat session
+            user_text: The user's transcribed text
+            speculation: Speculative turn whose reply is reused if it matches user_text
+            
+        Yields:
+            'audio' events per reply sentence, then a 'done' or 'error' event
+        """
+        try:
+            # Step 3: Manage conversation history
+            with span("chat.history"):
+                generation = None
+                if speculation is not None:
+                    window = await self._get_prompt_window(session_id)
+                    generation = speculation.claim(user_text, (window.revision, window.summary))
+                window = await self._append_message(session_id, "user", user_text)
+                prompt = window.build_prompt()
+
+            # Step 4: Stream LLM reply into sentence-sized TTS jobs
+            segments: asyncio.Queue = asyncio.Queue()
+            reply_parts: List[str] = []
+            tts_tasks: List[asyncio.Task] = []
+            producer = asyncio.create_task(
+                self._produce_speech_segments(
+                    prompt, reply_parts, segments, tts_tasks,
+                    reply_stream=generation.replay() if generation else None
+                )
+            )
+
+            # Step 5: Emit audio segments in order as each becomes ready
+            try:
+                index = 0
+                while True:
+                    item = await segments.get()
+                    if item is None:
+                        break
+                    sentence, tts_task = item
+                    murf_audio_url = await tts_task
+                    if not murf_audio_url:
+                        logger.warning(f"TTS failed for segment {index}, continuing with text")
+                    yield {"type": "audio", "index": index, "text": sentence, "murf_audio_url": murf_audio_url}
+                    index += 1
+                await producer
+            finally:
+                # Client went away or something failed: stop generating and synthesizing
+                for task in [producer, *tts_tasks]:
+                    if not task.done():
+                        task.cancel()
+                if generation is not None:
+                    generation.cancel()
+
+            llm_reply = "".join(reply_parts).strip()
+            if not llm_reply:
+                fallback_text = "I'm having trouble thinking right now."
+                await self._append_message(session_id, "assistant", fallback_text)
+                yield await self._create_fallback_event(
+                    user_text,
+                    fallback_text,
+                    "llm_failed",
+                    "LLM service returned empty response"
+                )
+                return
+
+            # Step 6: Add assistant response to history
+            await self._append_message(session_id, "assistant", llm_reply)
+            yield {"type": "done", "transcription": user_text, "llm_reply": llm_reply}
+
+        except ProviderOverloadedError as e:
+            logger.warning(f"Chat reply shed: {str(e)}")
+            yield await self._create_fallback_event(user_text, OVERLOADED_TEXT, "overloaded", str(e))
+        except Exception as e:
+            logger.error(f"Error streaming chat reply: {str(e)}")
+            yield await self._create_fallback_event(
+                user_text,
+                "I'm having trouble connecting right now.",
+                "unexpected_failure",
+                str(e)
+            )
+
+    async def _produce_speech_segments(
+        self,
+        prompt: str,
+        reply_parts: List[str],
+        segments: asyncio.Queue,
+        tts_tasks: List[asyncio.Task],
+        reply_stream: Optional[AsyncIterator[str]] = None
+    ) -> None:
+        """
+        Consume the streamed LLM reply and start a TTS job for every completed sentence
+        
+        Args:
+            prompt: Conversation prompt to generate from
+            reply_parts: Collects the raw reply chunks
+            segments: Receives (sentence, TTS task) pairs in order, then None when finished
+            tts_tasks: Collects started TTS tasks so they can be cancelled
+            reply_stream: Already running reply (e.g. a committed speculation) to use instead
+        """
+        def start_tts(sentence: str) -> None:
+            task = asyncio.create_task(self.tts_service.generate_speech(sentence, "en-US-ken"))
+            tts_tasks.append(task)
+            segments.put_nowait((sentence, task))
+
+        try:
+            chunker = SentenceChunker()
+            async for chunk in reply_stream or self.llm_service.stream_response_from_prompt(prompt):
+                reply_parts.append(chunk)
+                for sentence in chunker.feed(chunk):
+                    start_tts(sentence)
+            for sentence in chunker.flush():
+                start_tts(sentence)
+        finally:
+            segments.put_nowait(None)
+
+    @staticmethod
+    def _failure_type(error_type: str) -> str:
+        """Report a failed stage as 'deadline_exceeded' when the turn ran out of time"""
+        remaining = time_remaining()
+        return "deadline_exceeded" if remaining is not None and remaining <= 0 else error_type
+
+    async def _create_fallback_event(
+        self,
+        transcription: str,
+        fallback_text: str,
+        error_type: str,
+        error_details: str
+    ) -> Dict[str, Any]:
+        """
+        Create a streaming 'error' event carrying the fallback response
+        
+        Args:
+            transcription: User's transcribed text
+            fallback_text: Fallback message to display
+            error_type: Type of error that occurred
+            error_details: Detailed error message
+            
+        Returns:
+            Event dictionary with fallback response data
+        """
+        fallback = await self._create_fallback_response(transcription, fallback_text, error_type, error_details)
+        return {"type": "error", **fallback}
+
     async def _read_audio_data(self, audio_file: UploadFile) -> Dict[str, Any]:
         """
-        Read audio data from uploaded file
+        Prepare the uploaded audio for transcription
+        
+        The upload is not read into memory: only its header is inspected, and
+        "data" is the spooled file object, which the STT upload reads in chunks.
         
         Args:
             audio_file: Uploaded audio file
@@ -109,32 +444,79 @@ class ChatService:
             Dictionary with success status and audio data or error
         """
         try:
-            audio_data = await audio_file.read()
-            
-            # Debug: Log audio file information
-            file_info = log_audio_file_info(audio_data, audio_file.filename or "unknown")
-            logger.info(f"Reading audio file: {safe_log_text(str(file_info))}")
+            upload = await open_upload(audio_file)
+            logger.info(f"Reading audio file: {safe_log_text(str(upload['info']))}")
             
-            return {"success": True, "data": audio_data, "error": None}
+            return {"success": True, "data": upload["file"], "error": None}
         except Exception as e:
             logger.error(f"Error reading audio file: {str(e)}")
             return {"success": False, "data": None, "error": str(e)}
 
-    def _get_or_create_session_history(self, session_id: str) -> List[Dict[str, str]]:
+    async def _store_call(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Call a session store method, off the event loop if the store does blocking I/O"""
+        if self.session_store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def _get_prompt_window(self, session_id: str) -> HistoryWindow:
         """
-        Get existing session history or create new one
+        Get the running prompt window for a session, rebuilding it from history if needed
         
         Args:
             session_id: Unique session identifier
             
         Returns:
-            List of conversation messages
+            The session's HistoryWindow
         """
-        if session_id not in self.chat_store:
-            self.chat_store[session_id] = []
-            logger.info(f"Created new chat session: {session_id}")
+        history = await self._store_call(self.session_store.get_history, session_id)
+        window = self.prompt_windows.get(session_id)
+        if window is not None and window.revision != history.revision:
+            # The session expired, was evicted, or another worker added turns; rebuild.
+            # A summary still running in the old window is stored when it finishes.
+            self.prompt_windows.pop(session_id)
+            window = None
+
+        if window is None:
+            window = HistoryWindow.from_messages(
+                history.messages,
+                summarizer=getattr(self.llm_service, "summarize_history", None),
+                summary=history.summary,
+                summary_covers=history.summary_covers,
+                offset=history.offset,
+                on_summary=lambda summary, covers: self._store_call(
+                    self.session_store.save_summary, session_id, summary, covers
+                )
+            )
+            window.revision = history.revision
+            self.prompt_windows[session_id] = window
+            while len(self.prompt_windows) > self.session_store.max_sessions:
+                _, evicted = self.prompt_windows.popitem(last=False)
+                evicted.cancel()
+        self.prompt_windows.move_to_end(session_id)
+        return window
+
+    def _drop_prompt_window(self, session_id: str) -> None:
+        window = self.prompt_windows.pop(session_id, None)
+        if window:
+            window.cancel()
+
+    async def _append_message(self, session_id: str, role: str, text: str) -> HistoryWindow:
+        """
+        Append a message to the session history and its prompt window
         
-        return self.chat_store[session_id]
+        Args:
+            session_id: Unique session identifier
+            role: 'user' or 'assistant'
+            text: Message text
+            
+        Returns:
+            The session's updated HistoryWindow
+        """
+        message = {"role": role, "text": text}
+        window = await self._get_prompt_window(session_id)
+        window.revision = await self._store_call(self.session_store.append, session_id, message)
+        window.append(message)
+        return window
 
     async def _create_fallback_response(
         self, 
@@ -165,7 +547,7 @@ class ChatService:
             "details": error_details
         }
 
-    def get_session_history(self, session_id: str) -> List[Dict[str, str]]:
+    async def get_session_history(self, session_id: str) -> List[Dict[str, str]]:
         """
         Get conversation history for a session
         
@@ -175,9 +557,9 @@ class ChatService:
         Returns:
             List of conversation messages
         """
-        return self.chat_store.get(session_id, [])
+        return await self._store_call(self.session_store.get, session_id)
 
-    def clear_session_history(self, session_id: str) -> bool:
+    async def clear_session_history(self, session_id: str) -> bool:
         """
         Clear conversation history for a session
         
@@ -187,13 +569,13 @@ class ChatService:
         Returns:
             True if session existed and was cleared, False otherwise
         """
-        if session_id in self.chat_store:
-            del self.chat_store[session_id]
+        self._drop_prompt_window(session_id)
+        if await self._store_call(self.session_store.delete, session_id):
             logger.info(f"Cleared chat session: {session_id}")
             return True
         return False
 
-    def get_active_sessions(self) -> List[str]:
+    async def get_active_sessions(self) -> List[str]:
         """
         Get list of active session IDs
         
@@ -201,4 +583,4 @@ class ChatService:
             List of active session IDs
         """
 
-        return list(self.chat_store.keys())
+        return await self._store_call(self.session_store.list_sessions)
@@ -0,0 +1,296 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from services.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+# Upstream statuses that mean "slow down" rather than "bad request"
+OVERLOAD_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+load_shed_total = registry.counter(
+    "voice_agent_load_shed_total", "Provider calls rejected by the adaptive concurrency limiter, by reason"
+)
+limit_changes_total = registry.counter(
+    "voice_agent_concurrency_limit_changes_total", "Adaptive concurrency limit adjustments by direction"
+)
+
+
+class ProviderOverloadedError(RuntimeError):
+    """Raised when a call is shed because its provider is at its concurrency limit"""
+
+    def __init__(self, provider: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{provider} is overloaded ({reason})")
+        self.provider = provider
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Permit:
+    """A granted slot; tells the limiter how the call went"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.latency: Optional[float] = None
+        self.dropped = False
+
+    def first_response(self) -> None:
+        """Mark the first byte/chunk of a streamed response; its latency is the sample"""
+        if self.latency is None:
+            self.latency = time.perf_counter() - self.started
+
+    def record_status(self, status_code: int) -> None:
+        """Treat rate limiting and upstream 5xx as an overload signal"""
+        if status_code in OVERLOAD_STATUSES:
+            self.dropped = True
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one upstream provider, driven by observed latency.
+
+    Every completed call is a latency sample, compared with a slowly moving
+    baseline (EWMA) of earlier samples; slow samples only nudge the baseline. While calls stay within
+    `latency_tolerance` times the baseline and the limit is actually in use,
+    the limit grows by about one per limit's worth of calls. A call that is
+    much slower than the baseline, times out, fails, or gets a 429/5xx cuts
+    the limit by `backoff`, at most once per baseline latency so one burst of
+    slow calls counts as a single signal. Calls beyond the limit wait in a
+    bounded FIFO queue for up to `queue_timeout` seconds; once the queue is
+    full or the wait expires the call is shed with ProviderOverloadedError.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        max_queue: int,
+        queue_timeout: float,
+        latency_tolerance: float = 2.0,
+        backoff: float = 0.9,
+        smoothing: float = 0.05
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.smoothing = smoothing
+
+        self.in_flight = 0
+        self.baseline_latency: Optional[float] = None
+        self.last_latency: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.waited = 0
+        self.shed = {"queue_full": 0, "queue_timeout": 0}
+        self.increases = 0
+        self.decreases = 0
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot
+
+        Raises:
+            ProviderOverloadedError: If the wait queue is full or the wait times out
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.waited += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._shed("queue_timeout")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as the caller went away; hand it on
+                self._release_slot()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.admitted += 1
+
+    def _shed(self, reason: str) -> None:
+        self.shed[reason] += 1
+        load_shed_total.inc(provider=self.name, reason=reason)
+        logger.warning(
+            f"Shedding {self.name} call ({reason}): {self.in_flight} in flight, "
+            f"limit {int(self.limit)}, {len(self._waiters)} queued"
+        )
+        raise ProviderOverloadedError(self.name, reason, retry_after=max(1.0, self.baseline_latency or 1.0))
+
+    def release(self, permit: Permit, sample: bool = True) -> None:
+        """
+        Return a slot and adapt the limit to how the call went
+
+        Args:
+            permit: The permit handed out for the call
+            sample: False if the outcome says nothing about the provider (e.g. the client left)
+        """
+        if sample:
+            latency = permit.latency if permit.latency is not None else time.perf_counter() - permit.started
+            self._update_limit(latency, permit.dropped)
+        self._release_slot()
+
+    def _update_limit(self, latency: float, dropped: bool) -> None:
+        self.last_latency = latency
+        baseline = self.baseline_latency
+        slow = baseline is not None and latency > baseline * self.latency_tolerance
+        if baseline is None:
+            self.baseline_latency = latency
+        elif not dropped:
+            # Slow samples move the baseline far more slowly, so a slowdown keeps the
+            # limit down for a while before it is accepted as the provider's new normal
+            weight = self.smoothing / 10 if slow else self.smoothing
+            self.baseline_latency = baseline + weight * (latency - baseline)
+
+        now = time.monotonic()
+        if dropped or slow:
+            if now - self._last_decrease >= (baseline or latency) and self.limit > self.min_limit:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+                limit_changes_total.inc(provider=self.name, direction="down")
+        elif self.in_flight >= self.limit / 2 and self.limit < self.max_limit:
+            # Only grow a limit that is actually being used
+            previous = int(self.limit)
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            if int(self.limit) > previous:
+                self.increases += 1
+                limit_changes_total.inc(provider=self.name, direction="up")
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Permit]:
+        """
+        Hold a slot for the duration of one upstream call
+
+        Exceptions raised by the call count as overload signals; cancellation
+        and early generator exit release the slot without a sample.
+
+        Yields:
+            A Permit for reporting status codes or first-response time
+        """
+        await self.acquire()
+        permit = Permit()
+        try:
+            yield permit
+        except Exception:
+            permit.dropped = True
+            self.release(permit)
+            raise
+        except BaseException:
+            self.release(permit, sample=False)
+            raise
+        else:
+            self.release(permit)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter state
+
+        Returns:
+            Dictionary with the current limit, load, latency baseline and counters
+        """
+        return {
+            "limit": int(self.limit),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "baseline_latency_seconds": round(self.baseline_latency, 4) if self.baseline_latency is not None else None,
+            "last_latency_seconds": round(self.last_latency, 4) if self.last_latency is not None else None,
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "shed": dict(self.shed),
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
+
+
+class ProviderLimits:
+    """One adaptive concurrency limiter per upstream provider"""
+
+    PROVIDERS = ("stt", "llm", "tts")
+
+    def __init__(self):
+        self.enabled = os.getenv("ADAPTIVE_CONCURRENCY_ENABLED", "true").lower() == "true"
+        tolerance = float(os.getenv("CONCURRENCY_LATENCY_TOLERANCE", "2.0"))
+        backoff = float(os.getenv("CONCURRENCY_BACKOFF", "0.9"))
+
+        self.limiters: Dict[str, AdaptiveLimiter] = {}
+        for provider in self.PROVIDERS:
+            env_prefix = provider.upper()
+            # Calls past the provider executor's workers plus its wait queue are rejected there
+            # (ProviderExecutor reads the same settings), so the limit never grows beyond that
+            executor_capacity = int(os.getenv(f"{env_prefix}_POOL_SIZE", "8")) + int(os.getenv(f"{env_prefix}_QUEUE_LIMIT", "32"))
+            self.limiters[provider] = AdaptiveLimiter(
+                provider,
+                initial_limit=int(os.getenv(f"{env_prefix}_CONCURRENCY_INITIAL", "8")),
+                min_limit=int(os.getenv(f"{env_prefix}_CONCURRENCY_MIN", "2")),
+                max_limit=min(int(os.getenv(f"{env_prefix}_CONCURRENCY_MAX", str(executor_capacity))), executor_capacity),
+                max_queue=int(os.getenv(f"{env_prefix}_CONCURRENCY_QUEUE", "32")),
+                queue_timeout=float(os.getenv(f"{env_prefix}_QUEUE_TIMEOUT", "2")),
+                latency_tolerance=tolerance,
+                backoff=backoff,
+            )
+
+    @asynccontextmanager
+    async def slot(self, provider: str) -> AsyncIterator[Permit]:
+        """
+        Hold a concurrency slot for one call to a provider
+
+        Args:
+            provider: Provider name ('stt', 'llm' or 'tts')
+
+        Yields:
+            A Permit for the call
+
+        Raises:
+            ProviderOverloadedError: If the call is shed
+        """
+        if not self.enabled:
+            yield Permit()
+            return
+        async with self.limiters[provider].slot() as permit:
+            yield permit
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the state of every provider's limiter
+
+        Returns:
+            Dictionary mapping provider name to its limiter statistics
+        """
+        return {name: {"enabled": self.enabled, **limiter.stats()} for name, limiter in self.limiters.items()}
+
+
+# Shared limiters used by all services in this process
+provider_limits = ProviderLimits()
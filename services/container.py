@@ -0,0 +1,138 @@
+import os
+import logging
+import importlib
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Modules the real services are built from (they import the provider SDKs)
+PROVIDER_MODULES = (
+    "services.stt_service",
+    "services.streaming_stt",
+    "services.tts_service",
+    "services.llm_service",
+    "services.chat_service",
+)
+
+
+class ServiceContainer:
+    """Builds each provider service once, on first use, and shares it app-wide"""
+
+    def __init__(self, use_fakes: Optional[bool] = None):
+        if use_fakes is None:
+            use_fakes = os.getenv("USE_FAKE_PROVIDERS", "false").lower() == "true"
+        self.use_fakes = use_fakes
+        self._instances: Dict[str, Any] = {}
+        self._overrides: Set[str] = set()
+        self._factories: Dict[str, Callable[[], Any]] = {
+            "stt": self._build_stt,
+            "stt_stream": self._build_stt_stream,
+            "tts": self._build_tts,
+            "llm": self._build_llm,
+            "chat": self._build_chat,
+        }
+
+    def _build_stt(self):
+        if self.use_fakes:
+            from services.fakes import FakeSTTService
+            return FakeSTTService()
+        from services.stt_service import STTService
+        return STTService()
+
+    def _build_stt_stream(self):
+        if self.use_fakes:
+            from services.fakes import FakeStreamingSTTService
+            return FakeStreamingSTTService()
+        from services.streaming_stt import StreamingSTTService
+        return StreamingSTTService()
+
+    def _build_tts(self):
+        if self.use_fakes:
+            from services.fakes import FakeTTSService
+            return FakeTTSService()
+        from services.tts_service import TTSService
+        return TTSService()
+
+    def _build_llm(self):
+        if self.use_fakes:
+            from services.fakes import FakeLLMService
+            return FakeLLMService()
+        from services.llm_service import LLMService
+        return LLMService()
+
+    def _build_chat(self):
+        from services.chat_service import ChatService
+        return ChatService(stt_service=self.stt, tts_service=self.tts, llm_service=self.llm)
+
+    def get(self, name: str) -> Any:
+        """
+        Get a service instance, building it on first access
+
+        Args:
+            name: Service name ('stt', 'stt_stream', 'tts', 'llm' or 'chat')
+
+        Returns:
+            The shared service instance
+        """
+        if name not in self._instances:
+            self._instances[name] = self._factories[name]()
+            logger.info(f"Built {name} service ({type(self._instances[name]).__name__})")
+        return self._instances[name]
+
+    def override(self, name: str, instance: Any) -> None:
+        """
+        Replace a service with a custom instance (e.g. a local fake)
+
+        Dependent services that were already built are dropped so they
+        pick up the override on next access.
+
+        Args:
+            name: Service name to replace
+            instance: Object to hand out instead
+        """
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+        self._instances[name] = instance
+        self._overrides.add(name)
+        if name != "chat" and "chat" not in self._overrides:
+            self._instances.pop("chat", None)
+
+    def preload(self) -> None:
+        """
+        Import the modules the services will be built from
+
+        Blocking (SDK imports take a while); run it in a thread at startup so
+        the event loop keeps serving while the SDKs load.
+        """
+        modules = ("services.fakes", "services.chat_service") if self.use_fakes else PROVIDER_MODULES
+        for module in modules:
+            importlib.import_module(module)
+
+    def reset(self) -> None:
+        """Drop all built instances and overrides"""
+        self._instances.clear()
+        self._overrides.clear()
+
+    @property
+    def stt(self):
+        return self.get("stt")
+
+    @property
+    def stt_stream(self):
+        return self.get("stt_stream")
+
+    @property
+    def tts(self):
+        return self.get("tts")
+
+    @property
+    def llm(self):
+        return self.get("llm")
+
+    @property
+    def chat(self):
+        return self.get("chat")
+
+
+# Shared container used by the route handlers
+container = ServiceContainer()
@@ -0,0 +1,90 @@
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Iterator, Optional
+from services.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+# Absolute time.monotonic() by which the current request must finish
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+deadline_exceeded_total = registry.counter(
+    "voice_agent_deadline_exceeded_total", "Provider calls cut short or skipped because the request deadline passed"
+)
+
+
+class DeadlineExceededError(Exception):
+    """Raised when the request's time budget is used up"""
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Give everything awaited inside the block (and tasks it starts) a shared time budget
+
+    A nested deadline can only shorten an enclosing one.
+
+    Args:
+        seconds: Budget in seconds, or None for no deadline
+    """
+    if seconds is None:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one"""
+    expires = _deadline.get()
+    return None if expires is None else expires - time.monotonic()
+
+
+def check_deadline(provider: str) -> None:
+    """
+    Fail fast instead of starting a call that cannot finish in time
+
+    Raises:
+        DeadlineExceededError: If the deadline has already passed
+    """
+    remaining = time_remaining()
+    if remaining is not None and remaining <= 0:
+        deadline_exceeded_total.inc(provider=provider, phase="before_call")
+        raise DeadlineExceededError(f"Request deadline passed before calling {provider}")
+
+
+async def with_deadline(provider: str, awaitable: Awaitable[Any]) -> Any:
+    """
+    Await something for at most the time left before the deadline
+
+    Args:
+        provider: Provider name, for metrics and messages
+        awaitable: The call to bound
+
+    Returns:
+        Whatever the awaitable returns
+
+    Raises:
+        DeadlineExceededError: If the deadline passes first (the call is cancelled)
+    """
+    remaining = time_remaining()
+    if remaining is None:
+        return await awaitable
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        check_deadline(provider)
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        deadline_exceeded_total.inc(provider=provider, phase="during_call")
+        logger.warning(f"{provider} call cut short by the request deadline")
+        raise DeadlineExceededError(f"Request deadline passed while waiting for {provider}") from None
@@ -0,0 +1,196 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+from services.concurrency import ProviderOverloadedError
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(ProviderOverloadedError):
+    """Raised when a provider pool's wait queue is full"""
+
+    def __init__(self, provider: str):
+        super().__init__(provider, "executor_saturated")
+
+
+class _ProviderPool:
+    """Bounded thread pool for one provider plus its queue-depth accounting"""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.peak_in_flight = 0
+
+    def try_admit(self) -> bool:
+        with self._lock:
+            in_flight = self.active + self.queued
+            if in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                return False
+            self.queued += 1
+            self.peak_in_flight = max(self.peak_in_flight, in_flight + 1)
+            return True
+
+    def run(self, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            result = func()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+        return result
+
+    def release_cancelled(self, future: Future) -> None:
+        # A call cancelled before a worker picked it up never reaches run()
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "saturation": round((self.active + self.queued) / (self.max_workers + self.max_queue), 3),
+                "peak_in_flight": self.peak_in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+
+class ProviderExecutor:
+    """Offloads blocking provider SDK/HTTP calls to per-provider bounded thread pools"""
+
+    PROVIDERS = ("stt", "llm", "tts")
+
+    def __init__(self, pool_sizes: Optional[Dict[str, int]] = None, queue_limits: Optional[Dict[str, int]] = None):
+        pool_sizes = pool_sizes or {}
+        queue_limits = queue_limits or {}
+
+        self.pools: Dict[str, _ProviderPool] = {}
+        for provider in self.PROVIDERS:
+            env_prefix = provider.upper()
+            max_workers = pool_sizes.get(provider) or int(os.getenv(f"{env_prefix}_POOL_SIZE", "8"))
+            max_queue = queue_limits.get(provider) or int(os.getenv(f"{env_prefix}_QUEUE_LIMIT", "32"))
+            self.pools[provider] = _ProviderPool(provider, max_workers, max_queue)
+
+        logger.info(
+            "ProviderExecutor initialized: "
+            + ", ".join(f"{name}={pool.max_workers}/{pool.max_queue}" for name, pool in self.pools.items())
+        )
+
+    async def run(self, provider: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking callable on the provider's pool without blocking the event loop
+
+        Args:
+            provider: Provider pool name ('stt', 'llm' or 'tts')
+            func: Blocking callable to execute
+            *args, **kwargs: Arguments passed to func
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            ExecutorSaturatedError: If the provider's pool and wait queue are full
+        """
+        pool = self.pools[provider]
+        if not pool.try_admit():
+            logger.warning(f"{provider} executor saturated, rejecting call")
+            raise ExecutorSaturatedError(provider)
+
+        future = pool.executor.submit(pool.run, partial(func, *args, **kwargs))
+        future.add_done_callback(pool.release_cancelled)
+        return await asyncio.wrap_future(future)
+
+    async def stream(self, provider: str, func: Callable[..., Iterable[Any]], *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        Drain a blocking iterator on the provider's pool, yielding items as they arrive
+
+        Args:
+            provider: Provider pool name ('stt', 'llm' or 'tts')
+            func: Blocking callable returning an iterable (e.g. a streamed SDK response)
+            *args, **kwargs: Arguments passed to func
+
+        Yields:
+            Items produced by the iterable, in order
+
+        Raises:
+            ExecutorSaturatedError: If the provider's pool and wait queue are full
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def drain() -> None:
+            try:
+                for item in func(*args, **kwargs):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+                return
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        def on_worker_done(task: asyncio.Future) -> None:
+            # Admission failures never reach drain(), so surface them here
+            if not task.cancelled() and task.exception() is not None:
+                queue.put_nowait((done, task.exception()))
+
+        worker = asyncio.ensure_future(self.run(provider, drain))
+        worker.add_done_callback(on_worker_done)
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is done:
+                    if error:
+                        raise error
+                    break
+                yield item
+            await worker
+        finally:
+            # Tell the worker thread to stop if the consumer went away early
+            stop.set()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get saturation metrics for every provider pool
+
+        Returns:
+            Dictionary mapping provider name to its pool statistics
+        """
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down all provider pools"""
+        for pool in self.pools.values():
+            pool.executor.shutdown(wait=wait)
+
+
+# Shared executor used by all services in this process
+provider_executor = ProviderExecutor()
@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import logging
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _FakeProvider:
+    """Shared latency/error injection for the local fake providers"""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+
+    async def _simulate(self) -> bool:
+        """Sleep for the configured latency; return False if this call should fail"""
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return random.random() >= self.error_rate
+
+
+class FakeSTTService(_FakeProvider):
+    """Network-free stand-in for STTService"""
+
+    def __init__(self, transcript: str = "Hello, how are you today?", **kwargs):
+        super().__init__(**kwargs)
+        self.transcript = transcript
+
+    async def transcribe_audio(self, audio_data: bytes) -> Dict[str, Any]:
+        if not await self._simulate():
+            return {"success": False, "error": "Injected STT failure", "text": None}
+        return {"success": True, "text": self.transcript, "confidence": 0.99, "error": None}
+
+
+class FakeStreamingSTTSession:
+    """Network-free stand-in for a StreamingTranscriptionSession"""
+
+    def __init__(self, provider: "FakeStreamingSTTService"):
+        self.provider = provider
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.bytes_received = 0
+        self._chunks = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def send_audio(self, chunk: bytes) -> None:
+        self.bytes_received += len(chunk)
+        self._chunks += 1
+        # Reveal one more word of the transcript per chunk as a partial
+        words = self.provider.transcript.split(" ")
+        self.events.put_nowait({"type": "partial", "text": " ".join(words[:self._chunks])})
+
+    async def partials(self) -> AsyncIterator[Dict[str, Any]]:
+        while not self.events.empty():
+            yield self.events.get_nowait()
+
+    async def finish(self) -> Dict[str, Any]:
+        if not await self.provider._simulate():
+            return {"success": False, "error": "Injected STT failure", "text": None}
+        return {"success": True, "text": self.provider.transcript, "confidence": 0.99, "error": None}
+
+    async def abort(self) -> None:
+        pass
+
+
+class FakeStreamingSTTService(_FakeProvider):
+    """Network-free stand-in for StreamingSTTService"""
+
+    def __init__(self, transcript: str = "Hello, how are you today?", **kwargs):
+        super().__init__(**kwargs)
+        self.transcript = transcript
+
+    async def open_session(self, encoding: str = "webm", sample_rate: int = 16000) -> FakeStreamingSTTSession:
+        return FakeStreamingSTTSession(self)
+
+
+class FakeLLMService(_FakeProvider):
+    """Network-free stand-in for LLMService"""
+
+    def __init__(self, reply: str = "I'm doing well, thanks for asking!", **kwargs):
+        super().__init__(**kwargs)
+        self.reply = reply
+
+    async def generate_response(self, text: str, latency_budget: Optional[float] = None) -> Optional[str]:
+        if not await self._simulate():
+            return None
+        return self.reply
+
+    async def generate_response_from_prompt(self, prompt: str, latency_budget: Optional[float] = None) -> Optional[str]:
+        if not await self._simulate():
+            return None
+        return self.reply
+
+    async def stream_response_from_prompt(self, prompt: str, latency_budget: Optional[float] = None) -> AsyncIterator[str]:
+        if not await self._simulate():
+            return
+        for word in self.reply.split(" "):
+            yield word + " "
+
+    async def summarize_history(self, previous_summary: Optional[str], lines: List[str]) -> Optional[str]:
+        return f"The user and assistant exchanged {len(lines)} earlier messages."
+
+
+class FakeTTSService(_FakeProvider):
+    """Network-free stand-in for TTSService"""
+
+    base_url = "https://fake-murf.local/audio"
+
+    def _audio_url(self, text: str, voice_id: str) -> str:
+        digest = hashlib.sha256(f"{voice_id}:{text}".encode("utf-8")).hexdigest()[:16]
+        return f"{self.base_url}/{digest}.mp3"
+
+    async def generate_speech(self, text: str, voice_id: str = "en-US-ken") -> Optional[str]:
+        if not await self._simulate():
+            return None
+        return self._audio_url(text, voice_id)
+
+    def generate_speech_sync(self, text: str, voice_id: str = "en-US-ken") -> Optional[str]:
+        return self._audio_url(text, voice_id)
+
+    async def generate_fallback_audio(self, text: str) -> Optional[str]:
+        return self.generate_speech_sync(text)
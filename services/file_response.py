@@ -0,0 +1,164 @@
+import os
+import re
+import anyio
+from typing import Mapping, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# For content-addressed files: the bytes behind a URL never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "Range: bytes=..." header
+
+    Args:
+        range_header: Value of the Range header
+        size: File size in bytes
+
+    Returns:
+        Inclusive (start, end), or None if the range cannot be satisfied
+
+    Raises:
+        ValueError: If the header is malformed or asks for several ranges (serve the whole file)
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        raise ValueError(f"Unsupported range: {range_header}")
+    first, last = match.groups()
+    if not first and not last:
+        raise ValueError(f"Unsupported range: {range_header}")
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+class CachedFileResponse(Response):
+    """
+    Serves a file that is identified by a strong ETag.
+
+    Answers If-None-Match with 304, a single byte range with 206 (or 416 when
+    it cannot be satisfied), honours If-Range, and sends long-lived cache
+    headers. The body is handed to the server as a zero-copy send or a path
+    send when the ASGI server offers those extensions, and streamed in
+    chunks otherwise.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        etag: str,
+        media_type: str,
+        cache_control: str = IMMUTABLE_CACHE_CONTROL,
+        headers: Optional[Mapping[str, str]] = None
+    ):
+        self.path = path
+        self.etag = etag
+        self.media_type = media_type
+        self.cache_control = cache_control
+        self.extra_headers = dict(headers or {})
+        self.background = None
+        self.status_code = 200
+        self.init_headers()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        headers = {
+            "etag": self.etag,
+            "cache-control": self.cache_control,
+            "accept-ranges": "bytes",
+            **self.extra_headers,
+        }
+
+        if etag_matches(request_headers.get("if-none-match"), self.etag):
+            await self._start(send, 304, headers)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # Only touch the file once a 304 is ruled out
+        size = os.stat(self.path).st_size
+        status, start, end = 200, 0, size - 1
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == self.etag):
+            try:
+                selected = parse_range(range_header, size)
+            except ValueError:
+                selected = (0, size - 1)
+            else:
+                if selected is None:
+                    headers["content-range"] = f"bytes */{size}"
+                    await self._start(send, 416, headers)
+                    await send({"type": "http.response.body", "body": b""})
+                    return
+                status = 206
+                headers["content-range"] = f"bytes {selected[0]}-{selected[1]}/{size}"
+            start, end = selected
+
+        count = max(0, end - start + 1)
+        headers["content-type"] = self.media_type
+        headers["content-length"] = str(count)
+        await self._start(send, status, headers)
+        if scope["method"].upper() == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopysend", "file": file, "offset": start, "count": count})
+        elif "http.response.pathsend" in extensions and status == 200:
+            await send({"type": "http.response.pathsend", "path": self.path})
+        else:
+            await self._stream(send, start, count)
+
+    async def _start(self, send: Send, status: int, headers: Mapping[str, str]) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+        })
+
+    async def _stream(self, send: Send, start: int, count: int) -> None:
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; end the response rather than hang
+            await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,259 @@
+import os
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from services.deadline import request_deadline
+from services.telemetry import request_id_var
+
+logger = logging.getLogger(__name__)
+
+# summarizer(previous_summary, evicted_lines) -> new summary or None
+Summarizer = Callable[[Optional[str], List[str]], Awaitable[Optional[str]]]
+
+# on_summary(summary, covers): persist a new summary of the session's first `covers` messages
+SummarySink = Callable[[str, int], Awaitable[Any]]
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (~4 characters per token for English)"""
+    return max(1, len(text) // 4)
+
+
+def format_message(message: Dict[str, str]) -> str:
+    """Serialize one history message the way prompts expect it"""
+    role = "User" if message["role"] == "user" else "Assistant"
+    return f"{role}: {message['text']}"
+
+
+def prompt_tail(prompt: str, turns: int) -> Optional[Tuple[str, List[Dict[str, str]]]]:
+    """
+    Recover the latest user message and the messages just before it from a build_prompt() prompt
+
+    Args:
+        prompt: Prompt built by HistoryWindow.build_prompt() or preview_prompt()
+        turns: How many of the preceding messages to return
+
+    Returns:
+        (query, recent messages oldest first), or None if the tail cannot be read back
+        reliably (no trailing user turn, or a message spanning several lines)
+    """
+    lines = prompt.split("\n")
+    if len(lines) < 2 or lines[-1] != "Assistant:" or not lines[-2].startswith("User: "):
+        return None
+    query = lines[-2][len("User: "):]
+    recent: List[Dict[str, str]] = []
+    for line in reversed(lines[:-2]):
+        if len(recent) >= turns or line.startswith(SUMMARY_PREFIX):
+            break
+        if line.startswith("User: "):
+            recent.append({"role": "user", "text": line[len("User: "):]})
+        elif line.startswith("Assistant: "):
+            recent.append({"role": "assistant", "text": line[len("Assistant: "):]})
+        else:
+            return None
+    recent.reverse()
+    return query, recent
+
+
+class HistoryWindow:
+    """
+    Running, token-budgeted prompt for one chat session.
+
+    Each message is serialized and token-counted once, when it is appended.
+    Only the most recent turns that fit in the token budget are kept in the
+    prompt; older turns are folded into a summary that the LLM produces in
+    the background, so per-turn prompt size stays flat however long the
+    conversation runs. Each new summary is handed to on_summary together with
+    the number of messages it covers, so a window rebuilt from storage (by
+    another worker, say) picks it up instead of summarizing those turns again.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        summarizer: Optional[Summarizer] = None,
+        summary_batch_tokens: Optional[int] = None,
+        on_summary: Optional[SummarySink] = None
+    ):
+        self.token_budget = token_budget or int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+        self.summarizer = summarizer
+        self.on_summary = on_summary
+        # Evicted turns are summarized in batches of at least this many tokens,
+        # rather than one LLM call per evicted message
+        self.summary_batch_tokens = summary_batch_tokens or int(os.getenv("HISTORY_SUMMARY_BATCH_TOKENS", "400"))
+        # Time budget of one background summary, separate from the turn that triggered it
+        self.summary_timeout = float(os.getenv("HISTORY_SUMMARY_TIMEOUT_SECONDS", "30"))
+
+        # (serialized line, token count) for messages inside the window
+        self._window: Deque[Tuple[str, int]] = deque()
+        self._window_tokens = 0
+        self._body = ""
+
+        # SessionStore revision this window reflects (see ChatService._get_prompt_window)
+        self.revision = 0
+
+        self.summary: Optional[str] = None
+        # Messages of the session, counted from its first, that the summary covers;
+        # the pending turns are the ones right after them
+        self.summary_covers = 0
+        self._pending_summary: List[str] = []
+        self._pending_tokens = 0
+        self._summary_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_messages(
+        cls,
+        messages: Iterable[Dict[str, str]],
+        token_budget: Optional[int] = None,
+        summarizer: Optional[Summarizer] = None,
+        summary: Optional[str] = None,
+        summary_covers: int = 0,
+        offset: int = 0,
+        on_summary: Optional[SummarySink] = None
+    ) -> "HistoryWindow":
+        """
+        Rebuild a window from an existing message list
+
+        Args:
+            messages: Stored messages, oldest first
+            token_budget: Prompt token budget
+            summarizer: Summarizer for turns evicted later on
+            summary: Stored summary of the session's older messages
+            summary_covers: How many of the session's messages the summary covers
+            offset: How many of the session's messages came before messages[0]
+            on_summary: Called with each new summary and the number of messages it covers
+
+        Returns:
+            The rebuilt HistoryWindow
+        """
+        window = cls(token_budget=token_budget, summarizer=summarizer, on_summary=on_summary)
+        messages = list(messages)
+        # Messages the summary already covers stay out of the window and are not summarized again
+        skip = min(max(summary_covers - offset, 0), len(messages))
+        window.summary = summary
+        window.summary_covers = offset + skip
+        for message in messages[skip:]:
+            window.append(message, summarize=False)
+        return window
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens in the current prompt (window plus summary)"""
+        return self._window_tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def append(self, message: Dict[str, str], summarize: bool = True) -> None:
+        """
+        Add a message to the window, evicting the oldest turns past the budget
+
+        Args:
+            message: Message dict with 'role' and 'text' keys
+            summarize: Whether evicted turns should trigger a background summary
+        """
+        line = format_message(message)
+        tokens = estimate_tokens(line)
+        self._window.append((line, tokens))
+        self._window_tokens += tokens
+        self._body = f"{self._body}\n{line}" if self._body else line
+
+        # Always keep the newest message, even if it alone exceeds the budget
+        while self._window_tokens > self.token_budget and len(self._window) > 1:
+            old_line, old_tokens = self._window.popleft()
+            self._window_tokens -= old_tokens
+            self._body = self._body[len(old_line) + 1:]
+            self._pending_summary.append(old_line)
+            self._pending_tokens += old_tokens
+
+        if summarize and self._pending_tokens >= self.summary_batch_tokens:
+            self._schedule_summary()
+
+    def _schedule_summary(self) -> None:
+        if not self.summarizer or (self._summary_task and not self._summary_task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No running loop (e.g. rebuilding from storage); summarize on a later turn
+            return
+        # Start from an empty context so the summary doesn't inherit the turn's deadline or
+        # add its spans to the turn's Server-Timing; only the request ID is carried over for logs
+        context = contextvars.Context()
+        context.run(request_id_var.set, request_id_var.get())
+        self._summary_task = context.run(loop.create_task, self._summarize())
+
+    async def _summarize(self) -> None:
+        evicted, self._pending_summary = self._pending_summary, []
+        evicted_tokens, self._pending_tokens = self._pending_tokens, 0
+        try:
+            with request_deadline(self.summary_timeout):
+                summary = await self.summarizer(self.summary, evicted)
+        except Exception as e:
+            logger.error(f"Error summarizing history: {str(e)}")
+            summary = None
+
+        if summary:
+            self.summary = summary.strip()
+            self.summary_covers += len(evicted)
+            logger.info(f"Rolled {len(evicted)} older messages into the history summary")
+            if self.on_summary:
+                try:
+                    await self.on_summary(self.summary, self.summary_covers)
+                except Exception as e:
+                    logger.warning(f"Could not store the history summary: {str(e)}")
+        else:
+            # Keep the turns so the next eviction retries them
+            self._pending_summary = evicted + self._pending_summary
+            self._pending_tokens += evicted_tokens
+            return
+
+        if self._pending_tokens >= self.summary_batch_tokens:
+            self._schedule_summary()
+
+    def build_prompt(self) -> str:
+        """
+        Build the prompt for the next assistant turn
+
+        Returns:
+            Formatted prompt string
+        """
+        parts = []
+        if self.summary:
+            parts.append(f"{SUMMARY_PREFIX} {self.summary}")
+        if self._body:
+            parts.append(self._body)
+        # Ask assistant to reply next
+        parts.append("Assistant:")
+        return "\n".join(parts)
+
+    def preview_prompt(self, message: Dict[str, str]) -> str:
+        """
+        Build the prompt build_prompt() would return after append(message), without appending
+
+        Args:
+            message: Message dict with 'role' and 'text' keys
+
+        Returns:
+            Formatted prompt string
+        """
+        line = format_message(message)
+        lines = [entry[0] for entry in self._window] + [line]
+        tokens = self._window_tokens + estimate_tokens(line)
+        start = 0
+        while tokens > self.token_budget and len(lines) - start > 1:
+            tokens -= self._window[start][1]
+            start += 1
+
+        parts = []
+        if self.summary:
+            parts.append(f"{SUMMARY_PREFIX} {self.summary}")
+        parts.append("\n".join(lines[start:]))
+        parts.append("Assistant:")
+        return "\n".join(parts)
+
+    def cancel(self) -> None:
+        """Cancel any in-flight background summary"""
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
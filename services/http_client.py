@@ -0,0 +1,93 @@
+import os
+import logging
+import httpx
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (httpx only negotiates HTTP/2 when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Provider name -> (env prefix, default timeout in seconds)
+PROVIDER_DEFAULTS = {
+    "tts": ("MURF", 30.0),
+    "llm": ("GEMINI", 30.0),
+    "stt": ("ASSEMBLYAI", 30.0),
+}
+
+
+class HTTPClientManager:
+    """Owns one long-lived, pooled httpx.AsyncClient per upstream provider"""
+
+    def __init__(self):
+        self.http2 = os.getenv("HTTP2_ENABLED", "true").lower() == "true" and HTTP2_AVAILABLE
+        self.connect_timeout = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        self.max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "50"))
+        self.max_keepalive = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def timeout_for(self, provider: str) -> float:
+        """
+        Get the configured request timeout for a provider
+
+        Args:
+            provider: Provider name ('stt', 'llm' or 'tts')
+
+        Returns:
+            Timeout in seconds
+        """
+        env_prefix, default = PROVIDER_DEFAULTS[provider]
+        return float(os.getenv(f"{env_prefix}_TIMEOUT", str(default)))
+
+    def _build_client(self, provider: str) -> httpx.AsyncClient:
+        # One client per provider keeps connection limits per upstream host
+        return httpx.AsyncClient(
+            http2=self.http2,
+            timeout=httpx.Timeout(self.timeout_for(provider), connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+
+    def get(self, provider: str) -> httpx.AsyncClient:
+        """
+        Get the shared client for a provider, creating it on first use
+
+        Args:
+            provider: Provider name ('stt', 'llm' or 'tts')
+
+        Returns:
+            Pooled httpx.AsyncClient
+        """
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._build_client(provider)
+            self._clients[provider] = client
+        return client
+
+    async def start(self) -> None:
+        """Open the provider clients (called from the app lifespan)"""
+        for provider in PROVIDER_DEFAULTS:
+            self.get(provider)
+        logger.info(
+            f"HTTP clients started (http2={self.http2}, max_connections={self.max_connections}, "
+            f"keepalive={self.max_keepalive}/{self.keepalive_expiry}s)"
+        )
+
+    async def close(self) -> None:
+        """Close all provider clients and their pooled connections"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        logger.info("HTTP clients closed")
+
+
+# Shared client manager used by all services in this process
+http_clients = HTTPClientManager()
@@ -0,0 +1,394 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from services.concurrency import ProviderOverloadedError
+from services.session_store import connect_sqlite
+from services.telemetry import registry, request_id_var
+
+logger = logging.getLogger(__name__)
+
+jobs_total = registry.counter("voice_agent_jobs_total", "Background pipeline jobs by final status")
+
+
+class Job:
+    """One background pipeline run: its status, completed stages and (partial) result"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        kind: str,
+        run: Callable[["Job"], Awaitable[Dict[str, Any]]],
+        cleanup: Optional[Callable[[], None]] = None,
+        on_change: Optional[Callable[["Job"], None]] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = Job.QUEUED
+        self.stage: Optional[str] = None
+        self.stages: List[Dict[str, Any]] = []
+        self.result: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.request_id = request_id_var.get()
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Bumped on every published change, so out-of-order writes to a shared store are dropped
+        self.version = 0
+        self._run = run
+        self._cleanup = cleanup
+        self._on_change = on_change
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (Job.COMPLETED, Job.FAILED)
+
+    def advance(self, stage: str, **partial: Any) -> None:
+        """
+        Record a completed pipeline stage and publish its output
+
+        Args:
+            stage: Stage name ("transcript", "reply", "audio", ...)
+            **partial: Fields to merge into the job's result
+        """
+        self.stage = stage
+        self.result.update(partial)
+        elapsed = time.time() - (self.started_at or self.created_at)
+        self.stages.append({"name": stage, "seconds": round(elapsed, 3)})
+        self.changed()
+
+    def changed(self) -> None:
+        """Publish the job's current state (to the shared store, if there is one)"""
+        if self._on_change:
+            self._on_change(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": list(self.stages),
+            "result": dict(self.result),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class SQLiteJobStore:
+    """
+    Job state shared by the worker processes on one host, kept in the session database
+
+    The worker that accepted a job runs it and writes a snapshot after every
+    change; any worker can answer a poll from it. Calls do blocking file I/O
+    and are run off the event loop by JobManager.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("JOB_DB_PATH") or os.getenv("SESSION_DB_PATH", "sessions.db")
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL,
+                    state TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at);
+                """
+            )
+        logger.info(f"SQLiteJobStore using {self.path}")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def save(self, state: Dict[str, Any], version: int) -> None:
+        """Write a job snapshot unless a newer version is already stored"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, version, status, updated_at, finished_at, state) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id) DO UPDATE SET version = excluded.version, status = excluded.status, "
+                "updated_at = excluded.updated_at, finished_at = excluded.finished_at, state = excluded.state "
+                "WHERE excluded.version > jobs.version",
+                (state["job_id"], version, state["status"], time.time(), state["finished_at"], json.dumps(state))
+            )
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT state FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def prune(self, ttl: float, max_retained: int) -> int:
+        """
+        Delete jobs finished more than `ttl` seconds ago, finished jobs beyond the newest
+        `max_retained`, and unfinished ones not updated within `ttl` (their worker is gone)
+
+        Returns:
+            Number of jobs deleted
+        """
+        cutoff = time.time() - ttl
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE COALESCE(finished_at, updated_at) <= ?", (cutoff,)
+            ).rowcount
+            deleted += conn.execute(
+                "DELETE FROM jobs WHERE job_id IN (SELECT job_id FROM jobs WHERE finished_at IS NOT NULL "
+                "ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                (max_retained,)
+            ).rowcount
+        return deleted
+
+
+def create_job_store() -> Optional[SQLiteJobStore]:
+    """
+    Build the job store selected by JOB_STORE ('memory' or 'sqlite')
+
+    Returns:
+        A SQLiteJobStore, or None when jobs are only kept in this process
+    """
+    backend = os.getenv("JOB_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteJobStore()
+    if backend != "memory":
+        logger.warning(f"Unknown JOB_STORE '{backend}', keeping jobs in memory")
+    return None
+
+
+class JobManager:
+    """
+    Runs pipeline jobs on a fixed pool of worker tasks and keeps their results for polling
+
+    Submissions wait in a bounded queue; when it is full submit() sheds the job
+    with ProviderOverloadedError, like a saturated provider. Finished jobs are
+    kept for `ttl` seconds, and at most `max_retained` of them, oldest dropped
+    first. A job runs in the process that accepted it. With JOB_STORE=sqlite
+    its state is also written to a store every worker on the host can read, so
+    a poll may land on any of them.
+    """
+
+    # Seconds between sweeps of the shared store
+    prune_interval = 60.0
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        ttl: Optional[float] = None,
+        max_retained: Optional[int] = None,
+        store: Optional[SQLiteJobStore] = None
+    ):
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.max_queue = max_queue or int(os.getenv("JOB_QUEUE_SIZE", "100"))
+        self.ttl = ttl or float(os.getenv("JOB_TTL_SECONDS", "600"))
+        self.max_retained = max_retained or int(os.getenv("JOB_MAX_RETAINED", "1000"))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.store = store if store is not None else create_job_store()
+        self._writes: Set[asyncio.Task] = set()
+        self._last_store_prune = 0.0
+        self.rejected = 0
+        self.expired = 0
+
+    def start(self) -> None:
+        """Start the worker tasks (done lazily by submit() if not called at startup)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logger.info(f"Job pool started: {self.workers} workers, queue {self.max_queue}, TTL {self.ttl:g}s")
+
+    async def close(self) -> None:
+        """Stop the workers, drop queued jobs and finish pending store writes"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self._jobs.values():
+            if not job.finished:
+                self._release(job)
+        self._queue = None
+        await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def _publish(self, job: Job) -> Optional[asyncio.Task]:
+        """Write a snapshot of the job to the shared store in the background"""
+        if self.store is None:
+            return None
+        job.version += 1
+        task = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(self.store.save, job.to_dict(), job.version)
+        )
+        self._writes.add(task)
+        task.add_done_callback(self._write_done)
+        return task
+
+    def _write_done(self, task: asyncio.Task) -> None:
+        self._writes.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Could not write job state to the store: {str(task.exception())}")
+
+    async def submit(
+        self,
+        kind: str,
+        run: Callable[[Job], Awaitable[Dict[str, Any]]],
+        cleanup: Optional[Callable[[], None]] = None
+    ) -> Job:
+        """
+        Queue a job
+
+        Args:
+            kind: Job type, for listing and metrics ("chat", "query")
+            run: Coroutine function doing the work; it reports stages with job.advance()
+                and returns the final result. A result with an "error" key marks the job failed.
+            cleanup: Called once the job is finished or dropped (e.g. to close its upload)
+
+        Returns:
+            The queued job
+
+        Raises:
+            ProviderOverloadedError: If the queue is full
+        """
+        self.start()
+        self._prune()
+        self._prune_store()
+        job = Job(kind, run, cleanup, on_change=self._publish)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            jobs_total.inc(kind=kind, status="rejected")
+            if cleanup:
+                cleanup()
+            raise ProviderOverloadedError("jobs", "queue_full", retry_after=5.0) from None
+        self._jobs[job.id] = job
+        logger.info(f"Queued {kind} job {job.id} ({self._queue.qsize()} waiting)")
+        # Stored before the 202 goes out, so a poll to another worker finds it
+        write = self._publish(job)
+        if write is not None:
+            await asyncio.shield(write)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job's state; finished jobs disappear after the TTL
+
+        Returns:
+            The job as a dictionary (see Job.to_dict), or None if unknown or expired
+        """
+        self._prune()
+        self._prune_store()
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is None:
+            return None
+        state = await asyncio.to_thread(self.store.load, job_id)
+        if state and state["finished_at"] and time.time() - state["finished_at"] > self.ttl:
+            return None
+        return state
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            job = await self._queue.get()
+            token = request_id_var.set(job.request_id)
+            try:
+                await self._execute(job)
+            finally:
+                request_id_var.reset(token)
+
+    async def _execute(self, job: Job) -> None:
+        job.status = Job.RUNNING
+        job.started_at = time.time()
+        job.changed()
+        try:
+            result = await job._run(job)
+            job.result.update(result)
+            job.error = result.get("error")
+            job.status = Job.FAILED if job.error else Job.COMPLETED
+        except asyncio.CancelledError:
+            job.status = Job.FAILED
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.status = Job.FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self._release(job)
+            job.changed()
+            jobs_total.inc(kind=job.kind, status=job.status)
+            logger.info(f"Job {job.id} {job.status} in {job.finished_at - job.started_at:.2f}s")
+
+    def _release(self, job: Job) -> None:
+        cleanup, job._cleanup, job._run = job._cleanup, None, None
+        if cleanup:
+            try:
+                cleanup()
+            except Exception as e:
+                logger.warning(f"Job {job.id} cleanup failed: {str(e)}")
+
+    def _prune_store(self) -> None:
+        now = time.time()
+        if self.store is None or now - self._last_store_prune < self.prune_interval:
+            return
+        self._last_store_prune = now
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.store.prune, self.ttl, self.max_retained))
+        self._writes.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _prune(self) -> None:
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished:
+            if now - job.finished_at > self.ttl:
+                del self._jobs[job.id]
+                self.expired += 1
+        finished = [job for job in finished if job.id in self._jobs]
+        for job in finished[:max(0, len(finished) - self.max_retained)]:
+            del self._jobs[job.id]
+            self.expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool and retention counters of this process
+
+        Returns:
+            Dictionary with job counts by status, queue depth and rejections
+        """
+        self._prune()
+        by_status = {Job.QUEUED: 0, Job.RUNNING: 0, Job.COMPLETED: 0, Job.FAILED: 0}
+        for job in self._jobs.values():
+            by_status[job.status] += 1
+        return {
+            "store": "sqlite" if self.store is not None else "memory",
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": by_status,
+            "ttl_seconds": self.ttl,
+            "max_retained": self.max_retained,
+            "rejected": self.rejected,
+            "expired": self.expired,
+        }
+
+
+job_manager = JobManager()
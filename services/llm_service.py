@@ -1,8 +1,20 @@
 import os
+import time
+import asyncio
 import logging
-import requests
+import httpx
 import google.generativeai as genai
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Awaitable, Callable, Optional, List, Tuple
+from services.executor import ProviderExecutor, provider_executor
+from services.concurrency import ProviderOverloadedError
+from services.deadline import with_deadline
+from services.resilience import ProviderGuard, provider_guard
+from services.http_client import HTTPClientManager, http_clients as shared_http_clients
+from services.history import prompt_tail
+from services.model_router import ModelRouter, RouteDecision
+from services.response_cache import GLOBAL_SCOPE, SemanticResponseCache, context_scope, create_response_cache
+from services.single_flight import SingleFlight, flight_key
+from services.telemetry import mark_span_error, traced
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +22,14 @@ logger = logging.getLogger(__name__)
 class LLMService:
     """Service for handling Large Language Model operations using Gemini"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        executor: Optional[ProviderExecutor] = None,
+        http_clients: Optional[HTTPClientManager] = None,
+        cache: Optional[SemanticResponseCache] = None,
+        guard: Optional[ProviderGuard] = None,
+        router: Optional[ModelRouter] = None
+    ):
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             logger.error("GEMINI_API_KEY not found in environment variables")
@@ -18,33 +37,132 @@ class LLMService:
         
         # Configure Gemini SDK
         genai.configure(api_key=self.api_key)
-        self.model_name = "gemini-2.5-pro"
-        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model_name}:generateContent?key={self.api_key}"
+        self.executor = executor or provider_executor
+        self.http_clients = http_clients or shared_http_clients
+        # Circuit breaker, request deadline and concurrency limit for each upstream call
+        self.guard = guard or provider_guard
+        # Optional semantic cache of answers to near-duplicate queries (LLM_CACHE_ENABLED)
+        self.cache = cache or create_response_cache()
+        self.cache_context_turns = int(os.getenv("LLM_CACHE_CONTEXT_TURNS", "2"))
+        self.cache_max_query_chars = int(os.getenv("LLM_CACHE_MAX_QUERY_CHARS", "300"))
+        # Identical concurrent prompts share one Gemini call
+        self.single_flight = SingleFlight("llm")
+        # Picks the fast or the large Gemini model per call (LLM_ROUTING_ENABLED)
+        self.router = router or ModelRouter()
+        self.model_name = self.router.large_model
+        self.api_url = self._api_url(self.model_name)
         
         logger.info("LLMService initialized successfully")
 
-    async def generate_response(self, text: str) -> Optional[str]:
+    async def warm_up(self) -> None:
+        """Open a pooled connection to the Gemini REST host so the first request doesn't pay for it"""
+        client = self.http_clients.get("llm")
+        await client.head(str(httpx.URL(self.api_url).join("/")), timeout=self.http_clients.connect_timeout)
+
+    def _api_url(self, model: str) -> str:
+        return f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={self.api_key}"
+
+    async def _call_routed(
+        self,
+        decision: RouteDecision,
+        call: Callable[[str], Awaitable[Optional[str]]]
+    ) -> Optional[str]:
+        """
+        Run a call on the routed model, retrying on the large model if the fast one fails
+        
+        Args:
+            decision: Routing decision for this call
+            call: Coroutine function taking the model name
+            
+        Returns:
+            Generated response text or None if failed
+        """
+        started = time.perf_counter()
+        model = decision.model
+        reply = None
+        try:
+            reply = await call(model)
+            if not reply and self.router.can_fall_back(decision):
+                logger.warning(f"{model} gave no reply, retrying on {self.router.large_model}")
+                model = self.router.large_model
+                reply = await call(model)
+            return reply
+        finally:
+            self.router.record(decision, model, time.perf_counter() - started, ok=bool(reply))
+
+    @traced("llm.generate", provider="gemini")
+    async def generate_response(
+        self,
+        text: str,
+        use_cache: bool = True,
+        latency_budget: Optional[float] = None
+    ) -> Optional[str]:
         """
         Generate response from text using Gemini API
         
         Args:
             text: Input text to generate response for
+            use_cache: Whether a cached answer to a similar query may be used
+            latency_budget: Seconds the caller can wait, used to pick the model
             
         Returns:
             Generated response text or None if failed
+            
+        Raises:
+            ProviderOverloadedError: If the call was shed (Gemini overloaded or its circuit open)
         """
         try:
-            logger.info(f"Generating LLM response for: {text[:100]}...")
+            cacheable = use_cache and self.cache is not None and len(text) <= self.cache_max_query_chars
+            if cacheable:
+                cached_reply = self.cache.get(text, GLOBAL_SCOPE)
+                if cached_reply:
+                    return cached_reply
+            
+            decision = self.router.route(text, latency_budget=latency_budget)
+            llm_reply = await self.single_flight.do(
+                f"generate:{decision.model}:{flight_key(text)}",
+                lambda: self._call_routed(
+                    decision, lambda model: self.guard.hedged("llm", lambda: self._generate(text, model))
+                )
+            )
+            if cacheable and llm_reply:
+                self.cache.set(text, llm_reply, GLOBAL_SCOPE)
+            return llm_reply
+            
+        except ProviderOverloadedError:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating LLM response: {str(e)}")
+            mark_span_error(type(e).__name__)
+            return None
+
+    async def _generate(self, text: str, model: str) -> Optional[str]:
+        """
+        Call the Gemini REST API for one prompt
+        
+        Args:
+            text: Input text to generate response for
+            model: Gemini model to call
+            
+        Returns:
+            Generated response text or None if failed
+        """
+        try:
+            logger.info(f"Generating LLM response on {model} for: {text[:100]}...")
             
             payload = {
                 "contents": [{"parts": [{"text": text}]}]
             }
             headers = {"Content-Type": "application/json"}
             
-            response = requests.post(self.api_url, headers=headers, json=payload, timeout=30)
+            client = self.http_clients.get("llm")
+            async with self.guard.call("llm") as permit:
+                response = await with_deadline("llm", client.post(self._api_url(model), headers=headers, json=payload))
+                permit.record_status(response.status_code)
             
             if response.status_code != 200:
                 logger.error(f"Gemini API error: {response.text}")
+                mark_span_error(f"http_{response.status_code}")
                 return None
 
             data = response.json()
@@ -62,28 +180,67 @@ class LLMService:
             logger.info(f"LLM response generated: {llm_reply[:100]}...")
             return llm_reply
             
+        except ProviderOverloadedError:
+            raise
+        except httpx.TimeoutException:
+            logger.error("Request timeout - Gemini API took too long to respond")
+            mark_span_error("timeout")
+            return None
         except Exception as e:
             logger.error(f"Error generating LLM response: {str(e)}")
+            mark_span_error(type(e).__name__)
             return None
 
-    def generate_response_with_history(self, history: List[Dict[str, str]]) -> Optional[str]:
+    @traced("llm.generate_with_history", provider="gemini")
+    async def generate_response_from_prompt(self, prompt: str, latency_budget: Optional[float] = None) -> Optional[str]:
         """
-        Generate response using conversation history
+        Generate response for an already built conversation prompt
+        
+        A cached answer is only reused when the messages just before the
+        user's query match too (LLM_CACHE_CONTEXT_TURNS).
         
         Args:
-            history: List of conversation messages with 'role' and 'text' keys
+            prompt: Prompt built from the conversation (see HistoryWindow.build_prompt)
+            latency_budget: Seconds the caller can wait (defaults to what is left of the request deadline)
             
         Returns:
             Generated response text or None if failed
+            
+        Raises:
+            ProviderOverloadedError: If the call was shed (Gemini overloaded or its circuit open)
         """
-        try:
-            logger.info("Generating LLM response with conversation history")
+        cache_key = self._prompt_cache_key(prompt)
+        if cache_key:
+            cached_reply = self.cache.get(*cache_key)
+            if cached_reply:
+                return cached_reply
+        
+        decision = self.router.route_prompt(prompt, latency_budget)
+        llm_reply = await self.single_flight.do(
+            f"prompt:{decision.model}:{flight_key(prompt)}",
+            lambda: self._call_routed(decision, lambda model: self._generate_from_prompt(prompt, model))
+        )
+        if cache_key and llm_reply:
+            self.cache.set(cache_key[0], llm_reply, cache_key[1])
+        return llm_reply
+
+    async def _generate_from_prompt(self, prompt: str, model_name: str) -> Optional[str]:
+        """
+        Call Gemini through the SDK for one conversation prompt
+        
+        Args:
+            prompt: Prompt built from the conversation
+            model_name: Gemini model to call
             
-            # Build prompt from history
-            prompt = self._build_prompt_from_history(history)
+        Returns:
+            Generated response text or None if failed
+        """
+        try:
+            logger.info(f"Generating LLM response with conversation history on {model_name}")
             
-            model = genai.GenerativeModel(self.model_name)
-            gen_response = model.generate_content(prompt)
+            model = genai.GenerativeModel(model_name)
+            async with self.guard.call("llm"):
+                gen_response = await with_deadline("llm", self.executor.run("llm", model.generate_content, prompt))
             
             llm_reply = getattr(gen_response, "text", None)
             if not llm_reply:
@@ -103,25 +260,150 @@ class LLMService:
             logger.info(f"LLM response with history generated: {llm_reply[:100]}...")
             return llm_reply
             
+        except ProviderOverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Error generating LLM response with history: {str(e)}")
+            mark_span_error(type(e).__name__)
             return None
 
-    def _build_prompt_from_history(self, history: List[Dict[str, str]]) -> str:
+    @traced("llm.stream", provider="gemini")
+    async def stream_response_from_prompt(
+        self,
+        prompt: str,
+        on_complete: Optional[Callable[[str], None]] = None,
+        latency_budget: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response for an already built conversation prompt
+        
+        A cached answer in the same recent context is yielded as one chunk. If
+        the routed fast model fails before producing any text, the large model
+        is tried instead (LLM_ROUTE_FALLBACK).
+        
+        Args:
+            prompt: Prompt built from the conversation (see HistoryWindow.build_prompt)
+            on_complete: Called with the full reply if the stream finishes without error
+            latency_budget: Seconds the caller can wait (defaults to what is left of the request deadline)
+            
+        Yields:
+            Text chunks of the reply; the stream simply ends early if generation fails
+            
+        Raises:
+            ProviderOverloadedError: If the call was shed (Gemini overloaded or its circuit open)
+        """
+        cache_key = self._prompt_cache_key(prompt)
+        if cache_key:
+            cached_reply = self.cache.get(*cache_key)
+            if cached_reply:
+                yield cached_reply
+                return
+        
+        decision = self.router.route_prompt(prompt, latency_budget)
+        model_name = decision.model
+        parts = []
+        started = time.perf_counter()
+        first_chunk = None
+        aborted = False
+        try:
+            while True:
+                async for text in self._stream_chunks(prompt, model_name):
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - started
+                    parts.append(text)
+                    yield text
+                if parts or not self.router.can_fall_back(decision) or model_name == self.router.large_model:
+                    break
+                logger.warning(f"{model_name} streamed no reply, retrying on {self.router.large_model}")
+                model_name = self.router.large_model
+            
+            if parts:
+                reply = "".join(parts)
+                if cache_key:
+                    self.cache.set(cache_key[0], reply, cache_key[1])
+                if on_complete:
+                    on_complete(reply)
+        except (GeneratorExit, asyncio.CancelledError):
+            # Consumer went away (e.g. a discarded speculative reply); not a model failure
+            aborted = True
+            raise
+        finally:
+            if parts or not aborted:
+                latency = first_chunk if first_chunk is not None else time.perf_counter() - started
+                self.router.record(decision, model_name, latency, ok=bool(parts), mode="stream")
+
+    async def _stream_chunks(self, prompt: str, model_name: str) -> AsyncIterator[str]:
+        """
+        Stream one Gemini SDK generation, ending early (after logging) if it fails
+        
+        Args:
+            prompt: Prompt built from the conversation
+            model_name: Gemini model to call
+            
+        Yields:
+            Text chunks of the reply
+        """
+        try:
+            logger.info(f"Streaming LLM response with conversation history on {model_name}")
+            
+            model = genai.GenerativeModel(model_name)
+            
+            # The slot is held for the whole stream; time to first chunk is the latency sample
+            async with self.guard.call("llm") as permit:
+                async for chunk in self.executor.stream("llm", model.generate_content, prompt, stream=True):
+                    permit.first_response()
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. safety metadata) raise on .text
+                        continue
+                    if text:
+                        yield text
+                    
+        except ProviderOverloadedError:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming LLM response with history: {str(e)}")
+            mark_span_error(type(e).__name__)
+
+    async def summarize_history(self, previous_summary: Optional[str], lines: List[str]) -> Optional[str]:
         """
-        Build prompt from conversation history
+        Fold older conversation turns into a short running summary
         
         Args:
-            history: List of conversation messages
+            previous_summary: Summary of even older turns, if any
+            lines: Serialized turns ("User: ..." / "Assistant: ...") to fold in
             
         Returns:
-            Formatted prompt string
+            Updated summary text or None if failed
         """
-        lines = []
-        for msg in history:
-            role = "User" if msg["role"] == "user" else "Assistant"
-            lines.append(f"{role}: {msg['text']}")
+        prompt_parts = [
+            "Summarize the following conversation between a user and a voice assistant "
+            "in at most five sentences. Keep names, facts and preferences the user mentioned."
+        ]
+        if previous_summary:
+            prompt_parts.append(f"Earlier summary: {previous_summary}")
+        prompt_parts.append("\n".join(lines))
+        return await self.generate_response("\n\n".join(prompt_parts), use_cache=False)
+
+    def _prompt_cache_key(self, prompt: str) -> Optional[Tuple[str, str]]:
+        """
+        Get the (query, scope) a conversation reply is cached under
+        
+        The query is the latest user message; the scope covers the messages just
+        before it in the prompt's window, so a cached answer is only reused in
+        the same recent context.
         
-        # Ask assistant to reply next
-        lines.append("Assistant:")
-        return "\n".join(lines)
\ No newline at end of file
+        Args:
+            prompt: Prompt built by HistoryWindow, ending with the user's turn
+            
+        Returns:
+            (query, scope), or None if the reply should not be cached
+        """
+        if self.cache is None:
+            return None
+        tail = prompt_tail(prompt, self.cache_context_turns)
+        if tail is None or len(tail[0]) > self.cache_max_query_chars:
+            return None
+        query, recent = tail
+        return query, context_scope(recent, self.cache_context_turns)
\ No newline at end of file
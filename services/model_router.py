@@ -0,0 +1,234 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+from services.deadline import time_remaining
+from services.history import SUMMARY_PREFIX
+from services.resilience import LatencyTracker
+from services.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+llm_routes_total = registry.counter(
+    "voice_agent_llm_routes_total", "Gemini calls by the model the router picked and why"
+)
+llm_model_latency = registry.histogram(
+    "voice_agent_llm_model_latency_seconds", "Gemini call latency per model (time to first chunk for streams)"
+)
+
+# Wording that suggests the answer needs reasoning rather than a quick reply
+_COMPLEX_RE = re.compile(
+    r"\b(why|explain|compare|difference|analy[sz]e|summari[sz]e|describe|plan|design|write|code|"
+    r"calculate|solve|prove|translate|recommend|pros and cons|step[- ]by[- ]step|"
+    r"how (?:do|does|did|can|could|would|should|to|much|many))\b",
+    re.IGNORECASE,
+)
+_ARITHMETIC_RE = re.compile(r"\d\s*[-+*/^%x]\s*\d")
+
+
+@dataclass
+class RouteDecision:
+    """The model picked for one call, and the features that picked it"""
+    model: str
+    tier: str
+    reason: str
+    features: Dict[str, Any] = field(default_factory=dict)
+
+
+def prompt_features(prompt: str) -> Dict[str, Any]:
+    """
+    Pull the routing features out of a conversation prompt (see HistoryWindow.build_prompt)
+
+    Returns:
+        Dictionary with the latest user message, the number of turns in the prompt
+        and whether older turns were summarized
+    """
+    start = prompt.rfind("User: ")
+    query = prompt[start + len("User: "):] if start >= 0 else prompt
+    if query.endswith("Assistant:"):
+        query = query[:-len("Assistant:")]
+    turns = sum(1 for line in prompt.splitlines() if line.startswith(("User: ", "Assistant: ")))
+    return {"query": query.strip(), "history_turns": turns, "has_summary": prompt.startswith(SUMMARY_PREFIX)}
+
+
+class ModelRouter:
+    """
+    Picks a Gemini model per call from cheap local features
+
+    Short, simple turns early in a conversation go to the fast model; long or
+    reasoning-heavy questions and deep conversations go to the large one. A
+    latency budget smaller than the large model's recent p90 (or
+    LLM_ROUTE_LARGE_MIN_BUDGET before there are samples) forces the fast
+    model. Every call is recorded with its model, reason and latency so the
+    thresholds can be tuned from /metrics/routing.
+    """
+
+    FAST = "fast"
+    LARGE = "large"
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv("LLM_ROUTING_ENABLED", "false").lower() == "true"
+        self.enabled = enabled
+        self.fast_model = os.getenv("LLM_FAST_MODEL", "gemini-2.5-flash")
+        self.large_model = os.getenv("LLM_LARGE_MODEL", "gemini-2.5-pro")
+        self.fallback_to_large = os.getenv("LLM_ROUTE_FALLBACK", "true").lower() == "true"
+        self.max_fast_words = int(os.getenv("LLM_ROUTE_MAX_FAST_WORDS", "20"))
+        self.max_fast_turns = int(os.getenv("LLM_ROUTE_MAX_FAST_TURNS", "8"))
+        self.large_min_budget = float(os.getenv("LLM_ROUTE_LARGE_MIN_BUDGET", "6"))
+        self.min_samples = 20
+
+        self._latency = {self.fast_model: LatencyTracker(), self.large_model: LatencyTracker()}
+        self._models: Dict[str, Dict[str, float]] = {}
+        self._reasons: Dict[str, int] = {}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=int(os.getenv("LLM_ROUTE_HISTORY", "200")))
+        self._lock = threading.Lock()
+
+    def route(
+        self,
+        query: str,
+        history_turns: int = 0,
+        has_summary: bool = False,
+        latency_budget: Optional[float] = None
+    ) -> RouteDecision:
+        """
+        Pick the model for one call
+
+        Args:
+            query: The user's latest message
+            history_turns: Messages of conversation in the prompt
+            has_summary: Whether older turns were folded into a summary
+            latency_budget: Seconds the caller can wait (defaults to what is left of the request deadline)
+
+        Returns:
+            The routing decision
+        """
+        if latency_budget is None:
+            latency_budget = time_remaining()
+        words = len(query.split())
+        features = {
+            "words": words,
+            "history_turns": history_turns,
+            "has_summary": has_summary,
+            "latency_budget": round(latency_budget, 3) if latency_budget is not None else None,
+        }
+        if not self.enabled:
+            return RouteDecision(self.large_model, self.LARGE, "routing_disabled", features)
+
+        if latency_budget is not None and latency_budget < self._large_model_expected_latency():
+            return RouteDecision(self.fast_model, self.FAST, "latency_budget", features)
+        if words > self.max_fast_words:
+            return RouteDecision(self.large_model, self.LARGE, "long_query", features)
+        if _COMPLEX_RE.search(query) or _ARITHMETIC_RE.search(query) or query.count("?") > 1:
+            return RouteDecision(self.large_model, self.LARGE, "complex_query", features)
+        if has_summary or history_turns > self.max_fast_turns:
+            return RouteDecision(self.large_model, self.LARGE, "deep_history", features)
+        return RouteDecision(self.fast_model, self.FAST, "simple_query", features)
+
+    def route_prompt(self, prompt: str, latency_budget: Optional[float] = None) -> RouteDecision:
+        """Pick the model for a conversation prompt built by HistoryWindow"""
+        return self.route(latency_budget=latency_budget, **prompt_features(prompt))
+
+    def can_fall_back(self, decision: RouteDecision) -> bool:
+        """Whether a failed fast-model call should be retried on the large model"""
+        if not self.fallback_to_large or decision.model == self.large_model:
+            return False
+        remaining = time_remaining()
+        return remaining is None or remaining > 0
+
+    def _large_model_expected_latency(self) -> float:
+        tracker = self._latency[self.large_model]
+        if len(tracker) < self.min_samples:
+            return self.large_min_budget
+        return tracker.quantile(0.9)
+
+    def record(
+        self,
+        decision: RouteDecision,
+        model: str,
+        latency: float,
+        ok: bool,
+        mode: str = "unary"
+    ) -> None:
+        """
+        Record how a routed call went
+
+        Args:
+            decision: What route() picked
+            model: Model that produced the final answer (the large one after a fallback)
+            latency: Seconds the call took (to the first chunk for streams)
+            ok: Whether a reply came back
+            mode: "unary" or "stream"
+        """
+        fell_back = model != decision.model
+        llm_routes_total.inc(model=model, reason=decision.reason)
+        if ok:
+            llm_model_latency.observe(latency, model=model, mode=mode)
+        with self._lock:
+            if ok and model in self._latency:
+                self._latency[model].add(latency)
+            entry = self._model_entry(model)
+            entry["calls"] += 1
+            entry["seconds"] += latency
+            if not ok:
+                entry["failures"] += 1
+            if fell_back:
+                # The routed model's failed attempt counts against it; the time is in the fallback's entry
+                entry["fallbacks"] += 1
+                routed = self._model_entry(decision.model)
+                routed["calls"] += 1
+                routed["failures"] += 1
+            self._reasons[decision.reason] = self._reasons.get(decision.reason, 0) + 1
+            self._recent.append({
+                "at": time.time(),
+                "model": model,
+                "routed_to": decision.model,
+                "reason": decision.reason,
+                "fell_back": fell_back,
+                "ok": ok,
+                "mode": mode,
+                "seconds": round(latency, 3),
+                **decision.features,
+            })
+        logger.info(
+            f"LLM turn on {model} ({decision.reason}{', fallback' if fell_back else ''}) "
+            f"in {latency:.2f}s, features={decision.features}"
+        )
+
+    def _model_entry(self, model: str) -> Dict[str, float]:
+        # Caller holds the lock
+        return self._models.setdefault(model, {"calls": 0, "failures": 0, "fallbacks": 0, "seconds": 0.0})
+
+    def stats(self, recent: int = 20) -> Dict[str, Any]:
+        """
+        Get routing counters and the most recent decisions
+
+        Returns:
+            Dictionary with per-model calls, failures, fallbacks and latency, counts by reason
+            and the last `recent` recorded turns
+        """
+        with self._lock:
+            models = {}
+            for model, entry in self._models.items():
+                tracker = self._latency.get(model)
+                models[model] = {
+                    "calls": int(entry["calls"]),
+                    "failures": int(entry["failures"]),
+                    "fallbacks": int(entry["fallbacks"]),
+                    "avg_seconds": round(entry["seconds"] / entry["calls"], 3) if entry["calls"] else 0.0,
+                    "p50_seconds": tracker.quantile(0.5) if tracker else None,
+                    "p90_seconds": tracker.quantile(0.9) if tracker else None,
+                }
+            return {
+                "enabled": self.enabled,
+                "fast_model": self.fast_model,
+                "large_model": self.large_model,
+                "fallback_to_large": self.fallback_to_large,
+                "models": models,
+                "reasons": dict(self._reasons),
+                "recent": list(self._recent)[-recent:],
+            }
@@ -0,0 +1,370 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from services.concurrency import Permit, ProviderLimits, ProviderOverloadedError, provider_limits
+from services.deadline import DeadlineExceededError, check_deadline
+from services.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+circuit_transitions_total = registry.counter(
+    "voice_agent_circuit_transitions_total", "Circuit breaker state changes by provider and new state"
+)
+circuit_rejected_total = registry.counter(
+    "voice_agent_circuit_rejected_total", "Provider calls failed fast because the circuit was open"
+)
+hedged_requests_total = registry.counter(
+    "voice_agent_hedged_requests_total", "Hedged provider calls by which attempt answered first"
+)
+
+
+class CircuitOpenError(ProviderOverloadedError):
+    """Raised instead of calling a provider whose circuit breaker is open"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(provider, "circuit_open", retry_after)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider that keeps failing or hanging.
+
+    Closed: calls go through, and the outcomes of the last `window` calls are
+    kept. Once at least `min_calls` are recorded and the share of failures
+    reaches `failure_rate`, or the share of calls slower than
+    `slow_call_seconds` reaches `slow_call_rate`, the circuit opens.
+    Open: calls fail immediately with CircuitOpenError for `open_seconds`.
+    Half-open: up to `half_open_probes` calls are let through; if they all
+    succeed in time the circuit closes again, any failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_seconds: float,
+        slow_call_rate: float,
+        open_seconds: float,
+        half_open_probes: int
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+
+        self.state = self.CLOSED
+        # (failed, slow) per recent call
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self) -> bool:
+        """
+        Ask to make a call
+
+        Returns:
+            True if the call is a half-open probe
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or all probes are taken)
+        """
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self._reject(remaining)
+            self._transition(self.HALF_OPEN)
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+
+        if self.state == self.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_probes:
+                self._reject(1.0)
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def _reject(self, retry_after: float) -> None:
+        self.rejected += 1
+        circuit_rejected_total.inc(provider=self.name)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, probe: bool, failed: bool, latency: float) -> None:
+        """
+        Record the outcome of a call allowed by before_call()
+
+        Args:
+            probe: Value returned by before_call()
+            failed: Whether the call failed (exception, timeout, 429/5xx)
+            latency: Call duration in seconds
+        """
+        slow = latency >= self.slow_call_seconds
+        if probe:
+            self.release_probe(probe)
+            if self.state != self.HALF_OPEN:
+                return
+            if failed or slow:
+                self._trip(f"probe {'failed' if failed else f'took {latency:.1f}s'}")
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._outcomes.clear()
+                self._transition(self.CLOSED)
+            return
+
+        if self.state != self.CLOSED:
+            return
+        self._outcomes.append((failed, slow))
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failures = sum(1 for failed_call, _ in self._outcomes if failed_call)
+        slow_calls = sum(1 for _, slow_call in self._outcomes if slow_call)
+        if failures / calls >= self.failure_rate:
+            self._trip(f"{failures}/{calls} recent calls failed")
+        elif slow_calls / calls >= self.slow_call_rate:
+            self._trip(f"{slow_calls}/{calls} recent calls took over {self.slow_call_seconds:.0f}s")
+
+    def release_probe(self, probe: bool) -> None:
+        """Give back a probe slot for a call that ended without an outcome (e.g. cancelled)"""
+        if probe:
+            # A probe from before the circuit reopened may finish after the count was reset
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _trip(self, reason: str) -> None:
+        logger.warning(f"Opening {self.name} circuit for {self.open_seconds:g}s: {reason}")
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        self._transition(self.OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            circuit_transitions_total.inc(provider=self.name, state=state)
+            if state != self.OPEN:
+                logger.info(f"{self.name} circuit is now {state}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get breaker state
+
+        Returns:
+            Dictionary with state, recent failure/slow rates and counters
+        """
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": calls,
+            "failure_rate": round(sum(1 for failed, _ in self._outcomes if failed) / calls, 3) if calls else 0.0,
+            "slow_call_rate": round(sum(1 for _, slow in self._outcomes if slow) / calls, 3) if calls else 0.0,
+            "open_seconds_left": round(max(0.0, self._opened_at + self.open_seconds - time.monotonic()), 1)
+            if self.state == self.OPEN else 0.0,
+            "times_opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class LatencyTracker:
+    """Recent successful call latencies, for picking a hedging delay"""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProviderGuard:
+    """
+    Circuit breaker, request deadline and concurrency limit around every provider call,
+    plus optional hedging of idempotent calls.
+    """
+
+    PROVIDERS = ("stt", "llm", "tts")
+
+    def __init__(self, limits: Optional[ProviderLimits] = None):
+        self.limits = limits or provider_limits
+        self.breakers_enabled = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+        self.hedging_enabled = os.getenv("HEDGING_ENABLED", "false").lower() == "true"
+        self.hedge_quantile = float(os.getenv("HEDGE_QUANTILE", "0.95"))
+        self.hedge_min_samples = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self.hedges: Dict[str, Dict[str, int]] = {}
+        for provider in self.PROVIDERS:
+            env_prefix = provider.upper()
+            self.breakers[provider] = CircuitBreaker(
+                provider,
+                window=int(os.getenv("CIRCUIT_WINDOW", "20")),
+                min_calls=int(os.getenv("CIRCUIT_MIN_CALLS", "10")),
+                failure_rate=float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5")),
+                slow_call_seconds=float(os.getenv(f"{env_prefix}_SLOW_CALL_SECONDS", "10")),
+                slow_call_rate=float(os.getenv("CIRCUIT_SLOW_CALL_RATE", "0.8")),
+                open_seconds=float(os.getenv("CIRCUIT_OPEN_SECONDS", "15")),
+                half_open_probes=int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "2")),
+            )
+            self.latencies[provider] = LatencyTracker()
+            self.hedges[provider] = {"sent": 0, "primary": 0, "hedge": 0}
+
+    @asynccontextmanager
+    async def call(self, provider: str) -> AsyncIterator[Permit]:
+        """
+        Guard one upstream call
+
+        Fails fast if the request deadline has passed or the provider's circuit is
+        open, then holds a concurrency slot. Exceptions inside the block and
+        429/5xx statuses reported on the permit count as failures, except a
+        ProviderOverloadedError, which is passed on as a shed call.
+
+        Args:
+            provider: Provider name ('stt', 'llm' or 'tts')
+
+        Yields:
+            The concurrency Permit for the call
+
+        Raises:
+            DeadlineExceededError: If the request deadline has passed
+            CircuitOpenError: If the circuit is open
+            ProviderOverloadedError: If the call is shed by the concurrency limiter
+        """
+        check_deadline(provider)
+        breaker = self.breakers[provider]
+        probe = breaker.before_call() if self.breakers_enabled else False
+        # (failed, latency) once the call has run; stays None if it was shed or cancelled
+        outcome: Optional[Tuple[bool, float]] = None
+        try:
+            async with self.limits.slot(provider) as permit:
+                try:
+                    yield permit
+                except DeadlineExceededError:
+                    # The caller's budget ran out, which only says the call was slow
+                    outcome = (False, time.perf_counter() - permit.started)
+                    raise
+                except ProviderOverloadedError:
+                    # Shed further down (e.g. a full executor queue): not a provider failure
+                    raise
+                except Exception:
+                    outcome = (True, time.perf_counter() - permit.started)
+                    raise
+                latency = time.perf_counter() - permit.started
+                outcome = (permit.dropped, latency)
+                if not permit.dropped:
+                    self.latencies[provider].add(permit.latency if permit.latency is not None else latency)
+        finally:
+            if outcome is None or not self.breakers_enabled:
+                breaker.release_probe(probe)
+            else:
+                breaker.record(probe, *outcome)
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """
+        How long to wait before sending a hedged second attempt
+
+        Returns:
+            The provider's recent latency quantile, or None if hedging does not apply
+        """
+        if not self.hedging_enabled or self.breakers[provider].state != CircuitBreaker.CLOSED:
+            return None
+        tracker = self.latencies[provider]
+        if len(tracker) < self.hedge_min_samples:
+            return None
+        return tracker.quantile(self.hedge_quantile)
+
+    async def hedged(self, provider: str, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run an idempotent call, sending a second attempt if the first is slower than usual
+
+        The second attempt starts once the first has taken longer than the
+        provider's recent p95 latency (HEDGE_QUANTILE); the first reply that is
+        not None wins and the other attempt is cancelled.
+
+        Args:
+            provider: Provider name ('llm' or 'tts')
+            attempt: Zero-argument coroutine function making one guarded call
+
+        Returns:
+            The first successful result, or the failed result if both attempts failed
+        """
+        delay = self.hedge_delay(provider)
+        if delay is None:
+            return await attempt()
+
+        primary = asyncio.ensure_future(attempt())
+        attempts = [primary]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done:
+                attempts.append(asyncio.ensure_future(attempt()))
+                self.hedges[provider]["sent"] += 1
+                logger.info(f"Hedging {provider} call after {delay * 1000:.0f}ms")
+
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result() is not None:
+                        if len(attempts) > 1:
+                            winner = "primary" if task is primary else "hedge"
+                            self.hedges[provider][winner] += 1
+                            hedged_requests_total.inc(provider=provider, winner=winner)
+                        return task.result()
+
+            # Neither attempt produced a reply: prefer a plain failure (None) to an exception
+            for task in attempts:
+                if task.exception() is None:
+                    return task.result()
+            raise primary.exception()
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get breaker and hedging state for every provider
+
+        Returns:
+            Dictionary mapping provider name to its circuit and hedging statistics
+        """
+        stats = {}
+        for provider, breaker in self.breakers.items():
+            delay = self.hedge_delay(provider)
+            stats[provider] = {
+                "circuit": {"enabled": self.breakers_enabled, **breaker.stats()},
+                "hedging": {
+                    "enabled": self.hedging_enabled,
+                    "delay_seconds": round(delay, 4) if delay is not None else None,
+                    **self.hedges[provider],
+                },
+            }
+        return stats
+
+
+# Shared guard used by all services in this process
+provider_guard = ProviderGuard()
@@ -0,0 +1,276 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+EMBEDDING_DIM = 1024
+# Scope for stand-alone queries that do not depend on conversation history
+GLOBAL_SCOPE = "query"
+
+# Words that change the phrasing of a query but not what it asks for
+STOP_WORDS = frozenset(
+    "a an the is are was were be been am do does did can could would should will shall may might "
+    "i me my you your we our it its this that these those there here what what's whats who who's "
+    "which when where where's how how's why of in on at to for from by with about as and or so "
+    "if then than please tell give show let's hey hi hello okay ok just some any".split()
+)
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a transcript so trivially different phrasings compare equal"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"[^\w\s']", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_words(normalized: str) -> frozenset:
+    """
+    Words of a normalized query that carry its meaning (names and numbers included)
+
+    Stop words are dropped and plural or possessive endings stripped, so
+    rephrasings keep the same set while "paris" vs "london" does not.
+    """
+    words = set()
+    for word in normalized.split():
+        if word in STOP_WORDS:
+            continue
+        if word.endswith("'s"):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return frozenset(words)
+
+
+def _bucket(feature: str) -> Tuple[int, float]:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    # Signed hashing keeps unrelated features from adding up in the same bucket
+    return value % EMBEDDING_DIM, 1.0 if value >> 63 else -1.0
+
+
+def embed_query(normalized: str) -> "np.ndarray":
+    """
+    Hashed n-gram embedding of a normalized query
+
+    Character trigrams (within padded words) capture spelling and inflection,
+    words and word bigrams capture phrasing. The vector is L2-normalized, so a
+    dot product is the cosine similarity.
+
+    Args:
+        normalized: Output of normalize_query()
+
+    Returns:
+        float32 vector of length EMBEDDING_DIM
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    words = normalized.split()
+    features: List[Tuple[str, float]] = []
+    for word in words:
+        padded = f" {word} "
+        features.extend((f"c:{padded[i:i + 3]}", 1.0) for i in range(len(padded) - 2))
+        features.append((f"w:{word}", 2.0))
+    features.extend((f"b:{a} {b}", 2.0) for a, b in zip(words, words[1:]))
+
+    for feature, weight in features:
+        index, sign = _bucket(feature)
+        vector[index] += sign * weight
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def context_scope(history: List[Dict[str, str]], turns: int) -> str:
+    """
+    Scope key for a reply that depends on the most recent conversation turns
+
+    Args:
+        history: Messages before the current user query
+        turns: How many of the most recent messages must match
+
+    Returns:
+        Hex digest identifying the recent context
+    """
+    if not history or turns <= 0:
+        return GLOBAL_SCOPE
+    recent = history[-turns:]
+    material = "\x1f".join(f"{m['role']}:{normalize_query(m['text'])}" for m in recent)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class SemanticResponseCache:
+    """
+    In-memory vector index of previous LLM answers, looked up by query similarity.
+
+    Entries live in a preallocated matrix of embeddings, so a lookup is one
+    vectorized dot product over all slots. A hit requires the same scope (e.g.
+    the same recent conversation context), an unexpired entry, the same set of
+    content words and a cosine similarity of at least `threshold`. The n-gram
+    similarity alone stays high for long queries that differ in one key word
+    ("... in paris" vs "... in london"), hence the content-word check. The
+    least recently used entry is replaced once `max_entries` is reached.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        threshold: Optional[float] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+        self.threshold = threshold or float(os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD", "0.9"))
+
+        self._vectors = np.zeros((self.max_entries, EMBEDDING_DIM), dtype=np.float32)
+        self._expires = np.zeros(self.max_entries, dtype=np.float64)
+        # Scope of each slot as a 63-bit hash, so scope filtering is vectorized too
+        self._scopes = np.zeros(self.max_entries, dtype=np.int64)
+        # Likewise the slot's content_words() set
+        self._contents = np.zeros(self.max_entries, dtype=np.int64)
+        self._live = np.zeros(self.max_entries, dtype=bool)
+        # slot -> (scope, normalized query, answer); in LRU order, oldest first
+        self._slots: "OrderedDict[int, Tuple[str, str, str]]" = OrderedDict()
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._free: List[int] = list(range(self.max_entries - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.exact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _scope_id(scope: str) -> int:
+        return int.from_bytes(hashlib.blake2b(scope.encode("utf-8"), digest_size=8).digest(), "little") >> 1
+
+    @classmethod
+    def _content_id(cls, normalized: str) -> int:
+        return cls._scope_id("\x1f".join(sorted(content_words(normalized))))
+
+    def get(self, query: str, scope: str = GLOBAL_SCOPE) -> Optional[str]:
+        """
+        Find a cached answer for a similar query in the same scope
+
+        Args:
+            query: The user's query text
+            scope: GLOBAL_SCOPE or a context_scope() key
+
+        Returns:
+            The cached answer, or None
+        """
+        normalized = normalize_query(query)
+        if not normalized:
+            return None
+        vector = embed_query(normalized)
+        content_id = self._content_id(normalized)
+
+        with self._lock:
+            mask = (
+                self._live
+                & (self._scopes == self._scope_id(scope))
+                & (self._contents == content_id)
+                & (self._expires > time.time())
+            )
+            if mask.any():
+                scores = np.where(mask, self._vectors @ vector, -1.0)
+                slot = int(np.argmax(scores))
+                if scores[slot] >= self.threshold:
+                    _, cached_query, answer = self._slots[slot]
+                    self._slots.move_to_end(slot)
+                    self.hits += 1
+                    if cached_query == normalized:
+                        self.exact_hits += 1
+                    logger.info(f"LLM cache hit (similarity {float(scores[slot]):.3f}) for: {query[:100]}")
+                    return answer
+            self.misses += 1
+            return None
+
+    def set(self, query: str, answer: str, scope: str = GLOBAL_SCOPE) -> None:
+        """
+        Store an answer for a query
+
+        Args:
+            query: The user's query text
+            answer: The LLM's answer
+            scope: GLOBAL_SCOPE or a context_scope() key
+        """
+        normalized = normalize_query(query)
+        if not normalized or not answer:
+            return
+        vector = embed_query(normalized)
+
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            slot = self._index.get((scope, normalized))
+            if slot is None:
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    slot, (old_scope, old_query, _) = self._slots.popitem(last=False)
+                    del self._index[(old_scope, old_query)]
+                    self.evictions += 1
+            self._vectors[slot] = vector
+            self._expires[slot] = now + self.ttl_seconds
+            self._scopes[slot] = self._scope_id(scope)
+            self._contents[slot] = self._content_id(normalized)
+            self._live[slot] = True
+            self._slots[slot] = (scope, normalized, answer)
+            self._slots.move_to_end(slot)
+            self._index[(scope, normalized)] = slot
+
+    def _expire(self, now: float) -> None:
+        # Caller holds the lock. Frees expired slots for reuse.
+        for slot in np.flatnonzero(self._live & (self._expires <= now)).tolist():
+            scope, normalized, _ = self._slots.pop(slot)
+            del self._index[(scope, normalized)]
+            self._live[slot] = False
+            self._free.append(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with size, hit/miss and eviction counts
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._slots),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity_threshold": self.threshold,
+                "hits": self.hits,
+                "exact_hits": self.exact_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def create_response_cache() -> Optional[SemanticResponseCache]:
+    """
+    Build the LLM response cache if LLM_CACHE_ENABLED is set and NumPy is installed
+
+    Returns:
+        A SemanticResponseCache, or None when caching is off
+    """
+    if os.getenv("LLM_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    if not NUMPY_AVAILABLE:
+        logger.warning("LLM_CACHE_ENABLED is set but numpy is not installed; LLM responses will not be cached")
+        return None
+    return SemanticResponseCache()
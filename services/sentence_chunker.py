@@ -0,0 +1,53 @@
+import re
+from typing import List
+
+# End of a sentence: terminal punctuation (optionally closed by a quote/bracket)
+# followed by whitespace, a paragraph break, or a line break before a list item.
+_BOUNDARY = re.compile(r"""(?<=[.!?])["')\]]*\s+|\n\s*\n|\n(?=\s*(?:[-*•]|\d+\.)\s)""")
+
+# Short tokens that end in a period but don't end a sentence
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "e.g.", "i.e.", "no.", "a.m.", "p.m."}
+
+
+class SentenceChunker:
+    """Incrementally splits a streamed LLM reply into sentences ready for TTS"""
+
+    def __init__(self, min_length: int = 20):
+        # Sentences shorter than this are held back and merged with the next one,
+        # so we don't spend a TTS round trip on "Sure." on its own
+        self.min_length = min_length
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text and return any sentences it completed
+
+        Args:
+            text: Next chunk of the LLM reply
+
+        Returns:
+            List of complete sentences (possibly empty)
+        """
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            last_word = candidate.rsplit(None, 1)[-1].lower() if candidate else ""
+            if last_word in _ABBREVIATIONS or len(candidate) < self.min_length:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """
+        Return whatever text remains once the stream has ended
+
+        Returns:
+            List containing the trailing sentence, or empty if nothing is left
+        """
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
@@ -0,0 +1,381 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """Open a connection for one thread; WAL lets readers and a writer work concurrently"""
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+@dataclass
+class SessionHistory:
+    """A session's stored messages plus the running summary of its older turns"""
+
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    # Increases with every append to the session; 0 for unknown or expired sessions
+    revision: int = 0
+    # Messages appended before messages[0] that max_messages has since dropped
+    offset: int = 0
+    summary: Optional[str] = None
+    # How many of the session's messages, counted from its first, the summary covers
+    summary_covers: int = 0
+
+
+class SessionStore(ABC):
+    """
+    Bounded store of chat histories keyed by session_id.
+
+    Sessions expire after idle_ttl seconds without access, the least recently
+    used session is evicted once max_sessions is reached, and each session
+    keeps at most max_messages of its most recent messages. A session can also
+    hold a summary of its older messages, so that a worker rebuilding the
+    prompt from the store does not have to summarize them again.
+    """
+
+    # Whether calls do blocking I/O and must be run off the event loop
+    blocking = False
+
+    def __init__(
+        self,
+        idle_ttl: Optional[float] = None,
+        max_sessions: Optional[int] = None,
+        max_messages: Optional[int] = None
+    ):
+        self.idle_ttl = idle_ttl or float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600"))
+        self.max_sessions = max_sessions or int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+        self.max_messages = max_messages or int(os.getenv("SESSION_MAX_MESSAGES", "200"))
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> List[Dict[str, str]]:
+        """Get a session's messages (empty if unknown or expired)"""
+        return self.get_history(session_id).messages
+
+    def get_with_revision(self, session_id: str) -> Tuple[List[Dict[str, str]], int]:
+        """Get a session's messages together with its revision"""
+        history = self.get_history(session_id)
+        return history.messages, history.revision
+
+    @abstractmethod
+    def get_history(self, session_id: str) -> SessionHistory:
+        """
+        Get a session's messages, revision and summary
+
+        The revision increases with every append to the session (from any
+        worker), so callers can tell whether something they derived from the
+        history is still current. It is 0 for unknown or expired sessions.
+        """
+
+    @abstractmethod
+    def append(self, session_id: str, message: Dict[str, str]) -> int:
+        """Append a message, creating the session if needed; returns the new revision"""
+
+    @abstractmethod
+    def save_summary(self, session_id: str, summary: str, covers: int) -> bool:
+        """
+        Store the summary of a session's first `covers` messages
+
+        Ignored (returns False) if the session is gone or already has a summary
+        covering at least as many messages, e.g. one saved by another worker.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Delete a session; returns True if it existed"""
+
+    @abstractmethod
+    def list_sessions(self) -> List[str]:
+        """List live (non-expired) session IDs"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Get store size and eviction counters"""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local session store; fastest, but not shared between workers"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # session_id -> [messages, last_access, revision, appended, summary, summary_covers],
+        # ordered least recently used first
+        self._sessions: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._revision = 0
+
+    def _expire(self, now: float) -> None:
+        # Caller holds the lock. LRU order is last-access order, so expired
+        # sessions are always at the front.
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if now - entry[1] < self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self.expirations += 1
+
+    def get_history(self, session_id: str) -> SessionHistory:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return SessionHistory()
+            entry[1] = now
+            self._sessions.move_to_end(session_id)
+            messages, _, revision, appended, summary, summary_covers = entry
+            return SessionHistory(list(messages), revision, appended - len(messages), summary, summary_covers)
+
+    def append(self, session_id: str, message: Dict[str, str]) -> int:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                if len(self._sessions) >= self.max_sessions:
+                    evicted_id, _ = self._sessions.popitem(last=False)
+                    self.evictions += 1
+                    logger.info(f"Evicted least recently used chat session: {evicted_id}")
+                entry = [[], now, 0, 0, None, 0]
+                self._sessions[session_id] = entry
+                logger.info(f"Created new chat session: {session_id}")
+
+            messages = entry[0]
+            messages.append(message)
+            if len(messages) > self.max_messages:
+                del messages[:len(messages) - self.max_messages]
+            entry[1] = now
+            # Store-wide counter, so a recreated session never reuses an old revision
+            self._revision += 1
+            entry[2] = self._revision
+            entry[3] += 1
+            self._sessions.move_to_end(session_id)
+            return entry[2]
+
+    def save_summary(self, session_id: str, summary: str, covers: int) -> bool:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or covers <= entry[5]:
+                return False
+            entry[4], entry[5] = summary, covers
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def list_sessions(self) -> List[str]:
+        with self._lock:
+            self._expire(time.time())
+            return list(self._sessions.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    File-backed session store that several worker processes on one host can share
+
+    Every call does blocking file I/O and may wait up to 10 s for another
+    worker's write lock, so callers run it off the event loop (blocking =
+    True). Idle sessions are hidden from reads as soon as they expire and
+    deleted by a background thread every SESSION_EXPIRE_INTERVAL_SECONDS.
+    """
+
+    blocking = True
+
+    def __init__(self, path: Optional[str] = None, expire_interval: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path or os.getenv("SESSION_DB_PATH", "sessions.db")
+        self.expire_interval = expire_interval or float(os.getenv("SESSION_EXPIRE_INTERVAL_SECONDS", "60"))
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    last_access REAL NOT NULL,
+                    appended INTEGER NOT NULL DEFAULT 0,
+                    summary TEXT,
+                    summary_covers INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+                    role TEXT NOT NULL,
+                    text TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+                """
+            )
+            # Databases created before summaries were stored lack these columns
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+            for column, definition in (
+                ("appended", "INTEGER NOT NULL DEFAULT 0"),
+                ("summary", "TEXT"),
+                ("summary_covers", "INTEGER NOT NULL DEFAULT 0"),
+            ):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} {definition}")
+        self._stopped = threading.Event()
+        self._expirer = threading.Thread(target=self._expire_loop, name="session-expiry", daemon=True)
+        self._expirer.start()
+        logger.info(f"SQLiteSessionStore using {self.path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def _expire_loop(self) -> None:
+        while not self._stopped.wait(self.expire_interval):
+            try:
+                self.expire()
+            except Exception as e:
+                logger.warning(f"Session expiry sweep failed: {str(e)}")
+
+    def expire(self) -> int:
+        """Delete sessions idle for longer than idle_ttl; returns how many were removed"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE last_access <= ?", (time.time() - self.idle_ttl,))
+        self.expirations += cursor.rowcount
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Stop the background expiry sweep"""
+        self._stopped.set()
+
+    def get_history(self, session_id: str) -> SessionHistory:
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Expired rows may still be waiting for the sweep; treat them as gone
+            cursor = conn.execute(
+                "UPDATE sessions SET last_access = ? WHERE session_id = ? AND last_access > ?",
+                (now, session_id, now - self.idle_ttl)
+            )
+            if cursor.rowcount == 0:
+                return SessionHistory()
+            appended, summary, summary_covers = conn.execute(
+                "SELECT appended, summary, summary_covers FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT id, role, text FROM messages WHERE session_id = ? ORDER BY id", (session_id,)
+            ).fetchall()
+        # Message ids are AUTOINCREMENT, so the newest id doubles as the revision
+        revision = rows[-1][0] if rows else 0
+        messages = [{"role": role, "text": text} for _, role, text in rows]
+        return SessionHistory(messages, revision, max(appended - len(messages), 0), summary, summary_covers)
+
+    def append(self, session_id: str, message: Dict[str, str]) -> int:
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE sessions SET last_access = ?, appended = appended + 1 WHERE session_id = ? AND last_access > ?",
+                (now, session_id, now - self.idle_ttl)
+            )
+            if cursor.rowcount == 0:
+                # Drop an expired copy the sweep has not reached yet before starting afresh
+                cursor = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self.expirations += cursor.rowcount
+                (count,) = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+                if count >= self.max_sessions:
+                    conn.execute(
+                        "DELETE FROM sessions WHERE session_id IN "
+                        "(SELECT session_id FROM sessions ORDER BY last_access LIMIT ?)",
+                        (count - self.max_sessions + 1,)
+                    )
+                    self.evictions += count - self.max_sessions + 1
+                conn.execute(
+                    "INSERT INTO sessions (session_id, last_access, appended) VALUES (?, ?, 1)", (session_id, now)
+                )
+                logger.info(f"Created new chat session: {session_id}")
+
+            cursor = conn.execute(
+                "INSERT INTO messages (session_id, role, text) VALUES (?, ?, ?)",
+                (session_id, message["role"], message["text"])
+            )
+            revision = cursor.lastrowid
+            conn.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id NOT IN "
+                "(SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, session_id, self.max_messages)
+            )
+        return revision
+
+    def save_summary(self, session_id: str, summary: str, covers: int) -> bool:
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE sessions SET summary = ?, summary_covers = ? "
+                "WHERE session_id = ? AND summary_covers < ? AND last_access > ?",
+                (summary, covers, session_id, covers, time.time() - self.idle_ttl)
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, session_id: str) -> bool:
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def list_sessions(self) -> List[str]:
+        rows = self._connect().execute(
+            "SELECT session_id FROM sessions WHERE last_access > ? ORDER BY last_access",
+            (time.time() - self.idle_ttl,)
+        ).fetchall()
+        return [session_id for (session_id,) in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        (count,) = self._connect().execute(
+            "SELECT COUNT(*) FROM sessions WHERE last_access > ?", (time.time() - self.idle_ttl,)
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "sessions": count,
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def create_session_store() -> SessionStore:
+    """
+    Build the session store selected by SESSION_STORE ('memory' or 'sqlite')
+
+    Returns:
+        A SessionStore instance
+    """
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend != "memory":
+        logger.warning(f"Unknown SESSION_STORE '{backend}', using in-memory store")
+    return InMemorySessionStore()
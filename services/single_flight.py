@@ -0,0 +1,120 @@
+import os
+import asyncio
+import hashlib
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+from services.deadline import with_deadline
+from services.telemetry import registry, request_id_var
+
+logger = logging.getLogger(__name__)
+
+single_flight_calls = registry.counter(
+    "voice_agent_single_flight_calls_total", "Calls through a single-flight group, by whether they started or joined the upstream call"
+)
+single_flight_cancelled = registry.counter(
+    "voice_agent_single_flight_cancelled_total", "Upstream calls cancelled because every waiter went away"
+)
+
+
+def flight_key(*parts: str) -> str:
+    """Hash of the request parts, with runs of whitespace collapsed"""
+    material = "\x1f".join(" ".join(part.split()) for part in parts)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls onto one upstream call.
+
+    The first caller for a key starts the call as its own task; callers that
+    arrive while it is in flight wait on the same task and get the same result
+    (or exception). A caller that is cancelled, e.g. because its client
+    disconnected, only stops waiting: the upstream call keeps running for the
+    others and is cancelled only once nobody is waiting for it. Finished calls
+    are forgotten immediately, so this never serves stale results.
+
+    The shared task runs in a fresh context, so it does not inherit the first
+    caller's deadline or request timings. Each caller's own deadline bounds
+    only its wait.
+    """
+
+    def __init__(self, name: str, enabled: Optional[bool] = None):
+        self.name = name
+        self.enabled = enabled if enabled is not None else os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+        self._flights: Dict[str, _Flight] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.cancelled = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func() once per key among concurrent callers
+
+        Args:
+            key: Identity of the request (callers must normalize it)
+            func: Zero-argument coroutine function performing the upstream call
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            DeadlineExceededError: If this caller's deadline passes first
+        """
+        if not self.enabled:
+            return await func()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            context = contextvars.Context()
+            context.run(request_id_var.set, request_id_var.get())
+            flight = _Flight(context.run(asyncio.get_running_loop().create_task, func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task, key=key, flight=flight: self._forget(key, flight))
+            self.leaders += 1
+            single_flight_calls.inc(group=self.name, role="leader")
+        else:
+            self.followers += 1
+            single_flight_calls.inc(group=self.name, role="follower")
+            logger.info(f"Coalesced {self.name} call onto in-flight request ({flight.waiters} already waiting)")
+
+        flight.waiters += 1
+        try:
+            # shield: cancelling this waiter must not cancel the shared task
+            return await with_deadline(self.name, asyncio.shield(flight.task))
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+                self.cancelled += 1
+                single_flight_cancelled.inc(group=self.name)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing counters
+
+        Returns:
+            Dictionary with in-flight, started, joined and cancelled counts
+        """
+        calls = self.leaders + self.followers
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "upstream_calls": self.leaders,
+            "coalesced_calls": self.followers,
+            "cancelled_upstream": self.cancelled,
+            "coalesced_ratio": round(self.followers / calls, 3) if calls else 0.0,
+        }
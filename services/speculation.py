@@ -0,0 +1,256 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from services.history import estimate_tokens
+from services.telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+# (prompt, fingerprint) for a hypothetical user turn; the fingerprint identifies the history it was built on
+PromptPreparer = Callable[[str], Tuple[str, Any]]
+ReplyStreamer = Callable[[str], AsyncIterator[str]]
+
+speculation_total = registry.counter(
+    "voice_agent_speculation_total", "Speculative LLM generations by outcome"
+)
+speculation_wasted_tokens = registry.counter(
+    "voice_agent_speculation_wasted_tokens_total", "Estimated tokens spent on discarded speculative generations"
+)
+speculation_head_start = registry.histogram(
+    "voice_agent_speculation_head_start_seconds", "How long a committed speculation ran before the final transcript"
+)
+
+
+def normalize_transcript(text: str) -> str:
+    """Compare transcripts ignoring case, punctuation and spacing (partials are unformatted)"""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+class SpeculationStats:
+    """Process-wide counters for speculative dispatch"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.hits = 0
+        # Discarded generations: final transcript differed, newer partial replaced it, turn abandoned
+        self.discarded = {"miss": 0, "superseded": 0, "abandoned": 0}
+        self.turns_without_speculation = 0
+        self.wasted_prompt_tokens = 0
+        self.wasted_completion_tokens = 0
+        self.head_start_seconds = 0.0
+
+    def record_start(self) -> None:
+        with self._lock:
+            self.started += 1
+
+    def record_hit(self, head_start: float) -> None:
+        with self._lock:
+            self.hits += 1
+            self.head_start_seconds += head_start
+        speculation_total.inc(outcome="hit")
+        speculation_head_start.observe(head_start)
+
+    def record_discard(self, outcome: str, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self.discarded[outcome] += 1
+            self.wasted_prompt_tokens += prompt_tokens
+            self.wasted_completion_tokens += completion_tokens
+        speculation_total.inc(outcome=outcome)
+        speculation_wasted_tokens.inc(prompt_tokens, kind="prompt")
+        speculation_wasted_tokens.inc(completion_tokens, kind="completion")
+
+    def record_no_speculation(self) -> None:
+        with self._lock:
+            self.turns_without_speculation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            claimed = self.hits + self.discarded["miss"]
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "misses": self.discarded["miss"],
+                "superseded": self.discarded["superseded"],
+                "abandoned": self.discarded["abandoned"],
+                "turns_without_speculation": self.turns_without_speculation,
+                "hit_rate": round(self.hits / claimed, 3) if claimed else 0.0,
+                "wasted_prompt_tokens": self.wasted_prompt_tokens,
+                "wasted_completion_tokens": self.wasted_completion_tokens,
+                "avg_head_start_seconds": round(self.head_start_seconds / self.hits, 3) if self.hits else 0.0,
+            }
+
+
+class SpeculativeGeneration:
+    """An LLM reply streamed in the background for a not-yet-final transcript"""
+
+    def __init__(self, text: str, prompt: str, fingerprint: Any, stream: AsyncIterator[str]):
+        self.text = text
+        self.normalized = normalize_transcript(text)
+        self.prompt = prompt
+        self.fingerprint = fingerprint
+        self.started_at = time.perf_counter()
+        self.chunks: List[str] = []
+        self.finished = False
+        self.error: Optional[str] = None
+        self._updated = asyncio.Event()
+        self._task = asyncio.create_task(self._run(stream))
+
+    async def _run(self, stream: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in stream:
+                self.chunks.append(chunk)
+                self._updated.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Speculative generation failed: {str(e)}")
+            self.error = str(e)
+        finally:
+            self.finished = True
+            self._updated.set()
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or (self.finished and not self.chunks)
+
+    @property
+    def completion_tokens(self) -> int:
+        return estimate_tokens("".join(self.chunks)) if self.chunks else 0
+
+    async def replay(self) -> AsyncIterator[str]:
+        """Yield the chunks produced so far, then the rest as they arrive"""
+        index = 0
+        while True:
+            if index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+                continue
+            if self.finished:
+                return
+            self._updated.clear()
+            await self._updated.wait()
+
+    def cancel(self) -> None:
+        if not self._task.done():
+            self._task.cancel()
+
+
+class SpeculativeTurn:
+    """
+    Starts the LLM on a user turn before its final transcript arrives.
+
+    Partial transcripts are fed to observe(). Once a partial is stable (the same
+    text for stable_updates consecutive partials, or no new partial for
+    pause_seconds), a reply is generated for it in the background. A newer stable
+    partial replaces that generation. When the final transcript arrives, claim()
+    hands back the generation if it was made from the same words and the same
+    history, and discards it otherwise.
+    """
+
+    def __init__(
+        self,
+        prepare: PromptPreparer,
+        stream: ReplyStreamer,
+        stats: SpeculationStats,
+        stable_updates: Optional[int] = None,
+        pause_seconds: Optional[float] = None
+    ):
+        self.prepare = prepare
+        self.stream = stream
+        self.stats = stats
+        self.stable_updates = stable_updates or int(os.getenv("SPECULATION_STABLE_UPDATES", "3"))
+        self.pause_seconds = pause_seconds or float(os.getenv("SPECULATION_PAUSE_MS", "400")) / 1000
+        self._last_text = ""
+        self._last_normalized = ""
+        self._repeats = 0
+        self._pause_timer: Optional[asyncio.TimerHandle] = None
+        self._current: Optional[SpeculativeGeneration] = None
+
+    def observe(self, text: str) -> None:
+        """Feed one partial transcript"""
+        normalized = normalize_transcript(text)
+        if not normalized:
+            return
+        if normalized == self._last_normalized:
+            self._repeats += 1
+        else:
+            self._last_text, self._last_normalized, self._repeats = text, normalized, 1
+
+        if self._pause_timer:
+            self._pause_timer.cancel()
+        self._pause_timer = asyncio.get_running_loop().call_later(self.pause_seconds, self._on_pause)
+
+        if self._repeats >= self.stable_updates:
+            self._speculate(self._last_text)
+
+    def _on_pause(self) -> None:
+        self._pause_timer = None
+        if self._last_text:
+            self._speculate(self._last_text)
+
+    def _discard(self, generation: SpeculativeGeneration, outcome: str) -> None:
+        generation.cancel()
+        self.stats.record_discard(outcome, estimate_tokens(generation.prompt), generation.completion_tokens)
+
+    def _speculate(self, text: str) -> None:
+        if self._current is not None:
+            if self._current.normalized == normalize_transcript(text):
+                return
+            self._discard(self._current, "superseded")
+            self._current = None
+
+        try:
+            prompt, fingerprint = self.prepare(text)
+        except Exception as e:
+            logger.error(f"Could not prepare speculative prompt: {str(e)}")
+            return
+        self._current = SpeculativeGeneration(text, prompt, fingerprint, self.stream(prompt))
+        self.stats.record_start()
+        logger.info(f"Speculatively generating a reply for: {text[:100]}")
+
+    def claim(self, final_text: str, fingerprint: Any) -> Optional[SpeculativeGeneration]:
+        """
+        Take the speculative generation for the final transcript, if it still applies
+
+        Args:
+            final_text: The final transcript of the user turn
+            fingerprint: Fingerprint of the history the reply will be generated from
+
+        Returns:
+            The generation to replay, or None if the reply must be generated afresh
+        """
+        self._stop_timer()
+        generation, self._current = self._current, None
+        if generation is None:
+            self.stats.record_no_speculation()
+            return None
+
+        if (
+            generation.normalized == normalize_transcript(final_text)
+            and generation.fingerprint == fingerprint
+            and not generation.failed
+        ):
+            self.stats.record_hit(time.perf_counter() - generation.started_at)
+            logger.info("Speculative reply committed")
+            return generation
+
+        self._discard(generation, "miss")
+        logger.info("Speculative reply discarded: final transcript differs")
+        return None
+
+    def cancel(self) -> None:
+        """Abandon the turn (e.g. disconnect or failed transcription)"""
+        self._stop_timer()
+        if self._current is not None:
+            self._discard(self._current, "abandoned")
+            self._current = None
+
+    def _stop_timer(self) -> None:
+        if self._pause_timer:
+            self._pause_timer.cancel()
+            self._pause_timer = None
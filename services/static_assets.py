@@ -0,0 +1,314 @@
+import os
+import gzip
+import json
+import hashlib
+import logging
+import mimetypes
+import tempfile
+import threading
+from typing import Any, Dict, List, Mapping, Optional
+from services.file_response import IMMUTABLE_CACHE_CONTROL, CachedFileResponse, etag_matches
+from services.telemetry import registry
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+static_responses_total = registry.counter(
+    "voice_agent_static_responses_total", "Static asset responses by content encoding and status"
+)
+
+MANIFEST_NAME = "manifest.json"
+
+# Precompressed encodings, in order of preference when the client accepts several equally
+ENCODINGS = ("br", "gzip")
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Unhashed names (the VAD worklet is loaded by a fixed URL) are revalidated on every use
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "image/vnd.microsoft.icon")
+
+# A compressed copy is only kept when it is at least this much smaller
+MIN_SAVING = 0.05
+
+
+def media_type_for(name: str) -> str:
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """style.css -> style.<first 12 hex digits of the SHA-256>.css"""
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest[:12]}{ext}"
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    # mtime=0 keeps the output identical between builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Mapping[str, Any]) -> str:
+    """
+    Pick the content encoding to send from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Value of the request's Accept-Encoding header
+        available: Encodings that have a precompressed copy
+
+    Returns:
+        "br", "gzip" or "identity"
+    """
+    if not accept_encoding or not available:
+        return "identity"
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, *params = (piece.strip() for piece in part.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            weights[name.lower()] = quality
+
+    best, best_quality = "identity", 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def source_files(source_dir: str) -> List[str]:
+    """Relative paths (with forward slashes) of every non-hidden file under source_dir"""
+    names = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for filename in files:
+            if not filename.startswith("."):
+                path = os.path.join(root, filename)
+                names.append(os.path.relpath(path, source_dir).replace(os.sep, "/"))
+    return sorted(names)
+
+
+def _write(build_dir: str, name: str, data: bytes) -> None:
+    path = os.path.join(build_dir, *name.split("/"))
+    if os.path.exists(path) and name != MANIFEST_NAME:
+        # Named by content hash: an existing file already holds these bytes
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+def build_assets(source_dir: str = "static", build_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fingerprint and precompress every file under source_dir
+
+    Each file is copied to a content-hashed name with gzip and (when the brotli
+    package is installed) brotli copies next to it; manifest.json maps the
+    original names to them. Files left over from earlier builds are removed.
+
+    Args:
+        source_dir: Directory of the source assets
+        build_dir: Output directory (defaults to STATIC_BUILD_DIR)
+
+    Returns:
+        The manifest
+    """
+    build_dir = build_dir or os.getenv("STATIC_BUILD_DIR", os.path.join(".cache", "static"))
+    assets = {}
+    for name in source_files(source_dir):
+        path = os.path.join(source_dir, *name.split("/"))
+        with open(path, "rb") as f:
+            data = f.read()
+        stat = os.stat(path)
+        digest = hashlib.sha256(data).hexdigest()
+        target = hashed_name(name, digest)
+        media_type = media_type_for(name)
+        _write(build_dir, target, data)
+
+        encodings = {}
+        if media_type.startswith(COMPRESSIBLE_TYPES):
+            for encoding in ENCODINGS:
+                if encoding == "br" and not BROTLI_AVAILABLE:
+                    continue
+                compressed = compress(data, encoding)
+                if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                    _write(build_dir, target + ENCODING_SUFFIXES[encoding], compressed)
+                    encodings[encoding] = len(compressed)
+
+        assets[name] = {
+            "file": target,
+            "digest": digest,
+            "media_type": media_type,
+            "size": len(data),
+            "encodings": encodings,
+            "source": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+        }
+
+    manifest = {"brotli": BROTLI_AVAILABLE, "assets": assets}
+    _write(build_dir, MANIFEST_NAME, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    keep = {MANIFEST_NAME}
+    for entry in assets.values():
+        keep.add(entry["file"])
+        keep.update(entry["file"] + ENCODING_SUFFIXES[encoding] for encoding in entry["encodings"])
+    for name in source_files(build_dir):
+        if name not in keep and not name.endswith(".tmp"):
+            os.unlink(os.path.join(build_dir, *name.split("/")))
+
+    logger.info(f"Built {len(assets)} static assets into {build_dir} (brotli {'on' if BROTLI_AVAILABLE else 'off'})")
+    return manifest
+
+
+class StaticAssets:
+    """
+    Serves the web UI's static files from the build_assets() output
+
+    Templates link to content-hashed names through asset_url(), which are
+    cached for a year as immutable. Plain names still resolve, but are
+    revalidated on each use. Either way the response is the precompressed
+    copy that best matches Accept-Encoding, with a strong ETag per encoding,
+    so an unchanged file costs a 304 without opening it. The manifest is
+    loaded on first use and rebuilt when the sources no longer match it, so
+    running the build step ahead of time only saves the work at startup.
+    """
+
+    url_prefix = "/static/"
+
+    def __init__(self, source_dir: str = "static", build_dir: Optional[str] = None):
+        self.source_dir = source_dir
+        self.build_dir = build_dir or os.getenv("STATIC_BUILD_DIR", os.path.join(".cache", "static"))
+        self._assets: Optional[Dict[str, Dict[str, Any]]] = None
+        # Hashed file name -> original name
+        self._by_file: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.built_at_startup = False
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the asset manifest, building it first if it is missing or stale
+
+        Returns:
+            Original name -> asset entry
+        """
+        if self._assets is not None:
+            return self._assets
+        with self._lock:
+            if self._assets is None:
+                manifest = self._read_manifest()
+                if manifest is None or self._stale(manifest):
+                    manifest = build_assets(self.source_dir, self.build_dir)
+                    self.built_at_startup = True
+                self._by_file = {entry["file"]: name for name, entry in manifest["assets"].items()}
+                self._assets = manifest["assets"]
+        return self._assets
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _stale(self, manifest: Dict[str, Any]) -> bool:
+        assets = manifest.get("assets", {})
+        if manifest.get("brotli") != BROTLI_AVAILABLE or sorted(assets) != source_files(self.source_dir):
+            return True
+        for name, entry in assets.items():
+            stat = os.stat(os.path.join(self.source_dir, *name.split("/")))
+            if entry["source"] != {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}:
+                return True
+            if not os.path.exists(os.path.join(self.build_dir, *entry["file"].split("/"))):
+                return True
+        return False
+
+    def url(self, name: str) -> str:
+        """URL of an asset under its content-hashed name (used as asset_url() in templates)"""
+        entry = self.load().get(name)
+        if entry is None:
+            logger.warning(f"Unknown static asset: {name}")
+            return self.url_prefix + name
+        return self.url_prefix + entry["file"]
+
+    def response(self, path: str, request_headers: Mapping[str, str]) -> Optional[CachedFileResponse]:
+        """
+        Build the response for a request under /static/
+
+        Args:
+            path: Path after /static/, hashed or original name
+            request_headers: Headers of the request
+
+        Returns:
+            The response, or None if there is no such asset
+        """
+        assets = self.load()
+        hashed = path in self._by_file
+        entry = assets.get(self._by_file[path]) if hashed else assets.get(path)
+        if entry is None:
+            return None
+
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"), entry["encodings"])
+        file = entry["file"]
+        etag = entry["digest"][:32]
+        headers = {}
+        if entry["encodings"]:
+            headers["vary"] = "Accept-Encoding"
+        if encoding != "identity":
+            file += ENCODING_SUFFIXES[encoding]
+            etag += f"-{encoding}"
+            headers["content-encoding"] = encoding
+        etag = f'"{etag}"'
+
+        not_modified = etag_matches(request_headers.get("if-none-match"), etag)
+        static_responses_total.inc(encoding=encoding, status="not_modified" if not_modified else "ok")
+        return CachedFileResponse(
+            os.path.join(self.build_dir, *file.split("/")),
+            etag=etag,
+            media_type=entry["media_type"],
+            cache_control=IMMUTABLE_CACHE_CONTROL if hashed else REVALIDATE_CACHE_CONTROL,
+            headers=headers
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the built assets and their compressed sizes
+
+        Returns:
+            Dictionary with the build directory, whether brotli is available and per-asset sizes
+        """
+        assets = self.load()
+        return {
+            "build_dir": self.build_dir,
+            "brotli": BROTLI_AVAILABLE,
+            "built_at_startup": self.built_at_startup,
+            "assets": {
+                name: {"file": entry["file"], "size": entry["size"], "encodings": dict(entry["encodings"])}
+                for name, entry in assets.items()
+            },
+        }
+
+
+static_assets = StaticAssets()
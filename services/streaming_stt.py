@@ -0,0 +1,250 @@
+import os
+import queue
+import asyncio
+import logging
+import threading
+import concurrent.futures
+import assemblyai as aai
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from services.executor import ProviderExecutor, provider_executor
+from services.concurrency import ProviderOverloadedError
+from services.deadline import with_deadline
+from services.resilience import ProviderGuard, provider_guard
+from services.telemetry import traced
+
+logger = logging.getLogger(__name__)
+
+# Container formats (what MediaRecorder produces) vs raw PCM for the realtime API
+PCM_ENCODING = "pcm_s16le"
+
+
+class StreamingTranscriptionSession(ABC):
+    """
+    One utterance of audio arriving in chunks, transcribed while it is still being recorded
+
+    Upstream calls go through the provider guard like STTService's: circuit
+    breaker, concurrency limit and request deadline.
+    """
+
+    def __init__(self, executor: ProviderExecutor, guard: Optional[ProviderGuard] = None):
+        self.executor = executor
+        self.guard = guard or provider_guard
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.bytes_received = 0
+
+    @abstractmethod
+    async def start(self) -> None:
+        """
+        Open the upstream connection
+
+        Raises:
+            ProviderOverloadedError: If STT is shed or its circuit is open
+        """
+
+    @abstractmethod
+    async def send_audio(self, chunk: bytes) -> None:
+        """Forward one chunk of audio upstream"""
+
+    @abstractmethod
+    async def finish(self) -> Dict[str, Any]:
+        """
+        Signal end of speech and wait for the final transcript
+
+        Returns:
+            Dict in the same shape as STTService.transcribe_audio
+        """
+
+    async def partials(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield partial transcript events that have arrived so far, without waiting"""
+        while not self.events.empty():
+            yield self.events.get_nowait()
+
+    async def abort(self) -> None:
+        """Tear down the session without waiting for a transcript"""
+
+
+class UploadStreamingSession(StreamingTranscriptionSession):
+    """
+    Streams container audio (e.g. webm/opus) into an AssemblyAI upload while the user speaks.
+
+    The upload finishes as soon as the last chunk arrives, so only the transcription
+    itself remains once the user stops talking. No partial transcripts are produced.
+    The upload blocks for as long as the user speaks, so it runs on a thread of its own
+    rather than holding one of the STT pool's workers.
+    """
+
+    _END = object()
+
+    def __init__(self, transcriber: aai.Transcriber, executor: ProviderExecutor, guard: Optional[ProviderGuard] = None):
+        super().__init__(executor, guard)
+        self.transcriber = transcriber
+        self._chunks: "queue.Queue[Any]" = queue.Queue()
+        self._upload: Optional[asyncio.Future] = None
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        while True:
+            chunk = self._chunks.get()
+            if chunk is self._END:
+                return
+            yield chunk
+
+    def _run_upload(self, result: concurrent.futures.Future) -> None:
+        if not result.set_running_or_notify_cancel():
+            return
+        try:
+            result.set_result(self.transcriber.upload_file(self._iter_chunks()))
+        except BaseException as e:
+            result.set_exception(e)
+
+    async def start(self) -> None:
+        # Nothing to guard yet: the upload runs for as long as the user speaks, so only
+        # the transcription in finish() is a latency sample for the limiter
+        result: concurrent.futures.Future = concurrent.futures.Future()
+        threading.Thread(target=self._run_upload, args=(result,), name="stt-stream-upload", daemon=True).start()
+        self._upload = asyncio.wrap_future(result)
+
+    async def send_audio(self, chunk: bytes) -> None:
+        self.bytes_received += len(chunk)
+        self._chunks.put(chunk)
+
+    @traced("stt.stream_finish", provider="assemblyai")
+    async def finish(self) -> Dict[str, Any]:
+        self._chunks.put(self._END)
+        try:
+            upload_url = await self._upload
+            async with self.guard.call("stt"):
+                transcript = await with_deadline("stt", self.executor.run("stt", self.transcriber.transcribe, upload_url))
+        except ProviderOverloadedError as e:
+            logger.warning(f"Streamed transcription shed: {str(e)}")
+            return {"success": False, "error": str(e), "text": None}
+        except Exception as e:
+            logger.error(f"Error during streamed transcription: {str(e)}")
+            return {"success": False, "error": str(e), "text": None}
+
+        if transcript.status == aai.TranscriptStatus.error:
+            logger.error(f"Transcription failed: {transcript.error}")
+            return {"success": False, "error": f"Transcription failed: {transcript.error}", "text": None}
+
+        transcribed_text = getattr(transcript, "text", "")
+        if not transcribed_text:
+            return {"success": False, "error": "Transcription returned empty text", "text": None}
+
+        return {
+            "success": True,
+            "text": transcribed_text,
+            "confidence": getattr(transcript, "confidence", None),
+            "error": None
+        }
+
+    async def abort(self) -> None:
+        self._chunks.put(self._END)
+        if self._upload is not None:
+            # Nobody will await the upload any more; swallow its outcome
+            self._upload.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+class RealtimeStreamingSession(StreamingTranscriptionSession):
+    """Feeds raw PCM16 audio to AssemblyAI's realtime API, producing partial and final transcripts"""
+
+    def __init__(self, sample_rate: int, executor: ProviderExecutor, guard: Optional[ProviderGuard] = None):
+        super().__init__(executor, guard)
+        self.sample_rate = sample_rate
+        self._loop = asyncio.get_running_loop()
+        self._finals: List[str] = []
+        self._error: Optional[str] = None
+        self.transcriber = aai.RealtimeTranscriber(
+            sample_rate=sample_rate,
+            encoding=aai.AudioEncoding.pcm_s16le,
+            on_data=self._on_data,
+            on_error=self._on_error,
+        )
+
+    def _on_data(self, transcript: aai.RealtimeTranscript) -> None:
+        # Called on the SDK's reader thread
+        if not transcript.text:
+            return
+        if isinstance(transcript, aai.RealtimeFinalTranscript):
+            self._finals.append(transcript.text)
+        else:
+            self._loop.call_soon_threadsafe(
+                self.events.put_nowait, {"type": "partial", "text": " ".join(self._finals + [transcript.text])}
+            )
+
+    def _on_error(self, error: aai.RealtimeError) -> None:
+        logger.error(f"Realtime transcription error: {error}")
+        self._error = str(error)
+
+    async def start(self) -> None:
+        async with self.guard.call("stt"):
+            await with_deadline("stt", self.executor.run("stt", self.transcriber.connect))
+
+    async def send_audio(self, chunk: bytes) -> None:
+        self.bytes_received += len(chunk)
+        # Only queues the chunk for the SDK's writer thread, so it is safe to call on the loop
+        self.transcriber.stream(chunk)
+
+    @traced("stt.stream_finish", provider="assemblyai")
+    async def finish(self) -> Dict[str, Any]:
+        try:
+            # close() flushes the session and waits for outstanding final transcripts
+            async with self.guard.call("stt"):
+                await with_deadline("stt", self.executor.run("stt", self.transcriber.close))
+        except ProviderOverloadedError as e:
+            logger.warning(f"Realtime transcription shed: {str(e)}")
+            await self.abort()
+            return {"success": False, "error": str(e), "text": None}
+        except Exception as e:
+            logger.error(f"Error closing realtime transcription: {str(e)}")
+            return {"success": False, "error": str(e), "text": None}
+
+        text = " ".join(self._finals).strip()
+        if not text:
+            return {"success": False, "error": self._error or "Transcription returned empty text", "text": None}
+        return {"success": True, "text": text, "confidence": None, "error": None}
+
+    async def abort(self) -> None:
+        try:
+            await self.executor.run("stt", self.transcriber.close)
+        except Exception as e:
+            logger.warning(f"Error aborting realtime transcription: {str(e)}")
+
+
+class StreamingSTTService:
+    """Streaming counterpart of STTService for audio that arrives in chunks"""
+
+    def __init__(self, executor: Optional[ProviderExecutor] = None, guard: Optional[ProviderGuard] = None):
+        self.api_key = os.getenv("ASSEMBLYAI_API_KEY")
+        if not self.api_key:
+            logger.error("ASSEMBLYAI_API_KEY not found in environment variables")
+            raise ValueError("ASSEMBLYAI_API_KEY not configured")
+
+        aai.settings.api_key = self.api_key
+        self.transcriber = aai.Transcriber()
+        self.executor = executor or provider_executor
+        # Circuit breaker, request deadline and concurrency limit shared with STTService
+        self.guard = guard or provider_guard
+        logger.info("StreamingSTTService initialized successfully")
+
+    async def open_session(self, encoding: str = "webm", sample_rate: int = 16000) -> StreamingTranscriptionSession:
+        """
+        Start a streaming transcription session for one utterance
+
+        Args:
+            encoding: 'pcm_s16le' for raw PCM (partial transcripts), anything else
+                is treated as a container format such as webm
+            sample_rate: Sample rate of PCM audio
+
+        Returns:
+            An opened StreamingTranscriptionSession
+            
+        Raises:
+            ProviderOverloadedError: If STT is shed or its circuit is open
+        """
+        if encoding == PCM_ENCODING:
+            session: StreamingTranscriptionSession = RealtimeStreamingSession(sample_rate, self.executor, self.guard)
+        else:
+            session = UploadStreamingSession(self.transcriber, self.executor, self.guard)
+        await session.start()
+        logger.info(f"Opened streaming transcription session ({encoding})")
+        return session
@@ -1,8 +1,14 @@
 import os
 import logging
 import assemblyai as aai
-from typing import Dict, Any
+from typing import BinaryIO, Dict, Any, Optional, Union
 from schemas import TranscriptionResult
+from services.executor import ProviderExecutor, provider_executor
+from services.concurrency import ProviderOverloadedError
+from services.deadline import with_deadline
+from services.resilience import ProviderGuard, provider_guard
+from services.audio_preprocessing import AudioPreprocessor, create_audio_preprocessor
+from services.telemetry import mark_span_error, span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +16,12 @@ logger = logging.getLogger(__name__)
 class STTService:
     """Service for handling Speech-to-Text operations using AssemblyAI"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        executor: Optional[ProviderExecutor] = None,
+        preprocessor: Optional[AudioPreprocessor] = None,
+        guard: Optional[ProviderGuard] = None
+    ):
         self.api_key = os.getenv("ASSEMBLYAI_API_KEY")
         if not self.api_key:
             logger.error("ASSEMBLYAI_API_KEY not found in environment variables")
@@ -18,23 +29,43 @@ class STTService:
         
         aai.settings.api_key = self.api_key
         self.transcriber = aai.Transcriber()
+        self.executor = executor or provider_executor
+        # Circuit breaker, request deadline and concurrency limit for each upstream call
+        self.guard = guard or provider_guard
+        # Optional silence trimming / resampling in front of the upload (AUDIO_PREPROCESSING_ENABLED)
+        self.preprocessor = preprocessor or create_audio_preprocessor()
         logger.info("STTService initialized successfully")
 
-    async def transcribe_audio(self, audio_data: bytes) -> Dict[str, Any]:
+    async def warm_up(self) -> None:
+        """Open the AssemblyAI SDK's connection so the first upload doesn't pay for DNS and TLS"""
+        http_client = aai.Client.get_default().http_client
+        await self.executor.run("stt", http_client.head, "/")
+
+    @traced("stt.transcribe", provider="assemblyai")
+    async def transcribe_audio(self, audio_data: Union[bytes, BinaryIO, str]) -> Dict[str, Any]:
         """
         Transcribe audio data to text using AssemblyAI
         
+        A file object is uploaded in chunks straight from disk (or the spooled
+        upload), so large recordings never have to be held in memory.
+        
         Args:
-            audio_data: Raw audio bytes
+            audio_data: Raw audio bytes, a binary file object positioned at the start, or
+                an http(s) URL that AssemblyAI downloads itself
             
         Returns:
             Dict containing success status, transcribed text, and optional error
+            
+        Raises:
+            ProviderOverloadedError: If the call was shed (AssemblyAI overloaded or its circuit open)
         """
         try:
             logger.info("Starting audio transcription")
             
+            is_url = isinstance(audio_data, str) and audio_data.startswith(("http://", "https://"))
+            
             # Handle potential encoding issues with audio data
-            if isinstance(audio_data, str):
+            if isinstance(audio_data, str) and not is_url:
                 try:
                     audio_data = audio_data.encode('utf-8')
                 except Exception as encoding_error:
@@ -45,11 +76,20 @@ class STTService:
                         "text": None
                     }
             
-            # Transcribe using AssemblyAI
-            transcript = self.transcriber.transcribe(audio_data)
+            preprocessing = None
+            if self.preprocessor and not is_url:
+                with span("stt.preprocess"):
+                    processed = await self.executor.run("stt", self.preprocessor.process, audio_data)
+                audio_data = processed.audio
+                preprocessing = processed.report()
+            
+            # Transcribe using AssemblyAI (blocking SDK call, run off the event loop)
+            async with self.guard.call("stt"):
+                transcript = await with_deadline("stt", self.executor.run("stt", self.transcriber.transcribe, audio_data))
             
             if transcript.status == aai.TranscriptStatus.error:
                 logger.error(f"Transcription failed: {transcript.error}")
+                mark_span_error("transcription_error")
                 return {
                     "success": False,
                     "error": f"Transcription failed: {transcript.error}",
@@ -70,9 +110,12 @@ class STTService:
                 "success": True,
                 "text": transcribed_text,
                 "confidence": getattr(transcript, "confidence", None),
+                "preprocessing": preprocessing,
                 "error": None
             }
             
+        except ProviderOverloadedError:
+            raise
         except UnicodeDecodeError as decode_error:
             logger.error(f"Unicode decode error during transcription: {decode_error}")
             return {
@@ -82,6 +125,7 @@ class STTService:
             }
         except Exception as e:
             logger.error(f"Error during transcription: {str(e)}")
+            mark_span_error(type(e).__name__)
             return {
                 "success": False,
                 "error": str(e),
@@ -0,0 +1,306 @@
+import time
+import uuid
+import asyncio
+import inspect
+import logging
+import threading
+import functools
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-request context, set by RequestContextMiddleware and read by every span
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+stage_timings_var: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("stage_timings", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # labels -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = entry
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, entry in sorted(self._values.items()):
+                for i, bound in enumerate(self.buckets):
+                    lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', str(bound)),))} {entry[i]}")
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {entry[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {entry[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {entry[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Register a callable producing extra exposition lines (e.g. gauges) at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.histogram(
+    "voice_agent_stage_duration_seconds", "Duration of pipeline stages and provider calls"
+)
+stage_total = registry.counter(
+    "voice_agent_stage_total", "Pipeline stages and provider calls by outcome and error type"
+)
+http_request_duration = registry.histogram(
+    "voice_agent_http_request_duration_seconds", "HTTP request duration by route"
+)
+http_requests_total = registry.counter(
+    "voice_agent_http_requests_total", "HTTP requests by route and status"
+)
+
+
+class Span:
+    """Times one stage and records it as metrics, a log line and a Server-Timing entry"""
+
+    def __init__(self, name: str, provider: str = "internal"):
+        self.name = name
+        self.provider = provider
+        self.outcome = "success"
+        self.error_type = ""
+        self._start = 0.0
+        self._token = None
+
+    def fail(self, error_type: str) -> None:
+        """Mark the span as failed without raising"""
+        self.outcome = "error"
+        self.error_type = error_type
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self._start
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # An async generator closed from another context (e.g. on disconnect)
+            pass
+
+        if exc_type is not None:
+            if issubclass(exc_type, (asyncio.CancelledError, GeneratorExit)):
+                self.outcome = "cancelled"
+            else:
+                self.fail(exc_type.__name__)
+
+        stage_duration.observe(duration, stage=self.name, provider=self.provider, outcome=self.outcome)
+        stage_total.inc(stage=self.name, provider=self.provider, outcome=self.outcome, error_type=self.error_type)
+
+        timings = stage_timings_var.get()
+        if timings is not None:
+            timings.append((self.name, duration))
+
+        logger.debug(
+            f"[{request_id_var.get()}] {self.name} ({self.provider}) {self.outcome}"
+            f"{' ' + self.error_type if self.error_type else ''} in {duration * 1000:.1f}ms"
+        )
+
+
+def span(name: str, provider: str = "internal") -> Span:
+    """Create a timing span: `with span("chat.stt"): ...`"""
+    return Span(name, provider)
+
+
+def mark_span_error(error_type: str) -> None:
+    """Record an error type on the innermost active span (for errors handled without raising)"""
+    current = _current_span.get()
+    if current is not None:
+        current.fail(error_type)
+
+
+def _result_error(result: Any) -> Optional[str]:
+    # Services report failure as None or {"success": False, ...} instead of raising
+    if result is None:
+        return "empty_result"
+    if isinstance(result, dict) and result.get("success") is False:
+        return "failed"
+    return None
+
+
+async def traced_call(name: str, awaitable: Awaitable[Any], provider: str = "internal") -> Any:
+    """
+    Await a call inside a span, marking it failed if it returns a failure result
+
+    Args:
+        name: Span name
+        awaitable: The call to time
+        provider: Upstream provider label
+
+    Returns:
+        Whatever the awaitable returns
+    """
+    with span(name, provider) as s:
+        result = await awaitable
+        error = _result_error(result)
+        if error and s.outcome == "success":
+            s.fail(error)
+        return result
+
+
+def traced(name: str, provider: str = "internal") -> Callable:
+    """Decorator that wraps an async function or async generator in a span"""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def gen_wrapper(*args, **kwargs):
+                with span(name, provider) as s:
+                    produced = False
+                    async for item in func(*args, **kwargs):
+                        produced = True
+                        yield item
+                    if not produced and s.outcome == "success":
+                        s.fail("empty_result")
+            return gen_wrapper
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await traced_call(name, func(*args, **kwargs), provider)
+        return wrapper
+
+    return decorator
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class RequestIdLogFilter(logging.Filter):
+    """Adds the current request ID to log records as %(request_id)s"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware that assigns a request ID, collects stage timings and
+    returns them as X-Request-ID and Server-Timing response headers
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or new_request_id()
+        timings: List[Tuple[str, float]] = []
+        id_token = request_id_var.set(request_id)
+        timings_token = stage_timings_var.set(timings)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                extra = [(b"x-request-id", request_id.encode("latin-1"))]
+                server_timing = ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in timings)
+                if server_timing:
+                    extra.append((b"server-timing", server_timing.encode("latin-1")))
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            if scope["type"] == "http":
+                # Label by endpoint name, not raw path, to keep session IDs out of label values
+                endpoint = scope.get("endpoint")
+                route = getattr(endpoint, "__name__", None) or "unmatched"
+                duration = time.perf_counter() - start
+                http_request_duration.observe(duration, method=scope["method"], route=route)
+                http_requests_total.inc(method=scope["method"], route=route, status=str(status["code"]))
+            request_id_var.reset(id_token)
+            stage_timings_var.reset(timings_token)
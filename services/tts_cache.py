@@ -0,0 +1,239 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Murf audio file URLs expire after 72 hours; keep a safety margin
+DEFAULT_TTL_SECONDS = 70 * 60 * 60
+
+
+def normalize_tts_text(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry"""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def tts_cache_key(text: str, voice_id: str, audio_format: str, quality: Optional[str]) -> str:
+    """
+    Build the content-addressed cache key for a synthesis request
+
+    Args:
+        text: Text to synthesize
+        voice_id: Murf voice ID
+        audio_format: Output format (e.g. 'mp3')
+        quality: Output quality, or None when not specified
+
+    Returns:
+        Hex SHA-256 digest identifying the request
+    """
+    material = "\x1f".join([normalize_tts_text(text), voice_id, audio_format, quality or ""])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Size-bounded LRU cache of synthesized audio URLs with TTL and optional disk tier
+
+    The disk tier (one JSON file per key, shared by all workers using the same
+    directory) is bounded too: expired files and the oldest files past
+    disk_max_entries are deleted at startup and then every prune_interval
+    seconds. Disk reads and writes run in a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        disk_dir: Optional[str] = None,
+        disk_max_entries: Optional[int] = None,
+        prune_interval: Optional[float] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("TTS_CACHE_MAX_ENTRIES", "1024"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("TTS_CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS)))
+        self.disk_dir = disk_dir if disk_dir is not None else os.getenv("TTS_CACHE_DIR")
+        self.disk_max_entries = disk_max_entries or int(os.getenv("TTS_CACHE_DISK_MAX_ENTRIES", "10000"))
+        self.prune_interval = prune_interval or float(os.getenv("TTS_CACHE_PRUNE_INTERVAL_SECONDS", "600"))
+
+        # key -> (audio_url, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._last_prune = 0.0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self.prune_disk()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[str, float]]:
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["audio_url"], data["expires_at"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable TTS cache file for {key[:12]}: {e}")
+            return None
+
+    def _write_disk(self, key: str, audio_url: str, expires_at: float) -> None:
+        try:
+            tmp_path = self._disk_path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"audio_url": audio_url, "expires_at": expires_at}, f)
+            os.replace(tmp_path, self._disk_path(key))
+        except Exception as e:
+            logger.warning(f"Failed to write TTS cache file for {key[:12]}: {e}")
+
+        with self._lock:
+            due = time.time() - self._last_prune >= self.prune_interval
+        if due:
+            self.prune_disk()
+
+    def _remove_disk(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def prune_disk(self) -> int:
+        """
+        Delete expired files, and the oldest ones past disk_max_entries, from the disk tier
+
+        Files are judged by their modification time (the time they were written),
+        so nothing has to be read. Blocking; called from a worker thread.
+
+        Returns:
+            Number of files deleted
+        """
+        with self._lock:
+            self._last_prune = time.time()
+        now = time.time()
+        try:
+            names = os.listdir(self.disk_dir)
+        except OSError as e:
+            logger.warning(f"Could not list TTS cache directory {self.disk_dir}: {e}")
+            return 0
+
+        removed = 0
+        live = []
+        for name in names:
+            path = os.path.join(self.disk_dir, name)
+            try:
+                written = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if name.endswith(".json"):
+                if written + self.ttl_seconds <= now:
+                    removed += self._remove_disk(path)
+                else:
+                    live.append((written, path))
+            elif name.endswith(".tmp") and written + 3600 <= now:
+                # Left behind by a worker that died mid-write
+                removed += self._remove_disk(path)
+
+        if len(live) > self.disk_max_entries:
+            live.sort()
+            for _, path in live[:len(live) - self.disk_max_entries]:
+                removed += self._remove_disk(path)
+
+        if removed:
+            with self._lock:
+                self.disk_evictions += removed
+            logger.info(f"Pruned {removed} files from the TTS disk cache")
+        return removed
+
+    def _remember(self, key: str, audio_url: str, expires_at: float) -> None:
+        # Caller holds the lock
+        self._entries[key] = (audio_url, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached audio URL
+
+        Args:
+            key: Cache key from tts_cache_key()
+
+        Returns:
+            The audio URL if cached and not expired, None otherwise
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+
+        if self.disk_dir:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry and entry[1] > now:
+                with self._lock:
+                    self._remember(key, *entry)
+                    self.disk_hits += 1
+                return entry[0]
+            if entry:
+                # Expired on disk: drop the file now rather than at the next prune
+                await asyncio.to_thread(self._remove_disk, self._disk_path(key))
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, key: str, audio_url: str) -> None:
+        """
+        Store a synthesized audio URL
+
+        Args:
+            key: Cache key from tts_cache_key()
+            audio_url: URL returned by Murf
+        """
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, audio_url, expires_at)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, audio_url, expires_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with size, hit/miss and eviction counts
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_tier": bool(self.disk_dir),
+                "disk_max_entries": self.disk_max_entries if self.disk_dir else None,
+                "disk_evictions": self.disk_evictions,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
@@ -1,8 +1,16 @@
 import os
 import logging
 import httpx
-import requests
 from typing import Optional
+from services.executor import ProviderExecutor, provider_executor
+from services.concurrency import ProviderOverloadedError
+from services.deadline import with_deadline
+from services.resilience import ProviderGuard, provider_guard
+from services.http_client import HTTPClientManager, http_clients as shared_http_clients
+from services.tts_cache import TTSCache, tts_cache_key
+from services.audio_store import AudioRelay, create_audio_relay
+from services.single_flight import SingleFlight
+from services.telemetry import mark_span_error, traced
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +18,14 @@ logger = logging.getLogger(__name__)
 class TTSService:
     """Service for handling Text-to-Speech operations using Murf API"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        executor: Optional[ProviderExecutor] = None,
+        http_clients: Optional[HTTPClientManager] = None,
+        cache: Optional[TTSCache] = None,
+        guard: Optional[ProviderGuard] = None,
+        relay: Optional[AudioRelay] = None
+    ):
         self.api_key = os.getenv("MURF_API_KEY")
         self.api_url = os.getenv("MURF_API_URL", "https://api.murf.ai/v1/speech/generate")
         
@@ -18,8 +33,29 @@ class TTSService:
             logger.error("MURF_API_KEY not found in environment variables")
             raise ValueError("MURF_API_KEY not configured")
         
+        self.executor = executor or provider_executor
+        self.http_clients = http_clients or shared_http_clients
+        # Circuit breaker, request deadline and concurrency limit for each upstream call
+        self.guard = guard or provider_guard
+        # Timeout of the blocking requests call used for fallback phrases
+        self.fallback_timeout = float(os.getenv("MURF_FALLBACK_TIMEOUT", "15"))
+        
+        # Cache of synthesized audio URLs; repeated text costs no upstream call
+        if cache is None and os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true":
+            cache = TTSCache()
+        self.cache = cache
+        # Identical concurrent requests (keyed like the cache) share one upstream call
+        self.single_flight = SingleFlight("tts")
+        # Optional local copies of the audio, served from /audio/{digest} (AUDIO_PROXY_ENABLED)
+        self.relay = relay or create_audio_relay(self.http_clients)
         logger.info("TTSService initialized successfully")
 
+    async def warm_up(self) -> None:
+        """Open a pooled connection to Murf (DNS, TCP and TLS) so the first request doesn't pay for it"""
+        client = self.http_clients.get("tts")
+        await client.head(str(httpx.URL(self.api_url).join("/")), timeout=self.http_clients.connect_timeout)
+
+    @traced("tts.generate_speech", provider="murf")
     async def generate_speech(self, text: str, voice_id: str = "en-US-ken") -> Optional[str]:
         """
         Generate speech from text using Murf's TTS API
@@ -28,6 +64,44 @@ class TTSService:
             text: Text to convert to speech
             voice_id: Voice ID to use for generation
             
+        Returns:
+            Audio URL if successful, None otherwise
+        """
+        cache_key = tts_cache_key(text, voice_id, "mp3", "high")
+        if self.cache:
+            cached_url = await self.cache.get(cache_key)
+            if cached_url:
+                logger.info(f"TTS cache hit for text: {text[:50]}...")
+                return await self._deliver(cached_url)
+        
+        audio_url = await self.single_flight.do(
+            cache_key, lambda: self.guard.hedged("tts", lambda: self._synthesize(text, voice_id, cache_key))
+        )
+        return await self._deliver(audio_url)
+
+    async def _deliver(self, audio_url: Optional[str]) -> Optional[str]:
+        """
+        Swap Murf's audio URL for the locally served copy when the audio relay is enabled
+        
+        Args:
+            audio_url: URL returned by Murf (or the cache), or None
+            
+        Returns:
+            The URL to hand to the client
+        """
+        if self.relay is None or not audio_url:
+            return audio_url
+        return await self.relay.localize(audio_url)
+
+    async def _synthesize(self, text: str, voice_id: str, cache_key: str) -> Optional[str]:
+        """
+        Call Murf for one synthesis request and cache the resulting URL
+        
+        Args:
+            text: Text to convert to speech
+            voice_id: Voice ID to use for generation
+            cache_key: Cache key of the request
+            
         Returns:
             Audio URL if successful, None otherwise
         """
@@ -46,28 +120,40 @@ class TTSService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.api_url, json=payload, headers=headers)
+            # Reuse the app-lifetime pooled client so warm connections are kept
+            client = self.http_clients.get("tts")
+            async with self.guard.call("tts") as permit:
+                response = await with_deadline("tts", client.post(self.api_url, json=payload, headers=headers))
+                permit.record_status(response.status_code)
+            
+            if response.status_code == 200:
+                result = response.json()
+                audio_url = result.get("audioFile") or result.get("url") or result.get("audio_url")
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    audio_url = result.get("audioFile") or result.get("url") or result.get("audio_url")
-                    
-                    if audio_url:
-                        logger.info("Speech generation successful")
-                        return audio_url
-                    else:
-                        logger.error("Audio URL not found in response")
-                        return None
+                if audio_url:
+                    logger.info("Speech generation successful")
+                    if self.cache:
+                        await self.cache.set(cache_key, audio_url)
+                    return audio_url
                 else:
-                    logger.error(f"Murf API error ({response.status_code}): {response.text}")
+                    logger.error("Audio URL not found in response")
                     return None
+            else:
+                logger.error(f"Murf API error ({response.status_code}): {response.text}")
+                mark_span_error(f"http_{response.status_code}")
+                return None
                     
+        except ProviderOverloadedError as e:
+            # Shed or circuit open: callers already fall back to a text-only reply when TTS returns None
+            mark_span_error(e.reason)
+            return None
         except httpx.TimeoutException:
             logger.error("Request timeout - Murf API took too long to respond")
+            mark_span_error("timeout")
             return None
         except Exception as e:
             logger.error(f"Error calling Murf API: {str(e)}")
+            mark_span_error(type(e).__name__)
             return None
 
     def generate_speech_sync(self, text: str, voice_id: str = "en-US-ken") -> Optional[str]:
@@ -94,7 +180,9 @@ class TTSService:
                 "format": "mp3"
             }
             
-            response = requests.post(self.api_url, headers=headers, json=payload, timeout=15)
+            import requests  # only this blocking fallback needs it
+            
+            response = requests.post(self.api_url, headers=headers, json=payload, timeout=self.fallback_timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -110,6 +198,7 @@ class TTSService:
             
         return None
 
+    @traced("tts.fallback", provider="murf")
     async def generate_fallback_audio(self, text: str) -> Optional[str]:
         """
         Generate fallback audio with error handling
@@ -120,8 +209,22 @@ class TTSService:
         Returns:
             Audio URL if successful, None otherwise
         """
+        cache_key = tts_cache_key(text, "en-US-ken", "mp3", None)
+        if self.cache:
+            cached_url = await self.cache.get(cache_key)
+            if cached_url:
+                return await self._deliver(cached_url)
+        
+        async def synthesize() -> Optional[str]:
+            async with self.guard.call("tts"):
+                audio_url = await with_deadline("tts", self.executor.run("tts", self.generate_speech_sync, text))
+            if audio_url and self.cache:
+                await self.cache.set(cache_key, audio_url)
+            return audio_url
+        
         try:
-            return self.generate_speech_sync(text)
+            # Error paths tend to fire for many users at once; share one Murf call per phrase
+            return await self._deliver(await self.single_flight.do(cache_key, synthesize))
         except Exception as e:
             logger.error(f"Error generating fallback audio: {str(e)}")
             return None
\ No newline at end of file
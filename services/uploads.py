@@ -0,0 +1,129 @@
+import os
+import json
+import shutil
+import logging
+import tempfile
+from typing import Any, BinaryIO, Dict, Optional
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from debug_utils import HEADER_SNIFF_BYTES, log_audio_file_info
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+
+def max_upload_bytes() -> int:
+    """Largest request body accepted, from MAX_UPLOAD_BYTES (default 25 MB)"""
+    return int(os.getenv("MAX_UPLOAD_BYTES", str(DEFAULT_MAX_UPLOAD_BYTES)))
+
+
+class UploadTooLargeError(HTTPException):
+    """Raised while the body is still arriving, so FastAPI answers 413 instead of parsing on"""
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Upload exceeds the {limit} byte limit")
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware that rejects oversize request bodies before they are buffered
+
+    Requests whose Content-Length is over the limit are refused without reading the
+    body at all. Bodies without a Content-Length (chunked uploads) are counted as
+    they arrive and cut off as soon as they pass the limit.
+    """
+
+    def __init__(self, app, max_bytes: Optional[int] = None):
+        self.app = app
+        self.max_bytes = max_bytes or max_upload_bytes()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning(f"Rejected {scope['path']}: Content-Length {int(content_length)} > {self.max_bytes}")
+            await self._reject(send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    logger.warning(f"Rejected {scope['path']}: body passed {self.max_bytes} bytes")
+                    raise UploadTooLargeError(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": f"Upload exceeds the {self.max_bytes} byte limit"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+async def open_upload(upload: UploadFile) -> Dict[str, Any]:
+    """
+    Prepare an uploaded file for streaming to a provider without reading it into memory
+
+    Starlette has already spooled the multipart body to a temporary file (kept in
+    memory only while small). Only the first HEADER_SNIFF_BYTES are read here, to detect
+    the format; the returned file object is rewound and is read in chunks by the
+    provider upload.
+
+    Args:
+        upload: Uploaded file
+
+    Returns:
+        Dict with the file object, its size and the detected file info
+    """
+    header = await upload.read(HEADER_SNIFF_BYTES)
+    await upload.seek(0)
+    size = upload.size
+    if size is None:
+        # UploadFiles built outside the multipart parser carry no size; find it without reading
+        upload.file.seek(0, os.SEEK_END)
+        size = upload.file.tell()
+        upload.file.seek(0)
+
+    info = log_audio_file_info(header, upload.filename or "unknown", size_bytes=size)
+    file_obj: BinaryIO = upload.file
+    return {"file": file_obj, "size": size, "info": info}
+
+
+async def detach_upload(upload: UploadFile) -> UploadFile:
+    """
+    Copy an upload to a file the caller owns, so it outlives the request
+
+    FastAPI closes the request's uploads once the response is sent; a background
+    job that reads the audio later needs its own copy. Small uploads stay in
+    memory, larger ones are copied to a temporary file off the event loop.
+
+    Args:
+        upload: Uploaded file
+
+    Returns:
+        An UploadFile over the copy; the caller must close it
+    """
+    copy = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    await upload.seek(0)
+    await run_in_threadpool(shutil.copyfileobj, upload.file, copy)
+    size = copy.tell()
+    copy.seek(0)
+    return UploadFile(file=copy, size=size, filename=upload.filename, headers=upload.headers)
@@ -0,0 +1,108 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WarmupStep = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class StartupWarmup:
+    """
+    Runs the startup warm-up steps in order and reports readiness
+
+    Liveness (/health) is answered as soon as the server is up; readiness
+    (/ready) only once every step has finished, failed or run out of time.
+    A failed step is logged and reported but does not block readiness: the
+    request that needs it pays the cold-start cost instead. The whole
+    warm-up is bounded by STARTUP_WARMUP_TIMEOUT.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout or float(os.getenv("STARTUP_WARMUP_TIMEOUT", "20"))
+        self.steps: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.ready = False
+        # Time to import main.py, set by the app module once its imports are done
+        self.import_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+
+    async def run(self, steps: List[WarmupStep]) -> None:
+        """
+        Run each step with whatever is left of the time budget, then flip to ready
+
+        Args:
+            steps: (name, coroutine function) pairs, run one after another
+        """
+        started = time.perf_counter()
+        for name, _ in steps:
+            self.steps[name] = {"status": "pending", "seconds": None}
+
+        for name, step in steps:
+            remaining = self.timeout - (time.perf_counter() - started)
+            entry = self.steps[name]
+            step_started = time.perf_counter()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                detail = await asyncio.wait_for(step(), remaining)
+                entry["status"] = "ok"
+                if detail is not None:
+                    entry["detail"] = detail
+            except asyncio.TimeoutError:
+                entry["status"] = "timeout"
+                logger.warning(f"Warm-up step {name} ran out of time")
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+                logger.warning(f"Warm-up step {name} failed: {str(e)}")
+            entry["seconds"] = round(time.perf_counter() - step_started, 3)
+
+        self.warmup_seconds = time.perf_counter() - started
+        self.ready = True
+        summary = ", ".join(f"{name}={entry['status']} {entry['seconds']}s" for name, entry in self.steps.items())
+        logger.info(f"Ready after {self.warmup_seconds:.2f}s warm-up ({summary})")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get readiness and per-step timings
+
+        Returns:
+            Dictionary with the ready flag, import and warm-up seconds and each step's outcome
+        """
+        return {
+            "ready": self.ready,
+            "import_seconds": round(self.import_seconds, 3) if self.import_seconds is not None else None,
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "steps": {name: dict(entry) for name, entry in self.steps.items()},
+        }
+
+
+async def warm_provider_connections(services: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Pre-connect to each provider host in parallel
+
+    Any HTTP answer counts: the point is a resolved, TLS-established
+    connection left in the pool. Services without a warm_up() (fakes) are skipped.
+
+    Args:
+        services: Provider name -> service instance
+
+    Returns:
+        Provider name -> "ok", "skipped" or the error message
+    """
+    names = [name for name, service in services.items() if hasattr(service, "warm_up")]
+    results = await asyncio.gather(*(services[name].warm_up() for name in names), return_exceptions=True)
+    outcome = {name: "skipped" for name in services}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            outcome[name] = f"{type(result).__name__}: {result}"
+            logger.warning(f"Could not pre-connect to {name}: {outcome[name]}")
+        else:
+            outcome[name] = "ok"
+    return outcome
+
+
+startup = StartupWarmup()
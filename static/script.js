@@ -8,6 +8,19 @@ const recordButton = document.getElementById("recordButton");
 const chatContainer = document.getElementById("chatContainer");
 const echoAudioPlayer = document.getElementById("echoAudioPlayer");
 const statusMessage = document.getElementById("echoStatusMessage");
+const latencyMessage = document.getElementById("turnLatency");
+
+// Voice activity detection settings, rendered into the page from the server's VAD_* env vars
+const vadConfig = {
+  thresholdDb: Number(document.body.dataset.vadThresholdDb || -45),
+  silenceMs: Number(document.body.dataset.vadSilenceMs || 1200),
+  minSpeechMs: 200,
+  preRollMs: 300,
+  hangoverMs: 200,
+  targetSampleRate: 16000,
+};
+const vadSupported = typeof AudioWorkletNode !== "undefined";
+let vadSession = null;
 
 // Toggle record/stop on button click
 recordButton.addEventListener("click", () => {
@@ -18,31 +31,250 @@ recordButton.addEventListener("click", () => {
   }
 });
 
-function startRecording() {
-  navigator.mediaDevices
-    .getUserMedia({ audio: true })
-    .then((stream) => {
-      recordedChunks = [];
-      mediaRecorder = new MediaRecorder(stream);
-      mediaRecorder.ondataavailable = (e) => {
-        if (e.data.size > 0) recordedChunks.push(e.data);
-      };
-      mediaRecorder.onstop = sendAudioToAgent;
-      mediaRecorder.start();
-      isRecording = true;
-      updateButton();
-      statusMessage.textContent = "Recording...";
-    })
-    .catch((err) => {
-      console.error("Microphone access denied:", err);
-      statusMessage.textContent = "Microphone access denied.";
-    });
+// Audio is streamed to the server in chunks of this length while the user speaks
+const CHUNK_TIMESLICE_MS = 250;
+// The worklet emits 20 ms PCM frames; realtime STT wants about 100 ms per message
+const PCM_SEND_MS = 100;
+let agentSocket = null;
+let socketAssistantDiv = null;
+
+function connectAgentSocket() {
+  return new Promise((resolve, reject) => {
+    if (agentSocket && agentSocket.readyState === WebSocket.OPEN) {
+      resolve(agentSocket);
+      return;
+    }
+    const protocol = location.protocol === "https:" ? "wss" : "ws";
+    const socket = new WebSocket(
+      `${protocol}://${location.host}/ws/agent/${encodeURIComponent(sessionId)}`
+    );
+    socket.onopen = () => {
+      agentSocket = socket;
+      resolve(socket);
+    };
+    socket.onerror = reject;
+    socket.onclose = () => {
+      if (agentSocket === socket) agentSocket = null;
+    };
+    socket.onmessage = (msg) => handleSocketEvent(JSON.parse(msg.data));
+  });
+}
+
+function handleSocketEvent(event) {
+  if (event.type === "partial") {
+    statusMessage.textContent = `Hearing: ${event.text}`;
+    return;
+  }
+  if (event.type === "final") {
+    statusMessage.textContent = "Thinking...";
+    socketAssistantDiv = document.createElement("div");
+    socketAssistantDiv.className = "assistant-message";
+    socketAssistantDiv.innerHTML = "<b>Assistant:</b>";
+    handleAgentEvent({ type: "transcript", transcription: event.transcription }, socketAssistantDiv);
+    return;
+  }
+  handleAgentEvent(event, socketAssistantDiv);
+  if (event.type === "done" || event.type === "error") {
+    statusMessage.textContent = "Ready.";
+  }
+}
+
+// Turn latency: from the end of the user's speech to the first reply audio and to completion
+let turnEndedAt = null;
+let firstAudioMs = null;
+
+function markTurnEnded() {
+  turnEndedAt = performance.now();
+  firstAudioMs = null;
+  latencyMessage.textContent = "";
+}
+
+function recordTurnLatency(event) {
+  if (turnEndedAt === null) return;
+  const elapsed = performance.now() - turnEndedAt;
+  if (firstAudioMs === null && (event.type === "audio" || event.type === "error")) {
+    firstAudioMs = elapsed;
+    latencyMessage.textContent = `Turn latency: ${(firstAudioMs / 1000).toFixed(2)} s to first audio`;
+  }
+  if (event.type === "done" || event.type === "error") {
+    latencyMessage.textContent =
+      `Turn latency: ${((firstAudioMs ?? elapsed) / 1000).toFixed(2)} s to first audio, ` +
+      `${(elapsed / 1000).toFixed(2)} s total`;
+    turnEndedAt = null;
+  }
+}
+
+async function startRecording() {
+  let stream;
+  try {
+    stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+  } catch (err) {
+    console.error("Microphone access denied:", err);
+    statusMessage.textContent = "Microphone access denied.";
+    return;
+  }
+
+  if (vadSupported) {
+    try {
+      await startVadRecording(stream);
+      return;
+    } catch (err) {
+      console.warn("Voice activity detection unavailable, recording until stop:", err);
+    }
+  }
+
+  // Prefer streaming over the WebSocket; fall back to uploading on stop
+  let socket = null;
+  try {
+    socket = await connectAgentSocket();
+    socket.send(JSON.stringify({ type: "start", encoding: "webm" }));
+  } catch (err) {
+    console.warn("WebSocket unavailable, falling back to upload:", err);
+  }
+
+  recordedChunks = [];
+  mediaRecorder = new MediaRecorder(stream);
+  mediaRecorder.ondataavailable = (e) => {
+    if (e.data.size === 0) return;
+    recordedChunks.push(e.data);
+    if (socket && socket.readyState === WebSocket.OPEN) socket.send(e.data);
+  };
+  mediaRecorder.onstop = () => {
+    stream.getTracks().forEach((track) => track.stop());
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ type: "stop" }));
+    } else {
+      sendAudioToAgent(new Blob(recordedChunks, { type: "audio/webm" }), "recording.webm");
+    }
+  };
+  mediaRecorder.start(CHUNK_TIMESLICE_MS);
+  isRecording = true;
+  updateButton();
+  statusMessage.textContent = "Recording...";
+}
+
+// Records through the VAD worklet: only the voiced span is sent (as 16 kHz PCM16),
+// and the turn ends by itself after vadConfig.silenceMs of trailing silence.
+async function startVadRecording(stream) {
+  const context = new AudioContext();
+  await context.audioWorklet.addModule("/static/vad-worklet.js");
+  const source = context.createMediaStreamSource(stream);
+  const node = new AudioWorkletNode(context, "vad-processor", {
+    numberOfInputs: 1,
+    numberOfOutputs: 0,
+    processorOptions: vadConfig,
+  });
+
+  let socket = null;
+  try {
+    socket = await connectAgentSocket();
+  } catch (err) {
+    console.warn("WebSocket unavailable, uploading the voiced audio instead:", err);
+  }
+  const socketOpen = () => socket && socket.readyState === WebSocket.OPEN;
+
+  const session = { context, stream, node, chunks: [], pending: [], pendingSamples: 0, speaking: false };
+  vadSession = session;
+
+  node.port.onmessage = ({ data }) => {
+    if (data.type === "speech-start") {
+      session.speaking = true;
+      statusMessage.textContent = "Listening...";
+      if (socketOpen()) {
+        socket.send(
+          JSON.stringify({ type: "start", encoding: "pcm_s16le", sample_rate: vadConfig.targetSampleRate })
+        );
+      }
+    } else if (data.type === "audio") {
+      if (socketOpen()) queuePcm(session, socket, new Int16Array(data.pcm));
+      else session.chunks.push(new Int16Array(data.pcm));
+    } else if (data.type === "speech-end") {
+      finishVadRecording(session, data.reason, socketOpen() ? socket : null);
+    }
+  };
+
+  source.connect(node);
+  isRecording = true;
+  updateButton();
+  statusMessage.textContent = "Waiting for speech...";
+}
+
+// Batches worklet frames into PCM_SEND_MS messages
+function queuePcm(session, socket, samples) {
+  session.pending.push(samples);
+  session.pendingSamples += samples.length;
+  if (session.pendingSamples >= (vadConfig.targetSampleRate * PCM_SEND_MS) / 1000) {
+    flushPcm(session, socket);
+  }
+}
+
+function flushPcm(session, socket) {
+  if (!session.pendingSamples) return;
+  const batch = new Int16Array(session.pendingSamples);
+  let offset = 0;
+  session.pending.forEach((chunk) => {
+    batch.set(chunk, offset);
+    offset += chunk.length;
+  });
+  session.pending = [];
+  session.pendingSamples = 0;
+  socket.send(batch.buffer);
+}
+
+function finishVadRecording(session, reason, socket) {
+  if (vadSession !== session) return;
+  vadSession = null;
+  session.stream.getTracks().forEach((track) => track.stop());
+  session.context.close();
+  isRecording = false;
+  updateButton();
+
+  if (!session.speaking) {
+    statusMessage.textContent = reason === "no-speech" ? "No speech detected." : "Ready.";
+    return;
+  }
+  markTurnEnded();
+  statusMessage.textContent = "Processing...";
+  if (socket) {
+    flushPcm(session, socket);
+    socket.send(JSON.stringify({ type: "stop" }));
+  } else {
+    sendAudioToAgent(encodeWav(session.chunks, vadConfig.targetSampleRate), "recording.wav");
+  }
+}
+
+// Wraps mono PCM16 chunks in a WAV container
+function encodeWav(chunks, sampleRate) {
+  const samples = chunks.reduce((total, chunk) => total + chunk.length, 0);
+  const header = new DataView(new ArrayBuffer(44));
+  const writeText = (offset, text) =>
+    [...text].forEach((char, i) => header.setUint8(offset + i, char.charCodeAt(0)));
+  writeText(0, "RIFF");
+  header.setUint32(4, 36 + samples * 2, true);
+  writeText(8, "WAVE");
+  writeText(12, "fmt ");
+  header.setUint32(16, 16, true);
+  header.setUint16(20, 1, true); // PCM
+  header.setUint16(22, 1, true); // mono
+  header.setUint32(24, sampleRate, true);
+  header.setUint32(28, sampleRate * 2, true);
+  header.setUint16(32, 2, true);
+  header.setUint16(34, 16, true);
+  writeText(36, "data");
+  header.setUint32(40, samples * 2, true);
+  return new Blob([header, ...chunks], { type: "audio/wav" });
 }
 
 function stopRecording() {
+  if (vadSession) {
+    // The worklet sends any held-back audio, then reports speech-end
+    vadSession.node.port.postMessage({ type: "flush" });
+    return;
+  }
   mediaRecorder.stop();
   isRecording = false;
   updateButton();
+  markTurnEnded();
   statusMessage.textContent = "Processing...";
 }
 
@@ -53,42 +285,94 @@ function updateButton() {
   recordButton.classList.toggle("recording", isRecording);
 }
 
-async function sendAudioToAgent() {
-  const blob = new Blob(recordedChunks, { type: "audio/webm" });
+// Audio segments from the streaming endpoint are played back-to-back in order
+const audioQueue = [];
+let isPlaying = false;
+
+function enqueueAudio(segment) {
+  audioQueue.push(segment);
+  if (!isPlaying) playNextSegment();
+}
+
+async function playNextSegment() {
+  const segment = audioQueue.shift();
+  if (!segment) {
+    isPlaying = false;
+    return;
+  }
+  isPlaying = true;
+
+  if (segment.url) {
+    echoAudioPlayer.src = segment.url;
+    echoAudioPlayer.onended = playNextSegment;
+    echoAudioPlayer.onerror = playNextSegment;
+    try {
+      await echoAudioPlayer.play();
+    } catch (err) {
+      console.error("Audio playback failed:", err);
+      playNextSegment();
+    }
+  } else {
+    // TTS failed for this segment: fall back to the browser voice
+    const utterance = new SpeechSynthesisUtterance(segment.text);
+    utterance.onend = playNextSegment;
+    speechSynthesis.speak(utterance);
+  }
+}
+
+function handleAgentEvent(event, assistantDiv) {
+  recordTurnLatency(event);
+  if (event.type === "transcript") {
+    chatContainer.innerHTML += `<div class="user-message"><b>You:</b> ${event.transcription}</div>`;
+  } else if (event.type === "audio") {
+    if (!assistantDiv.isConnected) {
+      chatContainer.appendChild(assistantDiv);
+    }
+    assistantDiv.innerHTML += ` ${event.text}`;
+    enqueueAudio({ url: event.murf_audio_url, text: event.text });
+  } else if (event.type === "error") {
+    if (event.transcription) {
+      chatContainer.innerHTML += `<div class="user-message"><b>You:</b> ${event.transcription}</div>`;
+    }
+    chatContainer.innerHTML += `<div class="assistant-message"><b>Assistant:</b> ${event.llm_reply}</div>`;
+    chatContainer.innerHTML += `<div class="error-message">Error: ${event.error}</div>`;
+    enqueueAudio({ url: event.murf_audio_url, text: event.llm_reply });
+  }
+  chatContainer.scrollTop = chatContainer.scrollHeight;
+}
+
+async function sendAudioToAgent(blob, filename) {
   const formData = new FormData();
-  formData.append("file", blob, "recording.webm");
+  formData.append("file", blob, filename);
 
   try {
     const response = await fetch(
-      `/agent/chat/${encodeURIComponent(sessionId)}`,
+      `/agent/chat/${encodeURIComponent(sessionId)}/stream`,
       {
         method: "POST",
         body: formData,
       }
     );
-    const data = await response.json();
 
-    if (data.transcription) {
-      chatContainer.innerHTML += `<div class="user-message"><b>You:</b> ${data.transcription}</div>`;
-    }
-    if (data.llm_reply) {
-      chatContainer.innerHTML += `<div class="assistant-message"><b>Assistant:</b> ${data.llm_reply}</div>`;
-    }
-    if (data.error) {
-      chatContainer.innerHTML += `<div class="error-message">Error: ${data.error}</div>`;
-    }
-    chatContainer.scrollTop = chatContainer.scrollHeight;
+    // Read newline-delimited JSON events as the server produces them
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const assistantDiv = document.createElement("div");
+    assistantDiv.className = "assistant-message";
+    assistantDiv.innerHTML = "<b>Assistant:</b>";
+    let buffer = "";
 
-    if (data.murf_audio_url) {
-      echoAudioPlayer.src = data.murf_audio_url;
-      await echoAudioPlayer.play();
-    } else if (data.llm_reply) {
-      speechSynthesis.speak(new SpeechSynthesisUtterance(data.llm_reply));
-    } else {
-      speechSynthesis.speak(
-        new SpeechSynthesisUtterance("I'm having trouble connecting right now.")
-      );
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split("\n");
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (line.trim()) handleAgentEvent(JSON.parse(line), assistantDiv);
+      }
     }
+    if (buffer.trim()) handleAgentEvent(JSON.parse(buffer), assistantDiv);
 
     statusMessage.textContent = "Ready.";
   } catch (err) {
@@ -98,5 +382,6 @@ async function sendAudioToAgent() {
       new SpeechSynthesisUtterance("I'm having trouble connecting right now.")
     );
     statusMessage.textContent = "Error occurred.";
+    turnEndedAt = null;
   }
 }
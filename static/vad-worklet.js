@@ -0,0 +1,123 @@
+// Energy-based voice activity detection, run on the audio rendering thread.
+//
+// Downmixes and downsamples the microphone to 16 kHz PCM16, splits it into 20 ms
+// frames and posts only the voiced span of the utterance to the main thread:
+//   {type: "speech-start"}            once enough consecutive voiced frames arrive
+//   {type: "audio", pcm: ArrayBuffer} PCM16 frames, starting with a short pre-roll
+//   {type: "speech-end", reason}      after `silenceMs` of trailing silence (or a flush)
+// Silence inside the utterance is held back and only sent if speech resumes, so
+// the trailing silence that ends the turn is never sent (beyond `hangoverMs`).
+
+const FRAME_MS = 20;
+
+class VadProcessor extends AudioWorkletProcessor {
+  constructor(options) {
+    super();
+    const config = options.processorOptions || {};
+    this.targetRate = config.targetSampleRate || 16000;
+    this.thresholdDb = config.thresholdDb ?? -45;
+    this.frameSize = Math.round((this.targetRate * FRAME_MS) / 1000);
+    this.silenceFrames = Math.ceil((config.silenceMs ?? 1200) / FRAME_MS);
+    this.minSpeechFrames = Math.ceil((config.minSpeechMs ?? 200) / FRAME_MS);
+    this.preRollFrames = Math.ceil((config.preRollMs ?? 300) / FRAME_MS);
+    this.hangoverFrames = Math.ceil((config.hangoverMs ?? 200) / FRAME_MS);
+
+    // Box-filter downsampler state (`sampleRate` is the AudioWorkletGlobalScope rate)
+    this.ratio = sampleRate / this.targetRate;
+    this.position = 0;
+    this.sum = 0;
+    this.count = 0;
+
+    this.frame = new Int16Array(this.frameSize);
+    this.frameEnergy = 0;
+    this.frameFill = 0;
+
+    this.state = "waiting"; // waiting -> speaking -> ended
+    this.preRoll = [];
+    this.voicedRun = 0;
+    this.heldSilence = [];
+
+    this.port.onmessage = (event) => {
+      if (event.data.type === "flush") this.end("manual");
+    };
+  }
+
+  send(frames) {
+    for (const frame of frames) {
+      this.port.postMessage({ type: "audio", pcm: frame.buffer }, [frame.buffer]);
+    }
+  }
+
+  end(reason) {
+    if (this.state === "speaking") {
+      this.send(this.heldSilence.slice(0, this.hangoverFrames));
+      this.port.postMessage({ type: "speech-end", reason });
+    } else if (this.state === "waiting") {
+      this.port.postMessage({ type: "speech-end", reason: "no-speech" });
+    }
+    this.state = "ended";
+    this.heldSilence = [];
+    this.preRoll = [];
+  }
+
+  handleFrame(frame, voiced) {
+    if (this.state === "waiting") {
+      this.preRoll.push(frame);
+      if (this.preRoll.length > this.preRollFrames + this.minSpeechFrames) this.preRoll.shift();
+      this.voicedRun = voiced ? this.voicedRun + 1 : 0;
+      if (this.voicedRun >= this.minSpeechFrames) {
+        this.state = "speaking";
+        this.port.postMessage({ type: "speech-start" });
+        this.send(this.preRoll);
+        this.preRoll = [];
+      }
+      return;
+    }
+
+    if (voiced) {
+      this.send(this.heldSilence);
+      this.heldSilence = [];
+      this.send([frame]);
+    } else {
+      this.heldSilence.push(frame);
+      if (this.heldSilence.length >= this.silenceFrames) this.end("silence");
+    }
+  }
+
+  pushSample(value) {
+    this.frame[this.frameFill++] = Math.max(-32768, Math.min(32767, Math.round(value * 32767)));
+    this.frameEnergy += value * value;
+    if (this.frameFill === this.frameSize) {
+      const rms = Math.sqrt(this.frameEnergy / this.frameSize);
+      const db = 20 * Math.log10(rms + 1e-10);
+      this.handleFrame(this.frame, db > this.thresholdDb);
+      this.frame = new Int16Array(this.frameSize);
+      this.frameEnergy = 0;
+      this.frameFill = 0;
+    }
+  }
+
+  process(inputs) {
+    if (this.state === "ended") return false;
+    const channels = inputs[0];
+    if (!channels || channels.length === 0) return true;
+
+    const length = channels[0].length;
+    for (let i = 0; i < length; i++) {
+      let sample = 0;
+      for (let c = 0; c < channels.length; c++) sample += channels[c][i];
+      this.sum += sample / channels.length;
+      this.count++;
+      this.position += 1;
+      if (this.position >= this.ratio) {
+        this.position -= this.ratio;
+        this.pushSample(this.sum / this.count);
+        this.sum = 0;
+        this.count = 0;
+      }
+    }
+    return true;
+  }
+}
+
+registerProcessor("vad-processor", VadProcessor);
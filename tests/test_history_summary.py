@@ -0,0 +1,79 @@
+import asyncio
+from typing import List, Optional
+
+from services.chat_service import ChatService
+from services.fakes import FakeLLMService, FakeSTTService, FakeTTSService
+from services.history import SUMMARY_PREFIX, HistoryWindow
+from services.session_store import SQLiteSessionStore
+
+
+class RecordingLLM(FakeLLMService):
+    """Fake LLM that records the prompts it answers and the batches it summarizes"""
+
+    def __init__(self, prompts: List[str], batches: List[int]):
+        super().__init__(reply="Sure, noted.")
+        self.prompts = prompts
+        self.batches = batches
+
+    async def stream_response_from_prompt(self, prompt: str, latency_budget: Optional[float] = None):
+        self.prompts.append(prompt)
+        async for chunk in super().stream_response_from_prompt(prompt, latency_budget):
+            yield chunk
+
+    async def summarize_history(self, previous_summary: Optional[str], lines: List[str]) -> Optional[str]:
+        self.batches.append(len(lines))
+        return await super().summarize_history(previous_summary, lines)
+
+
+def _chat_service(store, prompts, batches) -> ChatService:
+    return ChatService(
+        stt_service=FakeSTTService(),
+        tts_service=FakeTTSService(),
+        llm_service=RecordingLLM(prompts, batches),
+        session_store=store
+    )
+
+
+async def _turn(service: ChatService, session_id: str, text: str) -> None:
+    async for _ in service.stream_reply(session_id, text):
+        pass
+    # Let the background summary (and the store write after it) finish before the next turn
+    await asyncio.sleep(0.1)
+
+
+def test_summary_survives_rebuild_by_another_worker(tmp_path, monkeypatch):
+    monkeypatch.setenv("HISTORY_TOKEN_BUDGET", "60")
+    monkeypatch.setenv("HISTORY_SUMMARY_BATCH_TOKENS", "20")
+    store = SQLiteSessionStore(path=str(tmp_path / "sessions.db"))
+    prompts: List[str] = []
+    batches: List[int] = []
+    workers = [_chat_service(store, prompts, batches), _chat_service(store, prompts, batches)]
+
+    async def conversation():
+        for turn in range(8):
+            await _turn(workers[turn % 2], "s1", f"Please remember that item number {turn} is on my list.")
+
+    try:
+        asyncio.run(conversation())
+    finally:
+        store.close()
+
+    # Each evicted message is summarized once, although every turn rebuilt the window
+    assert len(batches) >= 2
+    assert sum(batches) == store.get_history("s1").summary_covers
+    # Once there is a summary, every later prompt carries it
+    with_summary = [SUMMARY_PREFIX in prompt for prompt in prompts]
+    first = with_summary.index(True)
+    assert all(with_summary[first:])
+    assert first < len(prompts) - 2
+
+
+def test_from_messages_skips_summarized_messages():
+    messages = [{"role": "user" if i % 2 == 0 else "assistant", "text": f"message {i}"} for i in range(6)]
+    window = HistoryWindow.from_messages(messages, token_budget=1000, summary="Earlier talk.", summary_covers=4, offset=2)
+
+    prompt = window.build_prompt()
+    assert prompt.startswith(f"{SUMMARY_PREFIX} Earlier talk.")
+    assert "message 1" not in prompt
+    assert "message 2" in prompt
+    assert window.summary_covers == 4
@@ -0,0 +1,42 @@
+import pytest
+
+from services.response_cache import GLOBAL_SCOPE, SemanticResponseCache
+
+# Similar wording, different question: these must never share an answer
+DIFFERENT_QUERIES = [
+    ("what is the weather like today in paris", "what is the weather like today in london"),
+    ("blue shoes", "red shoes"),
+    ("set a timer for 5 minutes", "set a timer for 15 minutes"),
+    ("who won the world cup in 2018", "who won the world cup in 2014"),
+    ("how tall is the eiffel tower", "how old is the eiffel tower"),
+]
+
+# Rephrasings of the same question
+SAME_QUERIES = [
+    ("What is the weather like today in Paris?", "what is the weather like today in paris"),
+    ("Tell me a joke about cats", "tell me a joke about cats!"),
+    ("what is the capital of france", "what is the capital of france please"),
+]
+
+
+@pytest.mark.parametrize("cached, asked", DIFFERENT_QUERIES)
+def test_different_queries_do_not_match(cached, asked):
+    cache = SemanticResponseCache(max_entries=8)
+    cache.set(cached, "cached answer")
+    assert cache.get(asked) is None
+    assert cache.get(cached) == "cached answer"
+
+
+@pytest.mark.parametrize("cached, asked", SAME_QUERIES)
+def test_rephrased_queries_match(cached, asked):
+    cache = SemanticResponseCache(max_entries=8)
+    cache.set(cached, "cached answer")
+    assert cache.get(asked) == "cached answer"
+
+
+def test_scopes_are_separate():
+    cache = SemanticResponseCache(max_entries=8)
+    cache.set("what did i just say", "answer in context", scope="context-a")
+    assert cache.get("what did i just say", scope="context-b") is None
+    assert cache.get("what did i just say", scope=GLOBAL_SCOPE) is None
+    assert cache.get("what did i just say", scope="context-a") == "answer in context"
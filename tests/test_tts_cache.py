@@ -0,0 +1,35 @@
+import asyncio
+import os
+import time
+
+from services.tts_cache import TTSCache
+
+
+def test_disk_tier_is_pruned_to_its_bound(tmp_path):
+    stale = tmp_path / "stale.json"
+    stale.write_text('{"audio_url": "https://old", "expires_at": 0}')
+    long_ago = time.time() - 10 ** 7
+    os.utime(stale, (long_ago, long_ago))
+
+    cache = TTSCache(disk_dir=str(tmp_path), disk_max_entries=3, prune_interval=0.01)
+    assert not stale.exists()
+
+    async def fill():
+        for i in range(6):
+            await cache.set(f"key{i}", f"https://audio/{i}")
+            await asyncio.sleep(0.02)
+
+    asyncio.run(fill())
+    assert sorted(os.listdir(tmp_path)) == ["key3.json", "key4.json", "key5.json"]
+
+
+def test_other_worker_reads_disk_tier(tmp_path):
+    async def scenario():
+        await TTSCache(disk_dir=str(tmp_path)).set("key", "https://audio/1")
+        other = TTSCache(disk_dir=str(tmp_path))
+        assert await other.get("key") == "https://audio/1"
+        assert await other.get("missing") is None
+        return other.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["disk_hits"] == 1 and stats["misses"] == 1